@@ -1,13 +1,30 @@
 import json
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from club.models import Activity
+from club.api.conditional import conditional_get
+from club.services.catalogue import get_catalogue
+from club.services.photos import photo_urls, schedule_photo_variants
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 
 
+def _serialize_activity(activity):
+    return {
+        "id": activity.id,
+        "code_act": activity.code_act,
+        "nom_act": activity.nom_act,
+        "tarif_mensuel": float(activity.tarif_mensuel),
+        "capacite": activity.capacite,
+        "nb_inscriptions": activity.nb_inscriptions,
+        "places_disponibles": activity.capacite - activity.nb_inscriptions,
+        "photo": activity.photo.url if activity.photo else None,
+        "photos": photo_urls(activity)
+    }
+
+
 @csrf_exempt
 @extend_schema(
     summary="List or Create Activities",
@@ -49,35 +66,30 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExampl
 )
 @api_view(['GET', 'POST'])
 @permission_classes([]) # Allow public to LIST
+@conditional_get(Activity, public=True)
 def activities(request):
     if request.method == "GET":
         search = request.GET.get("search")
         sort = request.GET.get("sort")
+        if sort not in ("capacite", "-capacite"):
+            sort = None
+
+        def build():
+            queryset = Activity.objects.all()
+
+            # search by nom_act
+            if search:
+                queryset = queryset.filter(nom_act__icontains=search)
+
+            # sort by capacite
+            if sort:
+                queryset = queryset.order_by(sort)
 
-        queryset = Activity.objects.all()
-
-        # search by nom_act
-        if search:
-            queryset = queryset.filter(nom_act__icontains=search)
-
-        # sort by capacite
-        if sort == "capacite":
-            queryset = queryset.order_by("capacite")
-        elif sort == "-capacite":
-            queryset = queryset.order_by("-capacite")
-
-        # Return with proper photo URLs
-        activities_list = []
-        for activity in queryset:
-            activities_list.append({
-                "id": activity.id,
-                "code_act": activity.code_act,
-                "nom_act": activity.nom_act,
-                "tarif_mensuel": float(activity.tarif_mensuel),
-                "capacite": activity.capacite,
-                "photo": activity.photo.url if activity.photo else None
-            })
-        return JsonResponse(activities_list, safe=False)
+            # Return with proper photo URLs
+            return [_serialize_activity(activity) for activity in queryset]
+
+        # Public landing-page call: served from the cache, invalidated by club.signals
+        return JsonResponse(get_catalogue(search, sort, build), safe=False)
 
     if request.method == "POST":
         if not request.user.is_authenticated or not request.user.is_staff:
@@ -115,6 +127,8 @@ def activities(request):
                     capacite=request.POST["capacite"],
                     photo=request.FILES.get("photo")
                 )
+                # thumbnails are generated by a background worker
+                schedule_photo_variants(activity)
                 return JsonResponse({"id": activity.id, "success": True})
             except IntegrityError:
                 return JsonResponse({"error": f"Le code activité existe déjà"}, status=400)
@@ -142,7 +156,10 @@ def activity_detail(request, activity_id):
             "nom_act": activity.nom_act,
             "tarif_mensuel": activity.tarif_mensuel,
             "capacite": activity.capacite,
-            "photo": activity.photo.url if activity.photo else None
+            "nb_inscriptions": activity.nb_inscriptions,
+            "places_disponibles": activity.capacite - activity.nb_inscriptions,
+            "photo": activity.photo.url if activity.photo else None,
+            "photos": photo_urls(activity)
         })
 
     if request.method == "PUT":
@@ -158,7 +175,9 @@ def activity_detail(request, activity_id):
                 activity.capacite = data.get("capacite", activity.capacite)
                 if "code_act" in data:
                     activity.code_act = data["code_act"]
-                activity.save()
+                # a capacity increase promotes the waitlist in the same transaction
+                with transaction.atomic():
+                    activity.save()
                 return JsonResponse({"success": True})
             except json.JSONDecodeError:
                 return JsonResponse({"error": "Invalid JSON"}, status=400)
@@ -171,7 +190,10 @@ def activity_detail(request, activity_id):
             if "photo" in request.FILES:
                 activity.photo = request.FILES["photo"]
 
-            activity.save()
+            with transaction.atomic():
+                activity.save()
+            if "photo" in request.FILES:
+                schedule_photo_variants(activity)
             return JsonResponse({"success": True})
 
     if request.method == "DELETE":
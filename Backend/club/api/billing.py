@@ -0,0 +1,198 @@
+import json
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from club.models import Activity, BillingRun, Invoice
+from club.api.conditional import conditional_get
+from club.api.pagination import paginate, PaginationError
+from club.services.billing import BillingError, mrr_per_activity, parse_month, schedule_billing
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
+
+
+def _serialize_run(run):
+    return {
+        "month": f"{run.month:%Y-%m}",
+        "status": run.status,
+        "invoices": run.invoices,
+        "total": round(run.total, 2),
+        "last_member_id": run.last_member_id,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+    }
+
+
+def _serialize_invoice(invoice):
+    return {
+        "id": invoice.id,
+        "membre_id": invoice.membre_id,
+        "month": f"{invoice.month:%Y-%m}",
+        "type_abonnement": invoice.type_abonnement,
+        "amount": invoice.amount,
+        "lines": [
+            {"activity_id": line.activite_id, "libelle": line.libelle, "amount": line.amount}
+            for line in invoice.lines.all()
+        ],
+    }
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Billing Runs",
+    description=(
+        "GET lists the billing runs. POST {\"month\": \"YYYY-MM\", \"restart\": false} starts billing "
+        "that month in the background (202); an interrupted run is resumed, a finished one is only "
+        "billed again with restart=true."
+    ),
+    responses={
+        200: OpenApiResponse(description="Billing runs"),
+        202: OpenApiResponse(
+            description="Billing started",
+            examples=[
+                OpenApiExample(
+                    'Started',
+                    value={"month": "2026-10", "status": "RUNNING", "invoices": 0, "total": 0, "last_member_id": 0,
+                           "started_at": "2026-10-31T22:00:00Z", "finished_at": None}
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid month"),
+        409: OpenApiResponse(description="Month already billed or billing in progress"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Billing']
+)
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def billing_runs(request):
+    if request.method == "GET":
+        runs = BillingRun.objects.order_by("-month")
+        return JsonResponse([_serialize_run(run) for run in runs], safe=False)
+
+    try:
+        data = json.loads(request.body or "{}")
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    try:
+        run = schedule_billing(parse_month(data.get("month")), restart=bool(data.get("restart")))
+    except BillingError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    return JsonResponse(_serialize_run(run), status=202)
+
+
+@extend_schema(
+    summary="Billing Run Status",
+    description="Progress and totals of the billing run of one month (YYYY-MM).",
+    responses={
+        200: OpenApiResponse(description="Billing run"),
+        400: OpenApiResponse(description="Invalid month"),
+        404: OpenApiResponse(description="Month never billed"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Billing']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def billing_run_detail(request, month):
+    try:
+        run = BillingRun.objects.get(month=parse_month(month))
+    except BillingError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except BillingRun.DoesNotExist:
+        return JsonResponse({"error": "Not found"}, status=404)
+    return JsonResponse(_serialize_run(run))
+
+
+@extend_schema(
+    summary="Invoices",
+    description="Invoices of one month, with their lines, cursor-paginated by id.",
+    parameters=[
+        OpenApiParameter(name='month', description='YYYY-MM', required=True, type=str),
+        OpenApiParameter(name='member_id', description='Only this member', required=False, type=int),
+        OpenApiParameter(name='limit', description='Page size (default 50, max 500)', required=False, type=int),
+        OpenApiParameter(name='cursor', description='Cursor returned as "next" by the previous page', required=False, type=str),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description="One page of invoices",
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "results": [
+                            {"id": 1, "membre_id": 1, "month": "2026-10", "type_abonnement": "MONTHLY", "amount": 95.0,
+                             "lines": [{"activity_id": 1, "libelle": "Yoga", "amount": 50.0},
+                                       {"activity_id": 2, "libelle": "Pilates", "amount": 45.0}]}
+                        ],
+                        "next": None
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid month, cursor or limit"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Billing']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@conditional_get(Invoice)
+def invoices(request):
+    try:
+        month = parse_month(request.GET.get("month"))
+    except BillingError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    queryset = Invoice.objects.filter(month=month).prefetch_related("lines")
+    member_id = request.GET.get("member_id")
+    if member_id:
+        queryset = queryset.filter(membre_id=member_id)
+    try:
+        rows, next_cursor = paginate(request, queryset)
+    except PaginationError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"results": [_serialize_invoice(invoice) for invoice in rows], "next": next_cursor})
+
+
+@extend_schema(
+    summary="Monthly Recurring Revenue",
+    description="Billed revenue of one month (YYYY-MM) per activity, from the invoice lines.",
+    responses={
+        200: OpenApiResponse(
+            description="MRR per activity",
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "month": "2026-10",
+                        "total": 1175.0,
+                        "activities": [
+                            {"activity_id": 1, "nom_act": "Yoga", "members": 15, "mrr": 750.0},
+                            {"activity_id": 2, "nom_act": "Pilates", "members": 10, "mrr": 425.0}
+                        ]
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid month"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Billing']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@conditional_get(Invoice, Activity)
+def billing_mrr(request, month):
+    try:
+        month = parse_month(month)
+    except BillingError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    activities = mrr_per_activity(month)
+    return JsonResponse({
+        "month": f"{month:%Y-%m}",
+        "total": round(sum(row["mrr"] for row in activities), 2),
+        "activities": activities,
+    })
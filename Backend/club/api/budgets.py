@@ -0,0 +1,79 @@
+# Maximum number of SQL queries per request, by route of club/urls.py and method.
+#
+# Counted by club.middleware.QueryBudgetMiddleware (CLUB_QUERY_BUDGETS = "warn" or
+# "raise") and checked for every route by club.budget_check (the test suite and
+# `python manage.py check_query_budgets`), which fails when an endpoint goes over
+# budget or has none. Figures are for a session-authenticated admin (session +
+# user: 2 queries; a JWT costs 1) and a cold cache (catalogue, stats, ETags not
+# cached yet), transactions included: a transaction or savepoint counts once, when it
+# opens (see club.middleware), so the figures hold inside a test's transaction too.
+# They must not grow with the number of rows: a list that does is an N+1.
+QUERY_BUDGETS = {
+    "auth/token/": {"POST": 1},
+    "auth/token/refresh/": {"POST": 1},
+    "auth/login/": {"POST": 6},
+    "auth/logout/": {"POST": 4},
+    "auth/me/": {"GET": 2},
+
+    "members/": {"GET": 5, "POST": 4},
+    # POST: the first import of the day also creates the day's rollup row (savepoint + INSERT)
+    "members/import/": {"POST": 8},
+    # DELETE of a member with enrollments, subscription, invoices and check-ins: the
+    # collector reads the 5 dependent tables and deletes each (invoice lines too), then
+    # the stamp upsert, the subscription and member rollups, and the enrollments'
+    # and check-ins' effects grouped by club.signals.apply_member_cascade (counters,
+    # day rollups, waitlists to serve). Plus one promotion per full activity left.
+    "members/<int:member_id>/": {"GET": 3, "PUT": 4, "DELETE": 23},
+
+    "activities/": {"GET": 5, "POST": 4},
+    # PUT: a capacity increase promotes the head of the waitlist in the same transaction
+    "activities/<int:activity_id>/": {"GET": 3, "PUT": 9, "DELETE": 17},
+    "activities/<int:activity_id>/calendar.ics": {"GET": 9},
+    "activities/<int:activity_id>/waitlist/": {"GET": 7, "POST": 12},
+    # DELETE: the tickets behind the member move up (two UPDATEs), so that GET reads the
+    # position as sequence - now_serving
+    "activities/<int:activity_id>/waitlist/<int:member_id>/": {"GET": 4, "DELETE": 7},
+
+    "enrollments/": {"GET": 7, "POST": 7},
+    "enrollments/bulk/": {"POST": 9},
+    # DELETE of a seat of a full activity: the delete, seat counter, stamp and day rollup
+    # (4), then the promotion of the head of the waitlist in the same transaction
+    # (savepoint, activity lock, heads, already enrolled, enrollment INSERT, ticket
+    # DELETE, counters UPDATE, day rollup: 8)
+    "enrollments/<int:enrollment_id>/": {"GET": 3, "PUT": 11, "DELETE": 16},
+
+    "subscriptions/": {"GET": 6, "POST": 6},
+    "subscriptions/expiring/": {"GET": 6},
+    "subscriptions/bulk/": {"POST": 9},
+    "subscriptions/bulk/renew/": {"POST": 5},
+    "subscriptions/<int:subscription_id>/": {"GET": 3, "PUT": 9, "DELETE": 7},
+
+    "class-sessions/": {"GET": 6, "POST": 7},
+    "class-sessions/validate/": {"POST": 4},
+    "class-sessions/calendar.ics": {"GET": 8},
+    "class-sessions/<int:session_id>/": {"GET": 3, "PUT": 7, "DELETE": 8},
+    # the batch itself is written by the check-in writer thread, on its own connection
+    "class-sessions/<int:session_id>/check-in/": {"POST": 4},
+    "class-sessions/<int:session_id>/attendances/": {"GET": 7},
+
+    # POST, PUT: the overlap check of the generated sessions (window sessions + schedules)
+    # and the savepoints of the nested transactions
+    "schedules/": {"GET": 6, "POST": 13},
+    "schedules/occurrences/": {"GET": 4},
+    "schedules/<int:schedule_id>/": {"GET": 3, "PUT": 16, "DELETE": 12},
+    "schedules/<int:schedule_id>/occurrences/<str:date>/": {"POST": 6},
+
+    "export/<str:dataset>/": {"GET": 3},
+
+    "billing/runs/": {"GET": 3},
+    "billing/runs/<str:month>/": {"GET": 3},
+    "billing/invoices/": {"GET": 6},
+    "billing/mrr/<str:month>/": {"GET": 6},
+
+    "stats/": {"GET": 5},
+    "stats/activities/": {"GET": 7},
+    "stats/members-per-activity/": {"GET": 8},
+    "stats/members-per-activity/<int:activity_id>/": {"GET": 8},
+    "stats/timeseries/<str:metric>/": {"GET": 3},
+    "stats/breakdown/<str:name>/": {"GET": 6},
+}
@@ -1,17 +1,51 @@
 import json
-from django.http import JsonResponse
+from datetime import datetime
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated
-from club.models import ClassSession, Activity
+from club.models import Attendance, ClassSession, Activity
+from club.api.conditional import PUBLIC_MAX_AGE, conditional_get
+from club.api.pagination import is_paginated, paginate, PaginationError
+from club.api.streaming import FEED_RENDERERS, STREAM_RENDERERS, wants_stream, stream_queryset
+from club.services.attendance import CHECKIN_CREATED, CHECKIN_DUPLICATE, CheckInError, checkin_writer
+from club.services.calendar import calendar_feed
+from club.services.timetable import TIMETABLE_MAX_SLOTS, TimetableConflict, TimetableError, save_checked, validate_timetable
+
+
+def _slot_error(e):
+    body = {"error": str(e)}
+    if isinstance(e, TimetableConflict):
+        body["conflicts"] = e.conflicts
+    return JsonResponse(body, status=e.status)
+
+
+def _serialize_session(session):
+    return {
+        "id": session.id,
+        "activite": {
+            "id": session.activite.id,
+            "nom_act": session.activite.nom_act,
+            "code_act": session.activite.code_act
+        },
+        "schedule_id": session.schedule_id,
+        "date": session.date.isoformat(),
+        "heure_debut": session.heure_debut.strftime('%H:%M'),
+        "heure_fin": session.heure_fin.strftime('%H:%M'),
+        "nb_presents": session.nb_presents
+    }
 
 
 @csrf_exempt
 @api_view(['GET', 'POST'])
 @permission_classes([]) # Allow public access by default, checks inside
+@renderer_classes(STREAM_RENDERERS)
+@conditional_get(ClassSession, (Activity, "details_updated_at"), public=True)
 def class_sessions(request):
     """
-    GET: List all class sessions (Public)
+    GET: List all class sessions (Public, ?format=json|ndjson streams them, ?date_from=&date_to= for a window)
     POST: Create a new class session (Authenticated only)
     """
     if request.method == "GET":
@@ -27,25 +61,41 @@ def class_sessions(request):
         if date:
             sessions = sessions.filter(date=date)
         
-        # Sort by date and time
+        # Filter by date window (inclusive), served by the (date, heure_debut) index
+        for param, lookup in (('date_from', 'date__gte'), ('date_to', 'date__lte')):
+            value = request.GET.get(param)
+            if value:
+                try:
+                    day = datetime.strptime(value, '%Y-%m-%d').date()
+                except ValueError:
+                    return JsonResponse({"error": f"Invalid {param} format. Use YYYY-MM-DD"}, status=400)
+                sessions = sessions.filter(**{lookup: day})
+        
+        # Sort by date and time (id breaks ties for keyset pagination)
         sort = request.GET.get('sort', 'date')
-        if sort in ['date', '-date', 'heure_debut', '-heure_debut']:
-            sessions = sessions.order_by(sort)
+        orderings = {
+            'date': ('date', 'heure_debut', 'id'),
+            '-date': ('-date', '-heure_debut', '-id'),
+            'heure_debut': ('heure_debut', 'id'),
+            '-heure_debut': ('-heure_debut', '-id'),
+        }
+        ordering = orderings.get(sort, orderings['date'])
+        sessions = sessions.order_by(*ordering)
+        
+        if wants_stream(request):
+            return stream_queryset(request, sessions, _serialize_session)
         
-        data = []
-        for session in sessions:
-            data.append({
-                "id": session.id,
-                "activite": {
-                    "id": session.activite.id,
-                    "nom_act": session.activite.nom_act,
-                    "code_act": session.activite.code_act
-                },
-                "date": session.date.isoformat(),
-                "heure_debut": session.heure_debut.strftime('%H:%M'),
-                "heure_fin": session.heure_fin.strftime('%H:%M')
-            })
+        next_cursor = None
+        if is_paginated(request):
+            try:
+                sessions, next_cursor = paginate(request, sessions, ordering)
+            except PaginationError as e:
+                return JsonResponse({"error": str(e)}, status=400)
         
+        data = [_serialize_session(session) for session in sessions]
+        
+        if is_paginated(request):
+            return JsonResponse({"results": data, "next": next_cursor})
         return JsonResponse(data, safe=False)
     
     if request.method == "POST":
@@ -68,17 +118,39 @@ def class_sessions(request):
         except Activity.DoesNotExist:
             return JsonResponse({"error": "Activity not found"}, status=404)
         
-        # Create the class session
-        session = ClassSession.objects.create(
-            activite=activite,
-            date=data['date'],
-            heure_debut=data['heure_debut'],
-            heure_fin=data['heure_fin']
-        )
+        # Create the class session, unless it overlaps another session of the activity
+        try:
+            session = save_checked(ClassSession(activite=activite), data)
+        except TimetableError as e:
+            return _slot_error(e)
         
         return JsonResponse({"id": session.id, "success": True}, status=201)
 
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def class_sessions_validate(request):
+    """
+    POST: Check a whole timetable without saving it (Authenticated only)
+    Body: {"sessions": [{"id"?, "activite_id", "date", "heure_debut", "heure_fin"}, ...]}
+    Each slot is checked against the other slots and against the existing sessions
+    (and schedule occurrences) of the same activity; "id" marks an existing session being moved.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    
+    slots = data.get('sessions') if isinstance(data, dict) else None
+    if not isinstance(slots, list):
+        return JsonResponse({"error": "Missing required field: sessions (list)"}, status=400)
+    if len(slots) > TIMETABLE_MAX_SLOTS:
+        return JsonResponse({"error": f"Too many sessions (max {TIMETABLE_MAX_SLOTS})"}, status=400)
+    
+    return JsonResponse(validate_timetable(slots))
+
+
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([]) # Allow public access by default, checks inside
@@ -103,7 +175,8 @@ def class_session_detail(request, session_id):
             },
             "date": session.date.isoformat(),
             "heure_debut": session.heure_debut.strftime('%H:%M'),
-            "heure_fin": session.heure_fin.strftime('%H:%M')
+            "heure_fin": session.heure_fin.strftime('%H:%M'),
+            "nb_presents": session.nb_presents
         })
     
     if request.method == "PUT":
@@ -116,23 +189,20 @@ def class_session_detail(request, session_id):
             return JsonResponse({"error": "Invalid JSON"}, status=400)
         
         # Update fields if provided
-        if 'activite_id' in data:
-            try:
-                activite = Activity.objects.get(id=data['activite_id'])
-                session.activite = activite
-            except Activity.DoesNotExist:
-                return JsonResponse({"error": "Activity not found"}, status=404)
-        
-        if 'date' in data:
-            session.date = data['date']
-        
-        if 'heure_debut' in data:
-            session.heure_debut = data['heure_debut']
-        
-        if 'heure_fin' in data:
-            session.heure_fin = data['heure_fin']
+        if 'activite_id' in data and not Activity.objects.filter(id=data['activite_id']).exists():
+            return JsonResponse({"error": "Activity not found"}, status=404)
         
-        session.save()
+        slot = {
+            'activite_id': session.activite_id,
+            'date': session.date.isoformat(),
+            'heure_debut': session.heure_debut.strftime('%H:%M'),
+            'heure_fin': session.heure_fin.strftime('%H:%M'),
+        }
+        slot.update((field, data[field]) for field in slot if field in data)
+        try:
+            save_checked(session, slot)
+        except TimetableError as e:
+            return _slot_error(e)
         
         return JsonResponse({"success": True})
     
@@ -142,3 +212,113 @@ def class_session_detail(request, session_id):
 
         session.delete()
         return JsonResponse({"success": True})
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def class_session_check_in(request, session_id):
+    """
+    POST: Check a member in at the door (Authenticated only), on the day of the session
+    Body: {"membre_id": 12}. 201 when recorded, 200 when the member was already checked in.
+    Check-ins are written in batches; the response is sent once the batch is committed.
+    """
+    try:
+        data = json.loads(request.body)
+        member_id = int(data['membre_id'])
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "Missing required field: membre_id"}, status=400)
+    
+    try:
+        result = checkin_writer.check_in(session_id, member_id)
+    except CheckInError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    except TimeoutError:
+        return JsonResponse({"error": "Check-in is taking too long, please retry"}, status=503)
+    
+    if result == CHECKIN_CREATED:
+        return JsonResponse({"status": result, "success": True}, status=201)
+    if result == CHECKIN_DUPLICATE:
+        return JsonResponse({"status": result, "success": True})
+    return JsonResponse({"status": result, "error": result.replace('_', ' ').capitalize()}, status=404)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@conditional_get(Attendance, ClassSession)
+def class_session_attendances(request, session_id):
+    """
+    GET: Attendance of a session (Authenticated only): the counter, read from the
+    session row, and the members checked in (cursor-paginated with ?limit=&cursor=)
+    """
+    session = ClassSession.objects.filter(id=session_id).values('id', 'nb_presents').first()
+    if session is None:
+        return JsonResponse({"error": "Class session not found"}, status=404)
+    
+    attendances = (
+        Attendance.objects.filter(session_id=session_id)
+        .select_related('membre')
+        .order_by('id')
+    )
+    next_cursor = None
+    if is_paginated(request):
+        try:
+            attendances, next_cursor = paginate(request, attendances, ('id',))
+        except PaginationError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+    
+    return JsonResponse({
+        "session_id": session['id'],
+        "nb_presents": session['nb_presents'],
+        "results": [
+            {
+                "membre_id": a.membre_id,
+                "membre_nom": f"{a.membre.prenom} {a.membre.nom}",
+                "checked_in_at": a.checked_in_at.isoformat(),
+            }
+            for a in attendances
+        ],
+        "next": next_cursor,
+    })
+
+
+def _calendar_response(request, activity=None):
+    # Cached feed: 304 when the client already has this version, otherwise the
+    # cached body, or a freshly streamed one
+    version, chunks = calendar_feed(activity)
+    etag = quote_etag(version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = StreamingHttpResponse(chunks, content_type="text/calendar; charset=utf-8")
+        response["ETag"] = etag
+        filename = f"activity-{activity.pk}.ics" if activity else "club.ics"
+        response["Content-Disposition"] = f'inline; filename="{filename}"'
+    patch_cache_control(response, public=True, max_age=PUBLIC_MAX_AGE)
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([])
+@renderer_classes(FEED_RENDERERS)
+def class_sessions_calendar(request):
+    """
+    GET: iCalendar feed of every class session (Public), from 30 days ago to 180 days ahead,
+    schedule occurrences included
+    """
+    return _calendar_response(request)
+
+
+@api_view(['GET'])
+@permission_classes([])
+@renderer_classes(FEED_RENDERERS)
+def activity_calendar(request, activity_id):
+    """
+    GET: iCalendar feed of the class sessions of one activity (Public)
+    """
+    try:
+        activity = Activity.objects.get(id=activity_id)
+    except Activity.DoesNotExist:
+        return JsonResponse({"error": "Activity not found"}, status=404)
+    return _calendar_response(request, activity)
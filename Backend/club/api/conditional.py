@@ -0,0 +1,190 @@
+import hashlib
+import json
+import threading
+from datetime import datetime, time
+from functools import lru_cache, wraps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import CASCADE, Count, Max, QuerySet
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from club.models import DeletionStamp
+
+
+PUBLIC_MAX_AGE = getattr(settings, "CLUB_PUBLIC_MAX_AGE", 60)
+
+
+@lru_cache(maxsize=None)
+def _cascade_labels(model):
+    # `model` and every table its deletes cascade to
+    labels, todo = set(), [model]
+    while todo:
+        current = todo.pop()
+        if current._meta.label_lower in labels:
+            continue
+        labels.add(current._meta.label_lower)
+        todo.extend(
+            rel.related_model for rel in current._meta.related_objects
+            if rel.on_delete is CASCADE
+        )
+    return frozenset(labels)
+
+
+# Delete call in progress in this thread: its origin, whether its post_delete
+# signals have started, and the tables already stamped for it
+_deleting = threading.local()
+
+
+def begin_deletion(origin):
+    """
+    pre_delete side of record_deletion. A delete call sends every pre_delete
+    before its first post_delete, all with the same origin: a pre_delete for
+    another origin, or after post_delete signals, starts a new call.
+    """
+    if getattr(_deleting, "origin", None) is not origin or _deleting.started:
+        _deleting.origin, _deleting.started, _deleting.stamped = origin, False, set()
+
+
+def record_deletion(model, origin=None):
+    """
+    Notes the time of the latest delete on `model` (called from club.signals,
+    inside the deleting transaction). A delete lowers the row count, which
+    changes the ETag, but cannot raise max(updated_at); this timestamp keeps
+    Last-Modified honest too. Stored in the database so that every process
+    sends the same validators, before and after a restart.
+
+    One upsert per delete call: the first row deleted stamps the origin of
+    the delete and every table it cascades to, the rest of the cascade finds
+    them stamped (see begin_deletion).
+    """
+    labels = {model._meta.label_lower}
+    if origin is not None:
+        labels |= _cascade_labels(origin.model if isinstance(origin, QuerySet) else type(origin))
+        if getattr(_deleting, "origin", None) is not origin:
+            # delete without a pre_delete receiver on its origin
+            _deleting.origin, _deleting.stamped = origin, set()
+        _deleting.started = True
+        labels -= _deleting.stamped
+        if not labels:
+            return
+        _deleting.stamped |= labels
+    now = timezone.now()
+    DeletionStamp.objects.bulk_create(
+        [DeletionStamp(model=label, deleted_at=now) for label in sorted(labels)],
+        update_conflicts=True, unique_fields=["model"], update_fields=["deleted_at"],
+    )
+
+
+def deletion_stamps(*models):
+    """{model: timestamp of its latest delete}, in one query; missing when never deleted from."""
+    labels = {model._meta.label_lower: model for model in models}
+    return {
+        labels[label]: deleted_at.timestamp()
+        for label, deleted_at in DeletionStamp.objects.filter(model__in=labels).values_list("model", "deleted_at")
+    }
+
+
+def _stamp_field(entry):
+    # a model, or (model, field) to use another indexed timestamp than updated_at
+    return entry if isinstance(entry, tuple) else (entry, "updated_at")
+
+
+def collection_validators(*models):
+    """
+    Cheap validators for a set of tables: for each, max(updated_at) (indexed)
+    and the row count. An entry may be (model, field) to read another
+    timestamp, e.g. (Activity, "details_updated_at") for a payload without
+    the counters. Returns (etag, last_modified timestamp or None).
+    """
+    parts = []
+    last_modified = None
+    models = [_stamp_field(entry) for entry in models]
+    deletions = deletion_stamps(*(model for model, _ in models))
+    for model, field in models:
+        stats = model.objects.order_by().aggregate(last=Max(field), n=Count("pk"))
+        stamps = [stats["last"].timestamp()] if stats["last"] else []
+        deleted = deletions.get(model)
+        if deleted:
+            stamps.append(deleted)
+        if stamps:
+            last_modified = max(stamps + ([last_modified] if last_modified else []))
+        parts.append(f"{model._meta.label_lower}.{field}:{stats['n']}:{max(stamps) if stamps else 0}")
+    etag = hashlib.md5("|".join(parts).encode()).hexdigest()
+    return etag, last_modified
+
+
+def _add_cache_headers(response, public):
+    if public:
+        patch_cache_control(response, public=True, max_age=PUBLIC_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Authorization", "Cookie"))
+
+
+def snapshot_response(request, data, computed_at, public=False):
+    """
+    JsonResponse for a cached snapshot, validated by the snapshot itself
+    (content hash and computation time) rather than by the tables.
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    etag = quote_etag(hashlib.md5(payload.encode()).hexdigest())
+    last_modified = int(computed_at)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = JsonResponse(data)
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+    _add_cache_headers(response, public)
+    return response
+
+
+def _start_of_today():
+    today = timezone.localdate()
+    return timezone.make_aware(datetime.combine(today, time.min)), today
+
+
+def conditional_get(*models, public=False, daily=False):
+    """
+    Conditional GET for read endpoints whose payload only depends on `models`
+    (see collection_validators for the (model, field) form).
+
+    Must be placed under @api_view so that authentication and permissions run
+    first. On GET/HEAD, answers 304 Not Modified from If-None-Match /
+    If-Modified-Since without building the body; otherwise adds ETag and
+    Last-Modified to the view's response. Public endpoints may be cached by
+    browsers and proxies for CLUB_PUBLIC_MAX_AGE seconds; the others must be
+    revalidated on every use. `daily` is for payloads that also depend on
+    the local date (windows relative to today): the date is part of the
+    ETag and Last-Modified is never earlier than local midnight.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            etag, last_modified = collection_validators(*models)
+            # the same collection serialized for another URL (filters, format...)
+            key = f"{etag}|{request.get_full_path()}"
+            if daily:
+                midnight, today = _start_of_today()
+                key = f"{key}|{today.isoformat()}"
+                last_modified = max(last_modified or 0, midnight.timestamp())
+            etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+            last_modified = int(last_modified) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response["ETag"] = etag
+                if last_modified:
+                    response["Last-Modified"] = http_date(last_modified)
+
+            _add_cache_headers(response, public)
+            return response
+        return wrapper
+    return decorator
@@ -1,22 +1,46 @@
 import json
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from club.models import Enrollment, Member, Activity
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from club.api.conditional import conditional_get
+from club.api.pagination import is_paginated, paginate, PaginationError
+from club.api.streaming import STREAM_RENDERERS, wants_stream, stream_queryset
+from club.services.enrollments import ActivityFull, EnrollmentError, enroll_member, update_enrollment, bulk_enroll
+from club.services.waitlist import join_waitlist, waitlist_status
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
+
+
+def _serialize_enrollment(item):
+    # Transform the data for better frontend consumption
+    return {
+        "id": item["id"],
+        "membre_id": item["membre__id"],
+        "membre_nom": item["membre__nom"],
+        "membre_prenom": item["membre__prenom"],
+        "activite_id": item["activite__id"],
+        "activite_nom": item["activite__nom_act"],
+        "date_inscription": item["date_inscription"]
+    }
 
 
 @csrf_exempt
 @extend_schema(
     summary="List or Create Enrollments",
     description="GET: Retrieve all enrollments with member and activity details. POST: Create a new enrollment (checks for duplicates and capacity).",
+    parameters=[
+        OpenApiParameter(name='cursor', description='Cursor returned as "next" by the previous page', required=False, type=str),
+        OpenApiParameter(name='limit', description='Page size (max 500), switches to a paginated response', required=False, type=int),
+        OpenApiParameter(name='format', description='Stream the full list as a JSON array or NDJSON', required=False, type=str, enum=['json', 'ndjson']),
+    ],
     request={
         'application/json': {
             'type': 'object',
             'properties': {
                 'membre_id': {'type': 'integer', 'example': 1},
                 'activite_id': {'type': 'integer', 'example': 1},
+                'waitlist': {'type': 'boolean', 'example': True, 'description': 'Optional - Join the waitlist (202) if the activity is full'},
             },
             'required': ['membre_id', 'activite_id']
         }
@@ -58,6 +82,13 @@ from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
                 )
             ]
         ),
+        202: OpenApiResponse(
+            description="Activity full, member added to the waitlist (\"waitlist\": true)",
+            examples=[OpenApiExample(
+                'Waitlisted Response',
+                value={"waitlisted": True, "activite_id": 1, "membre_id": 4, "sequence": 12, "now_serving": 9, "position": 3}
+            )]
+        ),
         404: OpenApiResponse(description="Member or Activity not found"),
         401: OpenApiResponse(description="Unauthorized"),
         403: OpenApiResponse(description="Forbidden - Admin required")
@@ -66,6 +97,8 @@ from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
 )
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@renderer_classes(STREAM_RENDERERS)
+@conditional_get(Enrollment, Member, Activity)
 def enrollments(request):
     if request.method == "GET":
         data = Enrollment.objects.select_related("membre", "activite").values(
@@ -76,51 +109,108 @@ def enrollments(request):
             "activite__id",
             "activite__nom_act",
             "date_inscription"
-        )
-        # Transform the data for better frontend consumption
-        result = [
-            {
-                "id": item["id"],
-                "membre_id": item["membre__id"],
-                "membre_nom": item["membre__nom"],
-                "membre_prenom": item["membre__prenom"],
-                "activite_id": item["activite__id"],
-                "activite_nom": item["activite__nom_act"],
-                "date_inscription": item["date_inscription"]
-            }
-            for item in data
-        ]
+        ).order_by("id")
+
+        if wants_stream(request):
+            return stream_queryset(request, data, _serialize_enrollment)
+
+        next_cursor = None
+        if is_paginated(request):
+            try:
+                data, next_cursor = paginate(request, data)
+            except PaginationError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+        result = [_serialize_enrollment(item) for item in data]
+        if is_paginated(request):
+            return JsonResponse({"results": result, "next": next_cursor})
         return JsonResponse(result, safe=False)
 
     if request.method == "POST":
         data = json.loads(request.body)
 
+        # Capacity and duplicate checks happen in one transaction
+        # (conditional UPDATE of the seat counter + INSERT), see club.services.enrollments
         try:
-            membre = Member.objects.get(id=data["membre_id"])
-        except Member.DoesNotExist:
-            return JsonResponse({"error": "Member not found"}, status=404)
-        
-        try:
-            activite = Activity.objects.get(id=data["activite_id"])
-        except Activity.DoesNotExist:
-            return JsonResponse({"error": "Activity not found"}, status=404)
-
-        # Check if already enrolled
-        if Enrollment.objects.filter(membre=membre, activite=activite).exists():
-            return JsonResponse({"error": "Member already enrolled in this activity"}, status=400)
-
-        # capacity check
-        count = Enrollment.objects.filter(activite=activite).count()
-        if count >= activite.capacite:
-            return JsonResponse({"error": "Activity is full"}, status=400)
-
-        enrollment = Enrollment.objects.create(
-            membre=membre,
-            activite=activite
-        )
+            enrollment = enroll_member(data["membre_id"], data["activite_id"])
+        except ActivityFull as e:
+            # "waitlist": true queues the member instead (enrolled automatically when a seat frees up)
+            if not data.get("waitlist"):
+                return JsonResponse({"error": str(e)}, status=e.status)
+            try:
+                entry, _ = join_waitlist(data["membre_id"], data["activite_id"])
+            except EnrollmentError as e:
+                return JsonResponse({"error": str(e)}, status=e.status)
+            return JsonResponse({"waitlisted": True, **waitlist_status(entry)}, status=202)
+        except EnrollmentError as e:
+            return JsonResponse({"error": str(e)}, status=e.status)
         return JsonResponse({"id": enrollment.id, "success": True})
 
 
+@csrf_exempt
+@extend_schema(
+    summary="Bulk Create Enrollments",
+    description="Enroll many (membre_id, activite_id) pairs in one transaction. Capacity is checked once per activity; "
+                "each item gets a status: created, duplicate, full or not_found.",
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {
+                'items': {
+                    'type': 'array',
+                    'items': {
+                        'type': 'object',
+                        'properties': {
+                            'membre_id': {'type': 'integer', 'example': 1},
+                            'activite_id': {'type': 'integer', 'example': 1},
+                        },
+                        'required': ['membre_id', 'activite_id']
+                    }
+                }
+            },
+            'required': ['items']
+        }
+    },
+    responses={
+        200: OpenApiResponse(
+            description="Per-item results, in request order",
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "created": 1,
+                        "results": [
+                            {"membre_id": 1, "activite_id": 1, "status": "created", "id": 10},
+                            {"membre_id": 2, "activite_id": 1, "status": "duplicate", "id": None},
+                            {"membre_id": 3, "activite_id": 1, "status": "full", "id": None},
+                            {"membre_id": 99, "activite_id": 1, "status": "not_found", "id": None}
+                        ]
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid payload"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Enrollments']
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def enrollments_bulk(request):
+    try:
+        items = json.loads(request.body)["items"]
+        pairs = [(int(item["membre_id"]), int(item["activite_id"])) for item in items]
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "Expected {\"items\": [{\"membre_id\": ..., \"activite_id\": ...}, ...]}"}, status=400)
+
+    results = bulk_enroll(pairs)
+    return JsonResponse({
+        "created": sum(1 for r in results if r["status"] == "created"),
+        "results": results
+    })
+
+
 @csrf_exempt
 @extend_schema(
     summary="Get, Update, or Delete Enrollment",
@@ -167,7 +257,7 @@ def enrollments(request):
 @permission_classes([IsAuthenticated, IsAdminUser])
 def enrollment_detail(request, enrollment_id):
     try:
-        enrollment = Enrollment.objects.get(id=enrollment_id)
+        enrollment = Enrollment.objects.select_related("membre", "activite").get(id=enrollment_id)
     except Enrollment.DoesNotExist:
         return JsonResponse({"error": "Not found"}, status=404)
 
@@ -185,28 +275,11 @@ def enrollment_detail(request, enrollment_id):
     if request.method == "PUT":
         data = json.loads(request.body)
         
-        # Update member if provided
-        if "membre_id" in data:
-            try:
-                new_membre = Member.objects.get(id=data["membre_id"])
-                enrollment.membre = new_membre
-            except Member.DoesNotExist:
-                return JsonResponse({"error": "Member not found"}, status=404)
-        
-        # Update activity if provided
-        if "activite_id" in data:
-            try:
-                new_activite = Activity.objects.get(id=data["activite_id"])
-            except Activity.DoesNotExist:
-                return JsonResponse({"error": "Activity not found"}, status=404)
-            
-            # Check capacity for new activity
-            count = Enrollment.objects.filter(activite=new_activite).exclude(id=enrollment_id).count()
-            if count >= new_activite.capacite:
-                return JsonResponse({"error": "Activity is full"}, status=400)
-            enrollment.activite = new_activite
-        
-        enrollment.save()
+        # Update member and/or activity; moving takes a seat atomically in the new activity
+        try:
+            update_enrollment(enrollment, membre_id=data.get("membre_id"), activite_id=data.get("activite_id"))
+        except EnrollmentError as e:
+            return JsonResponse({"error": str(e)}, status=e.status)
         return JsonResponse({"success": True})
 
     if request.method == "DELETE":
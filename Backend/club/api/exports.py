@@ -0,0 +1,56 @@
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from club.api.streaming import EXPORT_RENDERERS
+from club.services.exports import DATASETS, EXPORT_FORMATS, ExportError, gzip_chunks, iter_export
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+
+
+@extend_schema(
+    summary="Export Club Data",
+    description="Stream a full dump of members, enrollments or subscriptions as CSV or NDJSON, "
+                "straight from the database with constant memory. Same filters as the list views.",
+    parameters=[
+        OpenApiParameter(name='format', description='Output format (default csv)', required=False, type=str, enum=list(EXPORT_FORMATS)),
+        OpenApiParameter(name='gzip', description='"true" to gzip the stream on the fly', required=False, type=str),
+        OpenApiParameter(name='actif', description='members / subscriptions: filter by active flag', required=False, type=str, enum=['true', 'false']),
+        OpenApiParameter(name='member_id', description='enrollments / subscriptions: filter by member', required=False, type=int),
+        OpenApiParameter(name='activite_id', description='enrollments: filter by activity', required=False, type=int),
+        OpenApiParameter(name='date_from', description='YYYY-MM-DD, inclusive (date_inscription, or date_debut for subscriptions)', required=False, type=str),
+        OpenApiParameter(name='date_to', description='YYYY-MM-DD, inclusive', required=False, type=str),
+    ],
+    responses={
+        200: OpenApiResponse(description="CSV or NDJSON stream"),
+        400: OpenApiResponse(description="Invalid filter"),
+        404: OpenApiResponse(description="Unknown dataset"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Exports']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@renderer_classes(EXPORT_RENDERERS)
+def export_data(request, dataset):
+    if dataset not in DATASETS:
+        return JsonResponse({"error": f"Unknown dataset. Use one of: {', '.join(DATASETS)}"}, status=404)
+
+    fmt = request.GET.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({"error": f"Unknown format. Use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+
+    try:
+        chunks = iter_export(dataset, request.GET, fmt)
+    except ExportError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    filename = f"{dataset}.{fmt}"
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    if request.GET.get("gzip", "").lower() == "true":
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        content_type = "application/gzip"
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,9 +1,13 @@
 import json
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from club.models import Member
+from club.api.conditional import conditional_get
+from club.api.pagination import is_paginated, paginate, PaginationError
+from club.api.streaming import STREAM_RENDERERS, wants_stream, stream_queryset
+from club.services.imports import IMPORT_FORMATS, detect_format, import_members, iter_rows
 from django.db.models import Q
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 
@@ -32,6 +36,25 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExampl
             type=str,
             enum=['age', '-age']
         ),
+        OpenApiParameter(
+            name='cursor',
+            description='Opaque cursor returned as "next" by the previous page',
+            required=False,
+            type=str
+        ),
+        OpenApiParameter(
+            name='limit',
+            description='Page size (max 500). Passing cursor or limit switches the response to {"results": [...], "next": cursor}',
+            required=False,
+            type=int
+        ),
+        OpenApiParameter(
+            name='format',
+            description='Stream the full list: "json" for a JSON array, "ndjson" for one member per line',
+            required=False,
+            type=str,
+            enum=['json', 'ndjson']
+        ),
     ],
     request={
         'application/json': {
@@ -74,6 +97,8 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExampl
 )
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@renderer_classes(STREAM_RENDERERS)
+@conditional_get(Member)
 def members(request):
    if request.method == "GET":
         search = request.GET.get("search")
@@ -92,13 +117,25 @@ def members(request):
                 Q(nom__icontains=search) | Q(prenom__icontains=search)
             )
 
-        # sort by age
+        # sort by age (id breaks ties so that every row has a stable position)
         if sort == "age":
-            queryset = queryset.order_by("age")
+            ordering = ("age", "id")
         elif sort == "-age":
-            queryset = queryset.order_by("-age")
+            ordering = ("-age", "-id")
+        else:
+            ordering = ("id",)
+
+        if is_paginated(request):
+            try:
+                rows, next_cursor = paginate(request, queryset.values(), ordering)
+            except PaginationError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+            return JsonResponse({"results": rows, "next": next_cursor})
+
+        if wants_stream(request):
+            return stream_queryset(request, queryset.order_by(*ordering).values())
 
-        return JsonResponse(list(queryset.values()), safe=False)
+        return JsonResponse(list(queryset.order_by(*ordering).values()), safe=False)
 
    if request.method == "POST":
         data = json.loads(request.body)
@@ -184,3 +221,55 @@ def member_detail(request, member_id):
     if request.method == "DELETE":
         member.delete()
         return JsonResponse({"success": True})
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Bulk Import Members",
+    description="Upload a CSV (header: nom,prenom,age,telephone,email,actif) or NDJSON file in the `file` field. "
+                "Rows are validated in batches and inserted with bulk_create; invalid rows are reported without "
+                "aborting the import. The format is taken from the optional `format` form field (csv/ndjson) "
+                "or from the file extension.",
+    request={
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'file': {'type': 'string', 'format': 'binary'},
+                'format': {'type': 'string', 'enum': ['csv', 'ndjson']},
+            },
+            'required': ['file']
+        }
+    },
+    responses={
+        200: OpenApiResponse(
+            description="Import report",
+            examples=[
+                OpenApiExample(
+                    'Import Report',
+                    value={
+                        "rows": 3,
+                        "created": 2,
+                        "error_count": 1,
+                        "errors": [{"line": 3, "errors": {"telephone": "Le numéro de téléphone doit contenir exactement 8 chiffres."}}]
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Missing file or unknown format"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Members']
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def members_import(request):
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"error": "A file is required (multipart field 'file')"}, status=400)
+
+    fmt = request.POST.get("format") or detect_format(upload.name)
+    if fmt not in IMPORT_FORMATS:
+        return JsonResponse({"error": f"Unknown format. Use one of: {', '.join(IMPORT_FORMATS)}"}, status=400)
+
+    return JsonResponse(import_members(iter_rows(upload.file, fmt)))
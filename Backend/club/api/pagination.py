@@ -0,0 +1,134 @@
+import base64
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class PaginationError(ValueError):
+    """Raised when the `cursor` or `limit` query parameters are invalid."""
+
+
+def is_paginated(request):
+    # Pagination is opt-in so existing clients keep receiving a plain list
+    return "cursor" in request.GET or "limit" in request.GET
+
+
+def parse_limit(request, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    raw = request.GET.get("limit")
+    if raw in (None, ""):
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be positive")
+    return min(limit, maximum)
+
+
+def encode_cursor(ordering, values):
+    payload = json.dumps({"o": list(ordering), "v": values}, cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _model_field(model, name):
+    # "membre__nom" -> the `nom` field of Member; None for annotations
+    field = None
+    for part in name.split("__"):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        model = field.related_model or model
+    return field
+
+
+def _cursor_value(model, field, value):
+    if isinstance(value, (list, dict)):
+        raise PaginationError("Invalid cursor")
+    model_field = _model_field(model, field.lstrip("-")) if model is not None else None
+    if model_field is None:
+        return value
+    try:
+        return model_field.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        raise PaginationError("Invalid cursor")
+
+
+def decode_cursor(cursor, ordering, model=None):
+    """
+    Values of the last row of the previous page. With `model`, each value is
+    converted (and validated) by the model field it is ordered on.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        cursor_ordering = payload["o"]
+    except (ValueError, KeyError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(values, list) or not isinstance(cursor_ordering, list):
+        raise PaginationError("Invalid cursor")
+    # A cursor is only valid for the ordering it was issued with
+    if cursor_ordering != list(ordering) or len(values) != len(ordering):
+        raise PaginationError("Cursor does not match the requested sort")
+    return [_cursor_value(model, field, value) for field, value in zip(ordering, values)]
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the "strictly after the last row" condition for a keyset page.
+
+    For ordering ("age", "id") and last row (30, 12) this gives
+    age > 30 OR (age = 30 AND id > 12), which the database resolves with
+    an index seek instead of skipping OFFSET rows.
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+def _row_value(row, field):
+    name = field.lstrip("-")
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def paginate(request, queryset, ordering=("id",)):
+    """
+    Return one keyset page of `queryset` and the cursor of the next page.
+
+    `ordering` must end with a unique, non-null field (usually "id") so that
+    every row has a distinct position. When `queryset` is a `.values()`
+    queryset, every ordering field must be part of the selected values.
+    """
+    limit = parse_limit(request)
+    queryset = queryset.order_by(*ordering)
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        values = decode_cursor(cursor, ordering, queryset.model)
+        try:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        except (TypeError, ValueError):
+            # e.g. a null value: not a position in this ordering
+            raise PaginationError("Invalid cursor")
+
+    # Fetch one extra row to know whether a next page exists
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(ordering, [_row_value(rows[-1], f) for f in ordering])
+    return rows, next_cursor
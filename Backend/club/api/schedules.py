@@ -0,0 +1,202 @@
+import json
+from datetime import datetime
+from django.db import transaction
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.decorators import api_view, permission_classes
+from club.models import Activity, ClassSchedule
+from club.api.conditional import conditional_get
+from club.services.schedules import (
+    ScheduleError, apply_rule, materialize_occurrence, occurrences, parse_activity_id, parse_window,
+    release_future_sessions
+)
+from club.services.timetable import TimetableConflict, TimetableError, save_schedule_checked
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+
+
+def _serialize_activity(activite):
+    return {"id": activite.id, "nom_act": activite.nom_act, "code_act": activite.code_act}
+
+
+def _serialize_schedule(schedule):
+    return {
+        "id": schedule.id,
+        "activite": _serialize_activity(schedule.activite),
+        "jours": schedule.jours,
+        "intervalle": schedule.intervalle,
+        "heure_debut": schedule.heure_debut.strftime('%H:%M'),
+        "heure_fin": schedule.heure_fin.strftime('%H:%M'),
+        "date_debut": schedule.date_debut.isoformat(),
+        "date_fin": schedule.date_fin.isoformat() if schedule.date_fin else None,
+        "exceptions": schedule.exceptions,
+    }
+
+
+def _serialize_occurrence(item):
+    return {
+        "id": item["id"],
+        "schedule_id": item["schedule_id"],
+        "materialized": item["id"] is not None,
+        "activite": _serialize_activity(item["activite"]),
+        "date": item["date"].isoformat(),
+        "heure_debut": item["heure_debut"].strftime('%H:%M'),
+        "heure_fin": item["heure_fin"].strftime('%H:%M'),
+    }
+
+
+def _error(e):
+    body = {"error": str(e)}
+    if isinstance(e, TimetableConflict):
+        body["conflicts"] = e.conflicts
+    return JsonResponse(body, status=e.status)
+
+
+def _load_json(request):
+    try:
+        return json.loads(request.body), None
+    except json.JSONDecodeError:
+        return None, JsonResponse({"error": "Invalid JSON"}, status=400)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="List or create recurring class schedules",
+    description=(
+        "GET (public): every weekly rule, optionally filtered by `activite_id`. "
+        "POST (authenticated): create a rule; the sessions of the rolling horizon are "
+        "materialized right away, the others are expanded on demand by /schedules/occurrences/. "
+        "409 with `conflicts` if one of them overlaps another session of the activity."
+    ),
+    parameters=[OpenApiParameter("activite_id", int, description="Only the rules of this activity")],
+    tags=["Schedules"],
+)
+@api_view(['GET', 'POST'])
+@permission_classes([]) # Allow public access by default, checks inside
+@conditional_get(ClassSchedule, (Activity, "details_updated_at"), public=True)
+def schedules(request):
+    if request.method == "GET":
+        rules = ClassSchedule.objects.select_related('activite').order_by('activite_id', 'heure_debut', 'id')
+        if request.GET.get('activite_id'):
+            try:
+                rules = rules.filter(activite_id=parse_activity_id(request.GET['activite_id']))
+            except ScheduleError as e:
+                return _error(e)
+        return JsonResponse([_serialize_schedule(rule) for rule in rules], safe=False)
+
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+
+    data, error = _load_json(request)
+    if error:
+        return error
+    for field in ('activite_id', 'jours', 'heure_debut', 'heure_fin', 'date_debut'):
+        if field not in data:
+            return JsonResponse({"error": f"Missing required field: {field}"}, status=400)
+
+    try:
+        schedule = apply_rule(ClassSchedule(), data)
+        materialized = save_schedule_checked(schedule)
+    except (ScheduleError, TimetableError) as e:
+        return _error(e)
+    return JsonResponse({"id": schedule.id, "materialized": materialized, "success": True}, status=201)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Retrieve, update or delete a recurring class schedule",
+    description=(
+        "PUT and DELETE (authenticated) first remove the future sessions materialized from "
+        "the rule; PUT then rebuilds the rolling horizon (409 with `conflicts` on an overlap, "
+        "nothing is changed). Past sessions are kept."
+    ),
+    tags=["Schedules"],
+)
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([]) # Allow public access by default, checks inside
+def schedule_detail(request, schedule_id):
+    try:
+        schedule = ClassSchedule.objects.select_related('activite').get(id=schedule_id)
+    except ClassSchedule.DoesNotExist:
+        return JsonResponse({"error": "Schedule not found"}, status=404)
+
+    if request.method == "GET":
+        return JsonResponse(_serialize_schedule(schedule))
+
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+
+    if request.method == "PUT":
+        data, error = _load_json(request)
+        if error:
+            return error
+        try:
+            apply_rule(schedule, data)
+            materialized = save_schedule_checked(schedule)
+        except (ScheduleError, TimetableError) as e:
+            return _error(e)
+        return JsonResponse({"success": True, "materialized": materialized})
+
+    with transaction.atomic():
+        release_future_sessions(schedule)
+        schedule.delete()
+    return JsonResponse({"success": True})
+
+
+@extend_schema(
+    summary="Class sessions of a date window",
+    description=(
+        "Public. The sessions between `date_from` and `date_to` (inclusive, default: the next "
+        "7 days, at most 366): existing class sessions plus the occurrences of the recurring "
+        "schedules, expanded for this window only. `materialized` is false for an occurrence "
+        "that has no class session yet (`id` is then null)."
+    ),
+    parameters=[
+        OpenApiParameter("date_from", str, description="First day, YYYY-MM-DD (default: today)"),
+        OpenApiParameter("date_to", str, description="Last day, YYYY-MM-DD"),
+        OpenApiParameter("activite_id", int, description="Only the sessions of this activity"),
+    ],
+    tags=["Schedules"],
+)
+@api_view(['GET'])
+@permission_classes([])
+def schedule_occurrences(request):
+    try:
+        date_from, date_to = parse_window(request.GET)
+        activite_id = parse_activity_id(request.GET['activite_id']) if request.GET.get('activite_id') else None
+    except ScheduleError as e:
+        return _error(e)
+    items = occurrences(date_from, date_to, activite_id)
+    return JsonResponse({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "results": [_serialize_occurrence(item) for item in items],
+    })
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Materialize one occurrence of a schedule",
+    description=(
+        "Authenticated. Returns the class session of the occurrence on `date` (YYYY-MM-DD), "
+        "creating it if needed (201), so that something can be attached to it."
+    ),
+    tags=["Schedules"],
+)
+@api_view(['POST'])
+@permission_classes([])
+def schedule_occurrence(request, schedule_id, date):
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required"}, status=401)
+    try:
+        schedule = ClassSchedule.objects.get(id=schedule_id)
+    except ClassSchedule.DoesNotExist:
+        return JsonResponse({"error": "Schedule not found"}, status=404)
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        return JsonResponse({"error": "Invalid date format. Use YYYY-MM-DD"}, status=400)
+    try:
+        session, created = materialize_occurrence(schedule, day)
+    except ScheduleError:
+        return JsonResponse({"error": "No occurrence of this schedule on that date"}, status=404)
+    return JsonResponse({"id": session.id, "created": created}, status=201 if created else 200)
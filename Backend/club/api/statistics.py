@@ -1,14 +1,24 @@
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from club.models import Member, Activity, Enrollment
+from club.api.conditional import conditional_get, snapshot_response
+from club.api.pagination import paginate, PaginationError
 from club.services.statistics import (
-    total_members,
     activities_with_counts,
-    most_popular_activity,
-    least_popular_activity,
-    members_per_activity
+    activity_members,
+    members_per_activity,
+    members_per_activity_summary,
+    overview_snapshot
 )
-from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+from club.services.cube import breakdown
+from club.services.statistics import BREAKDOWNS, SUBSCRIPTION_TYPES
+from club.services.timeseries import DEFAULT_PERIODS, GRANULARITIES, METRICS, TimeseriesError, parse_range, timeseries
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
+
+
+SUMMARY_DEFAULT_FIRST = 5
+SUMMARY_MAX_FIRST = 50
 
 
 @extend_schema(
@@ -44,21 +54,11 @@ from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
 def stats_overview(request):
     """
     Vue d'ensemble des statistiques du club.
+    Servie depuis un instantané en cache (CLUB_STATS_CACHE_TTL), recalculé par
+    trois requêtes (une somme, deux LIMIT 1 indexés) et au plus une fois à la fois.
     """
-    most_pop = most_popular_activity()
-    least_pop = least_popular_activity()
-    
-    return JsonResponse({
-        "total_members": total_members(),
-        "most_popular_activity": {
-            "nom": most_pop.nom_act,
-            "inscriptions": most_pop.nb_inscriptions
-        } if most_pop else None,
-        "least_popular_activity": {
-            "nom": least_pop.nom_act,
-            "inscriptions": least_pop.nb_inscriptions
-        } if least_pop else None,
-    })
+    snapshot = overview_snapshot.get()
+    return snapshot_response(request, snapshot["data"], snapshot["computed_at"])
 
 
 @extend_schema(
@@ -98,6 +98,7 @@ def stats_overview(request):
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@conditional_get(Member, Activity, Enrollment)
 def stats_activities(request):
     """
     Statistiques détaillées par activité.
@@ -119,7 +120,15 @@ def stats_activities(request):
 
 @extend_schema(
     summary="Members Per Activity",
-    description="Get a list of members grouped by activity.",
+    description=(
+        "Get a list of members grouped by activity. With ?summary=true, returns instead, "
+        "for each activity, its enrollment count and only its first N members "
+        "(the rest can be loaded page by page from /stats/members-per-activity/<activity_id>/)."
+    ),
+    parameters=[
+        OpenApiParameter(name='summary', description='Return counts and the first members of each activity only', required=False, type=bool),
+        OpenApiParameter(name='first', description=f'Members per activity in summary mode (default {SUMMARY_DEFAULT_FIRST}, max {SUMMARY_MAX_FIRST})', required=False, type=int),
+    ],
     responses={
         200: OpenApiResponse(
             description="Members grouped by activity",
@@ -135,9 +144,24 @@ def stats_activities(request):
                             {"id": 3, "nom": "Durand", "prenom": "Paul"}
                         ]
                     }
+                ),
+                OpenApiExample(
+                    'Summary Response',
+                    value=[
+                        {
+                            "activity_id": 1,
+                            "nom_act": "Yoga",
+                            "count": 15,
+                            "members": [
+                                {"id": 1, "nom": "Dupont", "prenom": "Jean"},
+                                {"id": 2, "nom": "Martin", "prenom": "Marie"}
+                            ]
+                        }
+                    ]
                 )
             ]
         ),
+        400: OpenApiResponse(description="Invalid 'first' parameter"),
         401: OpenApiResponse(description="Unauthorized"),
         403: OpenApiResponse(description="Forbidden - Admin required")
     },
@@ -145,8 +169,205 @@ def stats_activities(request):
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@conditional_get(Member, Activity, Enrollment)
 def stats_members_per_activity(request):
     """
-    Liste des membres regroupés par activité.
+    Liste des membres regroupés par activité (ou résumé avec ?summary=true).
     """
+    if request.GET.get('summary', '').lower() in ('1', 'true'):
+        try:
+            first = int(request.GET.get('first') or SUMMARY_DEFAULT_FIRST)
+        except ValueError:
+            return JsonResponse({'error': 'first must be an integer'}, status=400)
+        if first < 1:
+            return JsonResponse({'error': 'first must be positive'}, status=400)
+        return JsonResponse(members_per_activity_summary(min(first, SUMMARY_MAX_FIRST)), safe=False)
     return JsonResponse(members_per_activity())
+
+
+@extend_schema(
+    summary="Members Of One Activity",
+    description="Get the members enrolled in one activity, one cursor-paginated page at a time (in enrollment order).",
+    parameters=[
+        OpenApiParameter(name='limit', description='Page size (default 50, max 500)', required=False, type=int),
+        OpenApiParameter(name='cursor', description='Cursor returned as "next" by the previous page', required=False, type=str),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description="One page of members",
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "results": [
+                            {"id": 1, "nom": "Dupont", "prenom": "Jean"},
+                            {"id": 2, "nom": "Martin", "prenom": "Marie"}
+                        ],
+                        "next": "eyJvIjogWyJpZCJdLCAidiI6IFsyXX0"
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid cursor or limit"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required"),
+        404: OpenApiResponse(description="Activity not found")
+    },
+    tags=['Statistics']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@conditional_get(Member, Activity, Enrollment)
+def stats_activity_members(request, activity_id):
+    """
+    Membres d'une activité, page par page (chargement progressif du tableau de bord).
+    """
+    if not Activity.objects.filter(id=activity_id).exists():
+        return JsonResponse({'error': 'Not found'}, status=404)
+    try:
+        rows, next_cursor = paginate(request, activity_members(activity_id))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    data = [
+        {'id': row['membre_id'], 'nom': row['membre__nom'], 'prenom': row['membre__prenom']}
+        for row in rows
+    ]
+    return JsonResponse({'results': data, 'next': next_cursor})
+
+
+@extend_schema(
+    summary="Time Series",
+    description=(
+        "Trend of one metric, bucketed by day, week (starting Monday) or month: "
+        "new_members (Member.date_inscription), enrollments (Enrollment.date_inscription, "
+        "with a per-activity breakdown by code_act) or active_subscriptions "
+        "(subscriptions whose date_debut/date_fin overlap the period). "
+        "Buckets of closed periods are cached; only the current period is recomputed."
+    ),
+    parameters=[
+        OpenApiParameter(name='granularity', description='day, week or month (default month)', required=False, type=str, enum=list(GRANULARITIES)),
+        OpenApiParameter(name='date_from', description=f'YYYY-MM-DD, inclusive (default: the last {DEFAULT_PERIODS["month"]} months, {DEFAULT_PERIODS["week"]} weeks or {DEFAULT_PERIODS["day"]} days)', required=False, type=str),
+        OpenApiParameter(name='date_to', description='YYYY-MM-DD, inclusive (default today)', required=False, type=str),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description="Time series",
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "metric": "enrollments",
+                        "granularity": "month",
+                        "date_from": "2026-01-01",
+                        "date_to": "2026-02-15",
+                        "buckets": [
+                            {"period": "2026-01-01", "value": 12, "by_activity": {"ACT001": 8, "ACT002": 4}},
+                            {"period": "2026-02-01", "value": 5, "by_activity": {"ACT001": 5}}
+                        ]
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid granularity or date range"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required"),
+        404: OpenApiResponse(description="Unknown metric")
+    },
+    tags=['Statistics']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def stats_timeseries(request, metric):
+    """
+    Série temporelle d'un indicateur (regroupement par période fait en base).
+    """
+    if metric not in METRICS:
+        return JsonResponse({'error': f"Unknown metric. Use one of: {', '.join(METRICS)}"}, status=404)
+    granularity = request.GET.get('granularity', 'month')
+    try:
+        if granularity not in GRANULARITIES:
+            raise TimeseriesError(f"Unknown granularity. Use one of: {', '.join(GRANULARITIES)}")
+        date_from, date_to = parse_range(request.GET, granularity)
+        buckets = timeseries(metric, granularity, date_from, date_to)
+    except TimeseriesError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'metric': metric,
+        'granularity': granularity,
+        'date_from': date_from,
+        'date_to': date_to,
+        'buckets': buckets,
+    })
+
+
+@extend_schema(
+    summary="Dashboard Breakdown",
+    description=(
+        "Dashboard breakdowns: age_per_activity (enrolled members per age band, for each activity) "
+        "or revenue_per_subscription_type (enrollments and monthly revenue by the member's active "
+        "subscription type, null = none). Served from an in-memory analytics cube when NumPy is "
+        "installed, otherwise computed with the ORM; both give the same result."
+    ),
+    parameters=[
+        OpenApiParameter(name='actif', description='Only active / inactive members', required=False, type=str, enum=['true', 'false']),
+        OpenApiParameter(name='type_abonnement', description="Only members with this active subscription type", required=False, type=str, enum=list(SUBSCRIPTION_TYPES)),
+        OpenApiParameter(name='activity', description='Only this activity (id)', required=False, type=int),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description="Breakdown",
+            examples=[
+                OpenApiExample(
+                    'Age Per Activity',
+                    value=[
+                        {
+                            "activity_id": 1,
+                            "nom_act": "Yoga",
+                            "bands": {"<18": 0, "18-25": 6, "26-35": 5, "36-50": 3, "51-64": 1, "65+": 0}
+                        }
+                    ]
+                ),
+                OpenApiExample(
+                    'Revenue Per Subscription Type',
+                    value=[
+                        {"type_abonnement": None, "enrollments": 4, "revenue": 200.0},
+                        {"type_abonnement": "MONTHLY", "enrollments": 10, "revenue": 480.0}
+                    ]
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid filter"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required"),
+        404: OpenApiResponse(description="Unknown breakdown")
+    },
+    tags=['Statistics']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def stats_breakdown(request, name):
+    """
+    Répartition filtrable pour le tableau de bord (cube en mémoire ou ORM).
+    """
+    if name not in BREAKDOWNS:
+        return JsonResponse({'error': f"Unknown breakdown. Use one of: {', '.join(BREAKDOWNS)}"}, status=404)
+
+    filters = {}
+    actif = request.GET.get('actif')
+    if actif:
+        if actif.lower() not in ('true', 'false'):
+            return JsonResponse({'error': 'actif must be true or false'}, status=400)
+        filters['actif'] = actif.lower() == 'true'
+    type_abonnement = request.GET.get('type_abonnement')
+    if type_abonnement:
+        if type_abonnement not in SUBSCRIPTION_TYPES:
+            return JsonResponse({'error': f"Unknown type_abonnement. Use one of: {', '.join(SUBSCRIPTION_TYPES)}"}, status=400)
+        filters['type_abonnement'] = type_abonnement
+    activity = request.GET.get('activity')
+    if activity:
+        try:
+            filters['activity'] = int(activity)
+        except ValueError:
+            return JsonResponse({'error': 'activity must be an integer'}, status=400)
+
+    return JsonResponse(breakdown(name, **filters), safe=False)
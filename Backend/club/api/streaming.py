@@ -0,0 +1,113 @@
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from club.api.pagination import is_paginated
+
+
+STREAM_CHUNK_SIZE = 2000
+STREAM_FORMATS = ("json", "ndjson")
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Lets DRF content negotiation accept `?format=ndjson`.
+
+    The list views stream their own body, so this renderer is only used for
+    DRF-generated responses (401/403 errors), written as a single line.
+    """
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return (json.dumps(data, cls=DjangoJSONEncoder) + "\n").encode()
+
+
+class _JSONErrorRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept a format the views write themselves
+    (CSV, iCalendar). The only bodies DRF renders with it are error dicts
+    (401/403/405...), which have no CSV or iCalendar form: they are sent
+    as JSON, with a JSON Content-Type.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = JSONRenderer.media_type
+        return JSONRenderer().render(data)
+
+
+class CSVRenderer(_JSONErrorRenderer):
+    """`?format=csv` on the export views."""
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+
+class ICSRenderer(_JSONErrorRenderer):
+    """Calendar clients asking for `text/calendar`."""
+    media_type = "text/calendar"
+    format = "ics"
+    charset = "utf-8"
+
+
+# Renderers for views that support streaming: the defaults plus NDJSON
+STREAM_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + [NDJSONRenderer]
+EXPORT_RENDERERS = STREAM_RENDERERS + [CSVRenderer]
+FEED_RENDERERS = list(api_settings.DEFAULT_RENDERER_CLASSES) + [ICSRenderer]
+
+
+def wants_stream(request):
+    # ?format=json streams a JSON array, ?format=ndjson one object per line
+    return request.GET.get("format") in STREAM_FORMATS and not is_paginated(request)
+
+
+def _encoded_batches(rows, encoder):
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(row))
+        if len(batch) >= STREAM_CHUNK_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _encode_ndjson(rows, encoder):
+    for batch in _encoded_batches(rows, encoder):
+        yield "\n".join(batch) + "\n"
+
+
+def _encode_json_array(rows, encoder):
+    yield "["
+    separator = ""
+    for batch in _encoded_batches(rows, encoder):
+        yield separator + ",".join(batch)
+        separator = ","
+    yield "]"
+
+
+def stream_queryset(request, queryset, serialize=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream `queryset` as NDJSON or as a JSON array without materializing it.
+
+    Rows are read with `QuerySet.iterator(chunk_size=...)` and encoded in
+    batches, so memory use does not depend on the number of rows.
+    `serialize` turns one row (model instance or `.values()` dict) into a
+    JSON-serializable dict.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if serialize is not None:
+        rows = map(serialize, rows)
+
+    encoder = DjangoJSONEncoder()
+    if request.GET.get("format") == "ndjson":
+        return StreamingHttpResponse(_encode_ndjson(rows, encoder), content_type="application/x-ndjson")
+    return StreamingHttpResponse(_encode_json_array(rows, encoder), content_type="application/json")
@@ -1,18 +1,43 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from club.models import Subscription, Member
+from club.api.conditional import conditional_get
+from club.api.pagination import is_paginated, paginate, PaginationError
+from club.api.streaming import EXPORT_RENDERERS, STREAM_RENDERERS, wants_stream, stream_queryset
+from club.services.exports import EXPORT_CHUNK_SIZE, iter_csv
+from club.services.subscriptions import (
+    BULK_CREATED, BULK_RENEWED, EXPIRING_COLUMNS, EXPIRING_DEFAULT_DAYS, EXPIRING_MAX_DAYS,
+    bulk_create_subscriptions, bulk_renew_subscriptions, expiring_subscriptions, renewal_items
+)
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 import json
 from datetime import datetime
 
 
+def _serialize_subscription(sub):
+    return {
+        'id': sub.id,
+        'membre_id': sub.membre.id,
+        'membre_nom': f"{sub.membre.prenom} {sub.membre.nom}",
+        'type_abonnement': sub.type_abonnement,
+        'type_abonnement_display': sub.get_type_abonnement_display(),
+        'date_debut': sub.date_debut.isoformat(),
+        'date_fin': sub.date_fin.isoformat(),
+        'actif': sub.actif
+    }
+
+
 @csrf_exempt
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated, IsAdminUser])
+@renderer_classes(STREAM_RENDERERS)
+@conditional_get(Subscription, Member)
 def subscriptions(request):
     """
-    GET /api/subscriptions/ - List all subscriptions
+    GET /api/subscriptions/ - List all subscriptions (?format=json|ndjson streams them)
     POST /api/subscriptions/ - Create new subscription
     """
     if request.method == "GET":
@@ -28,17 +53,21 @@ def subscriptions(request):
         if actif is not None:
             subs = subs.filter(actif=actif.lower() == 'true')
         
-        data = [{
-            'id': sub.id,
-            'membre_id': sub.membre.id,
-            'membre_nom': f"{sub.membre.prenom} {sub.membre.nom}",
-            'type_abonnement': sub.type_abonnement,
-            'type_abonnement_display': sub.get_type_abonnement_display(),
-            'date_debut': sub.date_debut.isoformat(),
-            'date_fin': sub.date_fin.isoformat(),
-            'actif': sub.actif
-        } for sub in subs]
+        subs = subs.order_by('id')
+        if wants_stream(request):
+            return stream_queryset(request, subs, _serialize_subscription)
+        
+        next_cursor = None
+        if is_paginated(request):
+            try:
+                subs, next_cursor = paginate(request, subs)
+            except PaginationError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+        
+        data = [_serialize_subscription(sub) for sub in subs]
         
+        if is_paginated(request):
+            return JsonResponse({'results': data, 'next': next_cursor})
         return JsonResponse(data, safe=False)
     
     elif request.method == "POST":
@@ -90,6 +119,133 @@ def subscriptions(request):
         }, status=201)
 
 
+def _serialize_expiring(sub, today):
+    data = _serialize_subscription(sub)
+    data.update({
+        'membre_email': sub.membre.email,
+        'membre_telephone': sub.membre.telephone,
+        'jours_restants': (sub.date_fin - today).days,
+    })
+    return data
+
+
+@extend_schema(
+    summary="Expiring Subscriptions",
+    description=(
+        "Active subscriptions ending within the next N days (today included), soonest first, "
+        "with the member's contact details. Cursor-paginated; ?format=csv (mail merge) or "
+        "?format=ndjson streams the whole list."
+    ),
+    parameters=[
+        OpenApiParameter(name='within_days', description=f'Days ahead (default {EXPIRING_DEFAULT_DAYS}, max {EXPIRING_MAX_DAYS})', required=False, type=int),
+        OpenApiParameter(name='limit', description='Page size (default 50, max 500)', required=False, type=int),
+        OpenApiParameter(name='cursor', description='Cursor returned as "next" by the previous page', required=False, type=str),
+        OpenApiParameter(name='format', description='csv / ndjson / json to stream every row instead of a page', required=False, type=str, enum=['csv', 'ndjson', 'json']),
+    ],
+    responses={
+        200: OpenApiResponse(
+            description="One page of expiring subscriptions",
+            examples=[
+                OpenApiExample(
+                    'Success Response',
+                    value={
+                        "results": [
+                            {"id": 7, "membre_id": 3, "membre_nom": "Jean Dupont", "type_abonnement": "MONTHLY",
+                             "type_abonnement_display": "Mensuel", "date_debut": "2026-09-20", "date_fin": "2026-10-20",
+                             "actif": True, "membre_email": "jean@example.com", "membre_telephone": "12345678",
+                             "jours_restants": 3}
+                        ],
+                        "next": None
+                    }
+                )
+            ]
+        ),
+        400: OpenApiResponse(description="Invalid within_days, cursor or limit"),
+        401: OpenApiResponse(description="Unauthorized"),
+        403: OpenApiResponse(description="Forbidden - Admin required")
+    },
+    tags=['Subscriptions']
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@renderer_classes(EXPORT_RENDERERS)
+@conditional_get(Subscription, Member, daily=True)
+def subscriptions_expiring(request):
+    try:
+        within_days = int(request.GET.get('within_days') or EXPIRING_DEFAULT_DAYS)
+    except ValueError:
+        return JsonResponse({'error': 'within_days must be an integer'}, status=400)
+    if not 0 <= within_days <= EXPIRING_MAX_DAYS:
+        return JsonResponse({'error': f'within_days must be between 0 and {EXPIRING_MAX_DAYS}'}, status=400)
+
+    today = timezone.localdate()
+    subs = expiring_subscriptions(within_days, today).order_by('date_fin', 'id')
+
+    if request.GET.get('format') == 'csv':
+        header = [name for name, _ in EXPIRING_COLUMNS]
+        rows = subs.values_list(*[field for _, field in EXPIRING_COLUMNS]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        response = StreamingHttpResponse(iter_csv(header, rows), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="expiring_subscriptions.csv"'
+        return response
+    if wants_stream(request):
+        return stream_queryset(request, subs, lambda sub: _serialize_expiring(sub, today))
+
+    try:
+        subs, next_cursor = paginate(request, subs, ordering=('date_fin', 'id'))
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': [_serialize_expiring(sub, today) for sub in subs], 'next': next_cursor})
+
+
+def _bulk_response(results, status_name):
+    return JsonResponse({
+        status_name: sum(1 for r in results if r['status'] == status_name),
+        'results': results
+    })
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def subscriptions_bulk(request):
+    """
+    POST /api/subscriptions/bulk/ - Create many subscriptions at once
+    {"items": [{"membre_id": 1, "type_abonnement": "ANNUAL", "date_debut": "2026-09-01"}, ...]}
+    Per-item status: created / already_subscribed / not_found / invalid
+    """
+    try:
+        items = json.loads(request.body)['items']
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise TypeError
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return JsonResponse({'error': 'Expected {"items": [{"membre_id": ..., "type_abonnement": ..., "date_debut": ...}, ...]}'}, status=400)
+    return _bulk_response(bulk_create_subscriptions(items), BULK_CREATED)
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def subscriptions_bulk_renew(request):
+    """
+    POST /api/subscriptions/bulk/renew/ - Renew many subscriptions at once
+    {"items": [{"membre_id": 1, "type_abonnement": "ANNUAL" (optional), "date_debut": "2026-09-01" (optional)}, ...]}
+    or {"ending_before": "2026-09-01"} to renew every subscription ending before that date
+    (same type, starting at the old date_fin).
+    Per-item status: renewed / no_subscription / duplicate / invalid
+    """
+    try:
+        data = json.loads(request.body)
+        if 'ending_before' in data:
+            items = renewal_items(datetime.strptime(data['ending_before'], '%Y-%m-%d').date())
+        else:
+            items = data['items']
+            if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+                raise TypeError
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Expected {"items": [{"membre_id": ...}, ...]} or {"ending_before": "YYYY-MM-DD"}'}, status=400)
+    return _bulk_response(bulk_renew_subscriptions(items), BULK_RENEWED)
+
+
 @csrf_exempt
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated, IsAdminUser])
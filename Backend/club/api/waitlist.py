@@ -0,0 +1,104 @@
+import json
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from club.models import Activity, WaitlistEntry
+from club.api.conditional import conditional_get
+from club.api.pagination import is_paginated, paginate, PaginationError
+from club.services.enrollments import EnrollmentError
+from club.services.waitlist import join_waitlist, leave_waitlist, waitlist_status
+from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
+
+
+@csrf_exempt
+@extend_schema(
+    summary="List or Join an Activity Waitlist",
+    description="GET: the FIFO waitlist of a full activity, by ticket number (cursor-paginated with ?limit=&cursor=). "
+                "POST: put a member on the waitlist; the head of the queue is enrolled automatically when a seat "
+                "is freed or the capacity increases.",
+    request={
+        'application/json': {
+            'type': 'object',
+            'properties': {'membre_id': {'type': 'integer', 'example': 1}},
+            'required': ['membre_id']
+        }
+    },
+    responses={
+        201: OpenApiResponse(
+            description="Member added to the waitlist (200 if already waiting)",
+            examples=[OpenApiExample(
+                'Join Response',
+                value={"activite_id": 1, "membre_id": 4, "sequence": 12, "now_serving": 9, "position": 3}
+            )]
+        ),
+        400: OpenApiResponse(description="Member already enrolled"),
+        404: OpenApiResponse(description="Member or Activity not found"),
+        409: OpenApiResponse(description="Activity is not full"),
+    },
+    tags=['Enrollments']
+)
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+@conditional_get(WaitlistEntry, Activity)
+def activity_waitlist(request, activity_id):
+    if request.method == "GET":
+        if not Activity.objects.filter(id=activity_id).exists():
+            return JsonResponse({"error": "Activity not found"}, status=404)
+        entries = (
+            WaitlistEntry.objects.filter(activite_id=activity_id)
+            .values("id", "sequence", "membre_id", "membre__nom", "membre__prenom", "created_at")
+            .order_by("sequence", "id")
+        )
+        next_cursor = None
+        if is_paginated(request):
+            try:
+                entries, next_cursor = paginate(request, entries, ("sequence", "id"))
+            except PaginationError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+        results = [
+            {
+                "sequence": e["sequence"],
+                "membre_id": e["membre_id"],
+                "membre_nom": e["membre__nom"],
+                "membre_prenom": e["membre__prenom"],
+                "created_at": e["created_at"],
+            }
+            for e in entries
+        ]
+        if is_paginated(request):
+            return JsonResponse({"results": results, "next": next_cursor})
+        return JsonResponse(results, safe=False)
+
+    try:
+        membre_id = int(json.loads(request.body)["membre_id"])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return JsonResponse({"error": "Missing required field: membre_id"}, status=400)
+    try:
+        entry, created = join_waitlist(membre_id, activity_id)
+    except EnrollmentError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    return JsonResponse(waitlist_status(entry), status=201 if created else 200)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Waitlist Position or Leave the Waitlist",
+    description="GET: ticket number, last ticket promoted (now_serving) and current position of a member. "
+                "DELETE: remove the member from the waitlist.",
+    tags=['Enrollments']
+)
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated, IsAdminUser])
+def activity_waitlist_member(request, activity_id, member_id):
+    if request.method == "GET":
+        entry = WaitlistEntry.objects.filter(activite_id=activity_id, membre_id=member_id).first()
+        if entry is None:
+            return JsonResponse({"error": "Member is not on the waitlist of this activity"}, status=404)
+        return JsonResponse(waitlist_status(entry))
+
+    try:
+        leave_waitlist(member_id, activity_id)
+    except EnrollmentError as e:
+        return JsonResponse({"error": str(e)}, status=e.status)
+    return JsonResponse({"success": True})
@@ -0,0 +1,28 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
+
+
+class ClubConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'club'
+
+    def ready(self):
+        # Register signal receivers (denormalized counters, caches...)
+        from club import signals  # noqa: F401
+
+        # In-process periodic jobs, started by the first request, so only processes that
+        # serve HTTP run them (not migrate, shell, the reloader...). Club-wide jobs run where
+        # CLUB_SCHEDULER_ENABLED is set (one process); the cube rebuild refreshes this process's
+        # memory, so it runs in each. The test runner turns both off.
+        from club.services.cube import analytics_cube, cube_rebuild_enabled
+        from club.services.scheduler import scheduler
+        from club.services.schedules import materialize_horizon
+        from club.services.subscriptions import expire_subscriptions
+        scheduler.add("expire_subscriptions", settings.CLUB_EXPIRY_SWEEP_INTERVAL, expire_subscriptions)
+        scheduler.add("materialize_sessions", settings.CLUB_SCHEDULE_MATERIALIZE_INTERVAL, materialize_horizon)
+        scheduler.add(
+            "rebuild_analytics_cube", settings.CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL or 0, analytics_cube.rebuild,
+            enabled=cube_rebuild_enabled,
+        )
+        request_started.connect(scheduler.start_on_request, dispatch_uid="club-scheduler")
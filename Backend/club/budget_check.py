@@ -0,0 +1,239 @@
+"""
+The query budget check shared by `manage.py check_query_budgets` and
+club.tests.test_query_budgets: a few rows per table, then one call to every
+endpoint of club/urls.py, each measured with QueryRecorder against its budget
+in club/api/budgets.py. Meant for a throw-away test database.
+"""
+import json
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.utils import timezone
+from club import urls as club_urls
+from club.api.budgets import QUERY_BUDGETS
+from club.middleware import QUERY_REPEAT_THRESHOLD, QueryRecorder, query_budget
+from club.models import Activity, Attendance, ClassSchedule, ClassSession, Enrollment, Member, Subscription
+from club.services.billing import run_billing
+from club.services.schedules import resync_schedule
+from club.services.waitlist import join_waitlist
+
+# the checks run with a private cache: cold at the start, whatever the configured backend
+BUDGET_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "query-budgets"}}
+
+
+def check_query_budgets(threshold=QUERY_REPEAT_THRESHOLD, report=None):
+    """
+    Seeds the (test) database, sends every request of budget_requests() and
+    returns the problems found, as messages: over budget, repeated statement,
+    HTTP error, missing budget, route not exercised. `report` receives one
+    line per request (count/budget and time).
+    """
+    admin = User.objects.create_superuser("budget-admin", "budget@example.com", "budget-password")
+    client = Client()
+    client.force_login(admin)
+    ids = seed()
+    tokens = json.loads(Client().post(
+        "/auth/token/", {"username": "budget-admin", "password": "budget-password"}
+    ).content)
+
+    failures, seen = [], set()
+    for method, path, data in budget_requests(ids, tokens):
+        queries = QueryRecorder()
+        with queries:
+            response = _send(client, method, path, data)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        route = response.resolver_match.route
+        seen.add(route)
+        budget = query_budget(route, method)
+        problems = queries.problems(budget, threshold)
+        if budget is None:
+            problems.append(f"no budget declared for {method} in club/api/budgets.py")
+        if response.status_code >= 400:
+            problems.append(f"HTTP {response.status_code}: {response.content[:200]!r}")
+        if report:
+            report(
+                f"{method:6} {path:60} {queries.count:3}/{budget if budget is not None else '-':<3} "
+                f"{queries.duration * 1000:7.1f} ms"
+            )
+        failures.extend(f"{method} {path}: {problem}" for problem in problems)
+
+    for pattern in club_urls.urlpatterns:
+        route = str(pattern.pattern)
+        if route not in seen:
+            failures.append(f"/{route} is not exercised by club.budget_check")
+        if route not in QUERY_BUDGETS:
+            failures.append(f"/{route} has no budget in club/api/budgets.py")
+    return failures
+
+
+def _send(client, method, path, data):
+    if method == "GET":
+        return client.get(path)
+    if isinstance(data, dict) and any(isinstance(v, SimpleUploadedFile) for v in data.values()):
+        return client.post(path, data)
+    body = json.dumps(data if data is not None else {})
+    return client.generic(method, path, body, content_type="application/json")
+
+
+def seed():
+    """A few rows per table: an N+1 shows up as the same statement repeated."""
+    today = timezone.localdate()
+    activities = [
+        Activity.objects.create(code_act=f"BUDGET{i}", nom_act=f"Activity {i}", tarif_mensuel=30 + i, capacite=10)
+        for i in range(3)
+    ]
+    full = Activity.objects.create(code_act="BUDGETFULL", nom_act="Full", tarif_mensuel=20, capacite=1)
+    members = [
+        Member.objects.create(
+            nom=f"Member{i}", prenom=f"P{i}", age=20 + i, telephone=f"0600000{i:03d}", email=f"m{i}@example.com"
+        )
+        for i in range(8)
+    ]
+    for member in members[:5]:
+        for activity in activities[:2]:
+            Enrollment.objects.create(membre=member, activite=activity)
+    Enrollment.objects.create(membre=members[0], activite=full)
+    for member in members[1:4]:
+        join_waitlist(member.id, full.id)
+    for member in members[:5]:
+        Subscription.objects.create(membre=member, type_abonnement="MONTHLY", date_debut=today - timedelta(days=20))
+
+    schedule = ClassSchedule.objects.create(
+        activite=activities[0], jours=[0, 2, 4], heure_debut="18:00", heure_fin="19:00",
+        date_debut=today - timedelta(days=14),
+    )
+    resync_schedule(schedule)
+    session = ClassSession.objects.create(
+        activite=activities[1], date=today, heure_debut="07:00", heure_fin="08:00"
+    )
+    for member in members[:3]:
+        Attendance.objects.create(session=session, membre=member, checked_in_at=timezone.now())
+    run_billing(today.replace(day=1))
+
+    return {
+        "today": today,
+        "month": f"{today:%Y-%m}",
+        "activity": activities[0].id,
+        "other_activity": activities[1].id,
+        "spare_activity": activities[2].id,
+        "full": full.id,
+        "member": members[0].id,
+        "waiting": members[3].id,
+        "free_members": [m.id for m in members[5:]],
+        "enrollment": Enrollment.objects.filter(membre=members[1], activite=activities[0]).get().id,
+        "full_enrollment": Enrollment.objects.filter(activite=full).get().id,
+        "subscription": Subscription.objects.filter(membre=members[1]).get().id,
+        "schedule": schedule.id,
+        "session": session.id,
+        "checkin_member": members[4].id,
+    }
+
+
+def budget_requests(ids, tokens):
+    """(method, path, data) of each call, in an order where every write succeeds."""
+    today = ids["today"]
+    day = today.isoformat()
+    a, m = ids["activity"], ids["member"]
+    free = ids["free_members"]
+    next_monday = today + timedelta(days=7 - today.weekday())
+    csv = SimpleUploadedFile("members.csv", (
+        b"nom,prenom,age,telephone,email\n"
+        b"New,Import,30,22111111,import@example.com\n"
+        b"Other,Import,31,22111112,import2@example.com\n"
+    ))
+    return [
+        ("POST", "/auth/token/", {"username": "budget-admin", "password": "budget-password"}),
+        ("POST", "/auth/token/refresh/", {"refresh": tokens["refresh"]}),
+        ("GET", "/auth/me/", None),
+
+        ("GET", "/members/", None),
+        ("GET", "/members/?limit=2", None),
+        ("GET", "/members/?format=ndjson", None),
+        ("POST", "/members/", {"nom": "New", "prenom": "Member", "age": 30, "telephone": "0622222222"}),
+        ("POST", "/members/import/", {"file": csv}),
+        ("GET", f"/members/{m}/", None),
+        ("PUT", f"/members/{m}/", {"telephone": "0633333333"}),
+
+        ("GET", "/activities/", None),
+        ("POST", "/activities/", {"code_act": "BUDGETNEW", "nom_act": "New", "tarif_mensuel": 10, "capacite": 5}),
+        ("GET", f"/activities/{a}/", None),
+        ("PUT", f"/activities/{a}/", {"capacite": 12}),
+        ("GET", f"/activities/{a}/calendar.ics", None),
+        ("GET", f"/activities/{ids['full']}/waitlist/", None),
+        ("POST", f"/activities/{ids['full']}/waitlist/", {"membre_id": free[0]}),
+        ("GET", f"/activities/{ids['full']}/waitlist/{ids['waiting']}/", None),
+        ("DELETE", f"/activities/{ids['full']}/waitlist/{ids['waiting']}/", None),
+
+        ("GET", "/enrollments/", None),
+        ("GET", "/enrollments/?limit=2", None),
+        ("POST", "/enrollments/", {"membre_id": free[0], "activite_id": a}),
+        ("POST", "/enrollments/bulk/", {"items": [
+            {"membre_id": member_id, "activite_id": ids["other_activity"]} for member_id in free
+        ]}),
+        ("GET", f"/enrollments/{ids['enrollment']}/", None),
+        ("PUT", f"/enrollments/{ids['enrollment']}/", {"activite_id": ids["spare_activity"]}),
+        ("DELETE", f"/enrollments/{ids['full_enrollment']}/", None),
+
+        ("GET", "/subscriptions/", None),
+        ("GET", "/subscriptions/?limit=2", None),
+        ("POST", "/subscriptions/", {"membre_id": free[0], "type_abonnement": "MONTHLY", "date_debut": day}),
+        ("GET", "/subscriptions/expiring/", None),
+        ("POST", "/subscriptions/bulk/", {"items": [
+            {"membre_id": member_id, "type_abonnement": "ANNUAL", "date_debut": day} for member_id in free[1:]
+        ]}),
+        ("POST", "/subscriptions/bulk/renew/", {"items": [{"membre_id": m}]}),
+        ("GET", f"/subscriptions/{ids['subscription']}/", None),
+        ("PUT", f"/subscriptions/{ids['subscription']}/", {"type_abonnement": "3_MONTHS"}),
+
+        ("GET", "/class-sessions/", None),
+        ("GET", f"/class-sessions/?date_from={day}&date_to={today + timedelta(days=30)}", None),
+        ("POST", "/class-sessions/", {"activite_id": ids["spare_activity"], "date": day, "heure_debut": "10:00", "heure_fin": "11:00"}),
+        ("POST", "/class-sessions/validate/", {"sessions": [
+            {"activite_id": a, "date": (today + timedelta(days=i)).isoformat(), "heure_debut": "12:00", "heure_fin": "13:00"}
+            for i in range(3)
+        ]}),
+        ("GET", "/class-sessions/calendar.ics", None),
+        ("GET", f"/class-sessions/{ids['session']}/", None),
+        ("PUT", f"/class-sessions/{ids['session']}/", {"heure_fin": "08:30"}),
+        ("POST", f"/class-sessions/{ids['session']}/check-in/", {"membre_id": ids["checkin_member"]}),
+        ("GET", f"/class-sessions/{ids['session']}/attendances/", None),
+
+        ("GET", "/schedules/", None),
+        ("POST", "/schedules/", {
+            "activite_id": ids["spare_activity"], "jours": [1, 3], "heure_debut": "20:00", "heure_fin": "21:00", "date_debut": day,
+        }),
+        ("GET", "/schedules/occurrences/", None),
+        ("GET", f"/schedules/{ids['schedule']}/", None),
+        ("PUT", f"/schedules/{ids['schedule']}/", {"heure_fin": "19:30"}),
+        ("POST", f"/schedules/{ids['schedule']}/occurrences/{next_monday + timedelta(days=42)}/", None),
+
+        ("GET", "/export/members/", None),
+        ("GET", "/export/enrollments/?format=ndjson", None),
+        ("GET", "/export/subscriptions/", None),
+
+        ("GET", "/billing/runs/", None),
+        ("GET", f"/billing/runs/{ids['month']}/", None),
+        ("GET", f"/billing/invoices/?month={ids['month']}", None),
+        ("GET", f"/billing/mrr/{ids['month']}/", None),
+
+        ("GET", "/stats/", None),
+        ("GET", "/stats/activities/", None),
+        ("GET", "/stats/members-per-activity/", None),
+        ("GET", "/stats/members-per-activity/?summary=true&first=2", None),
+        ("GET", f"/stats/members-per-activity/{a}/", None),
+        ("GET", "/stats/timeseries/new_members/", None),
+        ("GET", "/stats/breakdown/age_per_activity/", None),
+
+        # deletes last: the rows above stay available to every other call
+        ("DELETE", f"/schedules/{ids['schedule']}/", None),
+        # a member with history: enrollments, subscription, invoices, check-in
+        ("DELETE", f"/members/{m}/", None),
+        ("DELETE", f"/class-sessions/{ids['session']}/", None),
+        ("DELETE", f"/subscriptions/{ids['subscription']}/", None),
+        ("DELETE", f"/activities/{ids['spare_activity']}/", None),
+
+        ("POST", "/auth/login/", {"username": "budget-admin", "password": "budget-password"}),
+        ("POST", "/auth/logout/", None),
+    ]
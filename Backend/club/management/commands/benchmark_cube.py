@@ -0,0 +1,54 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from club.services.cube import analytics_cube, np
+from club.services.statistics import BREAKDOWNS, SUBSCRIPTION_TYPES
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the dashboard breakdowns served by the in-memory analytics cube "
+        "with the ORM GROUP BY path on the current database: checks that both "
+        "return the same result and reports the median time of each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Runs per breakdown and path")
+
+    def _median_ms(self, func, kwargs, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(**kwargs)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2] * 1000
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("NumPy is not installed: the analytics cube is unavailable (pip install numpy).")
+        repeat = options["repeat"]
+
+        start = time.perf_counter()
+        analytics_cube.load()
+        self.stdout.write(f"Cube loaded in {(time.perf_counter() - start) * 1000:.1f} ms "
+                          f"({analytics_cube.members.size} members, {analytics_cube.enrollments.size} enrollments)")
+
+        scenarios = [{}, {"actif": True}, {"type_abonnement": SUBSCRIPTION_TYPES[0]}]
+        mismatches = 0
+        for name, orm_func in BREAKDOWNS.items():
+            cube_func = getattr(analytics_cube, orm_func.__name__)
+            for filters in scenarios:
+                if orm_func(**filters) != cube_func(**filters):
+                    mismatches += 1
+                    self.stdout.write(self.style.ERROR(f"{name} {filters}: cube and ORM results differ"))
+                    continue
+                orm_ms = self._median_ms(orm_func, filters, repeat)
+                cube_ms = self._median_ms(cube_func, filters, repeat)
+                self.stdout.write(
+                    f"{name:<32} {str(filters):<32} ORM {orm_ms:8.2f} ms   cube {cube_ms:8.3f} ms   "
+                    f"x{orm_ms / cube_ms if cube_ms else float('inf'):.0f}"
+                )
+
+        if mismatches:
+            raise CommandError(f"{mismatches} breakdown(s) differ between the cube and the ORM path.")
+        self.stdout.write(self.style.SUCCESS("Cube and ORM results are identical."))
@@ -0,0 +1,71 @@
+import random
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from club.services.timetable import IntervalIndex, validate_timetable
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the class-session overlap check on a synthetic season: builds the "
+        "interval index, compares its answers and speed with a linear scan, then times "
+        "a full /class-sessions/validate/ pass (which also reads the current database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=30000, help="Sessions in the season")
+        parser.add_argument("--activities", type=int, default=40)
+        parser.add_argument("--days", type=int, default=280, help="Length of the season in days")
+        parser.add_argument("--checks", type=int, default=2000, help="Overlap queries to time")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def _season(self, sessions, activities, days, rng):
+        # créneaux de 30 à 120 minutes entre 7h et 22h ; quelques chevauchements volontaires
+        first = date(2030, 9, 1)
+        slots = []
+        for _ in range(sessions):
+            start = rng.randrange(7 * 60, 21 * 60, 15)
+            end = min(start + rng.choice((30, 45, 60, 90, 120)), 22 * 60)
+            slots.append((rng.randrange(1, activities + 1), first + timedelta(days=rng.randrange(days)), start, end))
+        return slots
+
+    def handle(self, *args, **options):
+        if min(options["sessions"], options["activities"], options["days"], options["checks"]) < 1:
+            raise CommandError("--sessions, --activities, --days and --checks must be at least 1")
+        rng = random.Random(options["seed"])
+        slots = self._season(options["sessions"], options["activities"], options["days"], rng)
+        queries = [rng.choice(slots) for _ in range(options["checks"])]
+
+        start = time.perf_counter()
+        index = IntervalIndex(((a, d), s, e, i) for i, (a, d, s, e) in enumerate(slots))
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        indexed = [index.overlapping((a, d), s, e) for a, d, s, e in queries]
+        index_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        start = time.perf_counter()
+        scanned = [
+            [i for i, (a2, d2, s2, e2) in enumerate(slots) if a2 == a and d2 == d and s2 < e and e2 > s]
+            for a, d, s, e in queries
+        ]
+        scan_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        if [sorted(found) for found in indexed] != scanned:
+            raise CommandError("The interval index and the linear scan disagree.")
+        self.stdout.write(f"{len(slots)} sessions, index built in {build_ms:.1f} ms")
+        self.stdout.write(
+            f"overlap check: index {index_us:8.2f} us   linear scan {scan_us:10.2f} us   x{scan_us / index_us:.0f}"
+        )
+
+        payload = [
+            {"activite_id": a, "date": d.isoformat(), "heure_debut": f"{s // 60:02d}:{s % 60:02d}", "heure_fin": f"{e // 60:02d}:{e % 60:02d}"}
+            for a, d, s, e in slots
+        ]
+        start = time.perf_counter()
+        report = validate_timetable(payload)
+        self.stdout.write(
+            f"validate whole timetable: {(time.perf_counter() - start) * 1000:.1f} ms, "
+            f"{len(report['conflicts'])} conflicting session(s), {len(report['errors'])} error(s)"
+        )
+        self.stdout.write(self.style.SUCCESS("Index and linear scan results are identical."))
@@ -0,0 +1,55 @@
+from collections import Counter
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from club.services.imports import IMPORT_FORMATS, detect_format, iter_rows
+from club.services.subscriptions import (
+    SUBSCRIPTION_BATCH_SIZE, bulk_create_subscriptions, bulk_renew_subscriptions, renewal_items
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or renew subscriptions in bulk from a CSV (header: membre_id,type_abonnement,date_debut) "
+        "or NDJSON file. For renewals type_abonnement and date_debut are optional (default: same type, "
+        "starting at the old date_fin); --ending-before renews every subscription ending before a date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("create", "renew"))
+        parser.add_argument("path", nargs="?")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--ending-before", help="renew: every subscription ending before YYYY-MM-DD")
+        parser.add_argument("--batch-size", type=int, default=SUBSCRIPTION_BATCH_SIZE)
+
+    def _read_items(self, path, fmt):
+        try:
+            with open(path, "rb") as f:
+                return [
+                    # cellules vides = valeur par défaut ; ligne illisible = élément invalide
+                    {} if isinstance(row, Exception) else {k: v for k, v in row.items() if v not in ("", None)}
+                    for _, row in iter_rows(f, fmt)
+                ]
+        except OSError as e:
+            raise CommandError(str(e))
+
+    def handle(self, *args, **options):
+        action, path = options["action"], options["path"]
+        if options["ending_before"]:
+            if action != "renew" or path:
+                raise CommandError("--ending-before only applies to renew, without a file")
+            try:
+                ending_before = datetime.strptime(options["ending_before"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid --ending-before format. Use YYYY-MM-DD")
+            items = renewal_items(ending_before)
+        elif path:
+            items = self._read_items(path, options["format"] or detect_format(path))
+        else:
+            raise CommandError("Give a file, or --ending-before for renew")
+
+        bulk = bulk_create_subscriptions if action == "create" else bulk_renew_subscriptions
+        results = bulk(items, batch_size=options["batch_size"])
+        counts = Counter(result["status"] for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results)} item(s): " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from club.budget_check import BUDGET_CACHES, check_query_budgets
+from club.middleware import QUERY_REPEAT_THRESHOLD
+
+
+class Command(BaseCommand):
+    help = (
+        "Calls every endpoint of club/urls.py against a throw-away test database seeded with a "
+        "few rows per table, and fails when one runs more SQL queries than its budget in "
+        "club/api/budgets.py, repeats the same statement (N+1), or has no budget at all. "
+        "Same check as club.tests.test_query_budgets, with a line per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threshold", type=int, default=QUERY_REPEAT_THRESHOLD,
+            help="Report a statement run this many times in one request",
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # the in-process jobs would query the test database from their own threads
+            with override_settings(
+                CACHES=BUDGET_CACHES, CLUB_SCHEDULER_ENABLED=False, CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL=None,
+            ):
+                failures = check_query_budgets(options["threshold"], report=self.stdout.write)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if failures:
+            raise CommandError(f"{len(failures)} query budget problem(s):\n  " + "\n  ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Every endpoint is within its query budget."))
@@ -0,0 +1,20 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from club.services.subscriptions import expire_subscriptions
+
+
+class Command(BaseCommand):
+    help = "Deactivate every active subscription whose date_fin is past (one UPDATE) and print how many."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--today", help="Reference date, YYYY-MM-DD (default: today)")
+
+    def handle(self, *args, **options):
+        today = None
+        if options["today"]:
+            try:
+                today = datetime.strptime(options["today"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid --today format. Use YYYY-MM-DD")
+        count = expire_subscriptions(today)
+        self.stdout.write(self.style.SUCCESS(f"{count} subscription(s) expired."))
@@ -0,0 +1,39 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from club.services.exports import DATASETS, EXPORT_FORMATS, ExportError, gzip_chunks, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream members, enrollments or subscriptions to CSV/NDJSON with constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=list(DATASETS))
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--output", "-o", help="Output file (default: stdout)")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+        parser.add_argument("--actif", choices=["true", "false"])
+        parser.add_argument("--member-id", dest="member_id")
+        parser.add_argument("--activite-id", dest="activite_id")
+        parser.add_argument("--date-from", dest="date_from", help="YYYY-MM-DD")
+        parser.add_argument("--date-to", dest="date_to", help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        try:
+            chunks = iter_export(options["dataset"], options, options["format"])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if options["gzip"]:
+            chunks = gzip_chunks(chunks)
+        else:
+            chunks = (chunk.encode("utf-8") for chunk in chunks)
+
+        out = open(options["output"], "wb") if options["output"] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+        finally:
+            if options["output"]:
+                out.close()
+            else:
+                out.flush()
@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from club.models import Activity
+from club.services.photos import PHOTO_WORKERS, process_activity_photo
+
+
+class Command(BaseCommand):
+    help = "Generate (or regenerate) WebP/JPEG thumbnails for activity photos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate even if thumbnails exist")
+        parser.add_argument("--workers", type=int, default=PHOTO_WORKERS)
+
+    def handle(self, *args, **options):
+        activities = Activity.objects.exclude(photo="").exclude(photo__isnull=True).values_list("id", "photo", "photo_variants")
+        todo = [
+            activity_id for activity_id, photo, variants in activities
+            if options["force"] or (variants or {}).get("source") != photo
+        ]
+
+        def work(activity_id):
+            try:
+                return process_activity_photo(activity_id)
+            finally:
+                close_old_connections()
+
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            futures = {pool.submit(work, activity_id): activity_id for activity_id in todo}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"activity #{futures[future]}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"{done} photo(s) processed, {failed} failed."))
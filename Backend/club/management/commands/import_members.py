@@ -0,0 +1,26 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from club.services.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, detect_format, import_members, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import members from a CSV (header: nom,prenom,age,telephone,email,actif) or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        try:
+            with open(options["path"], "rb") as f:
+                report = import_members(iter_rows(f, fmt), batch_size=options["batch_size"])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} member(s) created from {report['rows']} row(s), {report['error_count']} rejected."
+        ))
@@ -0,0 +1,26 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from club.services.schedules import SCHEDULE_HORIZON_DAYS, materialize_horizon
+
+
+class Command(BaseCommand):
+    help = (
+        "Materialize the occurrences of the recurring class schedules as class sessions "
+        "for the rolling horizon (idempotent) and print how many sessions were created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--today", help="First day of the horizon, YYYY-MM-DD (default: today)")
+        parser.add_argument("--days", type=int, default=SCHEDULE_HORIZON_DAYS, help="Length of the horizon in days")
+
+    def handle(self, *args, **options):
+        today = None
+        if options["today"]:
+            try:
+                today = datetime.strptime(options["today"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("Invalid --today format. Use YYYY-MM-DD")
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1")
+        count = materialize_horizon(today, options["days"])
+        self.stdout.write(self.style.SUCCESS(f"{count} class session(s) materialized."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from club.services.enrollments import reconcile_enrollment_counts
+from club.services.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the statistics rollup tables (and activity counters) from the source tables."
+
+    def handle(self, *args, **options):
+        n_days, n_types = rebuild_rollups()
+        self.stdout.write(f"DailyStats: {n_days} day(s), SubscriptionTypeStats: {n_types} type(s).")
+        drifted = reconcile_enrollment_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollups rebuilt; {len(drifted)} activity counter(s) corrected."
+        ))
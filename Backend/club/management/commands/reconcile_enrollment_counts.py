@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from club.services.attendance import reconcile_attendance_counts
+from club.services.enrollments import reconcile_enrollment_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Activity.nb_inscriptions from the Enrollment table and "
+        "ClassSession.nb_presents from the Attendance table, and fix any drift."
+    )
+
+    def handle(self, *args, **options):
+        drifted = reconcile_enrollment_counts()
+        for activity_id, nom_act, stored, real in drifted:
+            self.stdout.write(f"{nom_act} (#{activity_id}): {stored} -> {real}")
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} activity counter(s) corrected."))
+
+        drifted = reconcile_attendance_counts()
+        for session_id, nom_act, stored, real in drifted:
+            self.stdout.write(f"{nom_act} session #{session_id}: {stored} -> {real}")
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} session counter(s) corrected."))
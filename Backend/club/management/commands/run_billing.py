@@ -0,0 +1,33 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from club.services.billing import BILLING_CHUNK_SIZE, BillingError, parse_month, run_billing
+
+
+class Command(BaseCommand):
+    help = (
+        "Bill one month: one invoice per member with an active subscription over the month, "
+        "summing the monthly fee of each enrolled activity. An interrupted run resumes "
+        "from its last committed chunk when launched again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", required=True, help="Month to bill, YYYY-MM")
+        parser.add_argument("--chunk-size", type=int, default=BILLING_CHUNK_SIZE, help="Members per transaction")
+        parser.add_argument("--restart", action="store_true", help="Delete the month's invoices and bill it again")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            month = parse_month(options["month"])
+            run = run_billing(
+                month,
+                chunk_size=options["chunk_size"],
+                restart=options["restart"],
+                progress=lambda last_id: self.stdout.write(f"  billed up to member #{last_id}"),
+            )
+        except BillingError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"{run.month:%Y-%m}: {run.invoices} invoice(s), total {run.total:.2f} "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,69 @@
+import random
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from club.models import Activity, Attendance, ClassSession, Member
+from club.services.attendance import CHECKIN_CREATED, CHECKIN_DUPLICATE, checkin_writer
+from club.stress import run_concurrently
+
+
+class Command(BaseCommand):
+    help = (
+        "Burst load test for the door check-in path: N threads check members in to one "
+        "session of today (each member twice, to exercise duplicate detection), then checks "
+        "that every member is stored once and that the session counter matches. "
+        "Creates a throw-away activity, session and members, removed at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=32)
+        parser.add_argument("--members", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        threads, count = options["threads"], options["members"]
+        if threads < 1 or count < 1:
+            raise CommandError("--threads and --members must be at least 1")
+
+        activity = Activity.objects.create(
+            code_act=f"STRESS-{uuid.uuid4().hex[:8]}",
+            nom_act="Stress test",
+            tarif_mensuel=0,
+            capacite=count,
+        )
+        session = ClassSession.objects.create(
+            activite=activity, date=timezone.localdate(), heure_debut="06:00", heure_fin="07:00"
+        )
+        members = Member.objects.bulk_create(
+            Member(nom="Stress", prenom=str(i), age=30, telephone="00000000") for i in range(count)
+        )
+        member_ids = [m.id for m in members]
+
+        # chaque membre badge deux fois, dans le désordre
+        attempts = member_ids * 2
+        random.Random(options["seed"]).shuffle(attempts)
+        try:
+            outcomes, errors, elapsed, latencies = run_concurrently(
+                attempts, lambda member_id: checkin_writer.check_in(session.id, member_id), threads
+            )
+
+            session.refresh_from_db()
+            stored = Attendance.objects.filter(session=session).count()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[int(len(latencies) * 0.99)] * 1000
+
+            self.stdout.write(
+                f"{len(attempts)} check-ins with {threads} threads in {elapsed:.2f}s "
+                f"({len(attempts) / elapsed:.0f} req/s, p50 {p50:.1f} ms, p99 {p99:.1f} ms): "
+                f"{outcomes[CHECKIN_CREATED]} recorded, {outcomes[CHECKIN_DUPLICATE]} duplicates, "
+                f"{outcomes['errors']} errors"
+            )
+            self.stdout.write(f"members={count} attendances={stored} counter={session.nb_presents}")
+            if outcomes["errors"]:
+                raise CommandError(f"{outcomes['errors']} errors, first: {errors[0]}")
+            if stored != count or session.nb_presents != count or outcomes[CHECKIN_CREATED] != count:
+                raise CommandError("Attendance rows, counter and recorded check-ins disagree")
+            self.stdout.write(self.style.SUCCESS("Every member checked in exactly once, no lock errors."))
+        finally:
+            activity.delete()
+            Member.objects.filter(id__in=member_ids).delete()
@@ -0,0 +1,64 @@
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from club.models import Activity, Enrollment, Member
+from club.services.enrollments import ActivityFull, enroll_member
+from club.stress import run_concurrently
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency stress test for the enrollment reservation path: N threads "
+        "enroll members into one activity, then checks that nothing was overbooked. "
+        "Creates a throw-away activity and members, removed at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--members", type=int, default=500, help="Number of enrollment attempts")
+        parser.add_argument("--capacity", type=int, default=100)
+
+    def handle(self, *args, **options):
+        threads, attempts, capacity = options["threads"], options["members"], options["capacity"]
+
+        activity = Activity.objects.create(
+            code_act=f"STRESS-{uuid.uuid4().hex[:8]}",
+            nom_act="Stress test",
+            tarif_mensuel=0,
+            capacite=capacity,
+        )
+        members = Member.objects.bulk_create(
+            Member(nom="Stress", prenom=str(i), age=30, telephone="00000000") for i in range(attempts)
+        )
+        member_ids = [m.id for m in members]
+
+        def attempt(member_id):
+            try:
+                enroll_member(member_id, activity.id)
+            except ActivityFull:
+                return "full"
+            return "created"
+
+        try:
+            outcomes, errors, elapsed, _ = run_concurrently(member_ids, attempt, threads)
+
+            activity.refresh_from_db()
+            stored = Enrollment.objects.filter(activite=activity).count()
+
+            self.stdout.write(
+                f"{attempts} attempts with {threads} threads in {elapsed:.2f}s "
+                f"({attempts / elapsed:.0f} req/s): {outcomes['created']} created, "
+                f"{outcomes['full']} rejected as full, {outcomes['errors']} errors"
+            )
+            self.stdout.write(
+                f"capacity={capacity} enrollments={stored} counter={activity.nb_inscriptions}"
+            )
+            if stored > capacity:
+                raise CommandError(f"Overbooking: {stored} enrollments for {capacity} seats")
+            if stored != activity.nb_inscriptions or stored != outcomes["created"]:
+                raise CommandError("Seat counter out of sync with the Enrollment table")
+            if outcomes["errors"]:
+                raise CommandError(f"{outcomes['errors']} unexpected errors, first: {errors[0]}")
+            self.stdout.write(self.style.SUCCESS("No overbooking."))
+        finally:
+            activity.delete()
+            Member.objects.filter(id__in=member_ids).delete()
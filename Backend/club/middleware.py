@@ -0,0 +1,159 @@
+import logging
+import re
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+logger = logging.getLogger(__name__)
+
+# The same statement (literals aside) run this many times in one request is
+# reported as an N+1, whatever the budget
+QUERY_REPEAT_THRESHOLD = getattr(settings, "CLUB_QUERY_REPEAT_THRESHOLD", 3)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+# transaction control, not data access: a transaction or savepoint counts once,
+# when it opens, never fingerprinted. COMMIT and ROLLBACK are driver calls that
+# the connection does not see, so their savepoint counterparts are skipped too:
+# a view's transaction costs the same as a BEGIN or, inside a test's
+# transaction, as a SAVEPOINT.
+_TRANSACTION = re.compile(r"^\s*(?:BEGIN|SAVEPOINT)\b", re.IGNORECASE)
+_TRANSACTION_END = re.compile(r"^\s*(?:RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b", re.IGNORECASE)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    """
+    Shape of a statement: literals and IN lists collapsed, so that
+    `... WHERE id = 1` and `... WHERE id = 2` count as the same query.
+    """
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """
+    Records the SQL run on one connection, in this thread, while active
+    (a connection execute_wrapper): number of statements, total time and
+    statements per fingerprint. Can be entered several times; the figures
+    add up (a streamed response is measured while its body is produced).
+
+        with QueryRecorder() as queries:
+            client.get("/members/")
+        queries.count, queries.duration, queries.repeated()
+    """
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self._wrappers = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            if not _TRANSACTION_END.match(sql):
+                self.count += 1
+                if not _TRANSACTION.match(sql):
+                    self.fingerprints[fingerprint(sql)] += 1
+
+    def __enter__(self):
+        wrapper = connections[self.using].execute_wrapper(self)
+        wrapper.__enter__()
+        self._wrappers.append(wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._wrappers.pop().__exit__(*exc_info)
+
+    def repeated(self, threshold=QUERY_REPEAT_THRESHOLD):
+        """[(fingerprint, times)] of the statements run at least `threshold` times."""
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n >= threshold]
+
+    def problems(self, budget=None, threshold=QUERY_REPEAT_THRESHOLD):
+        """Budget overrun and N+1 candidates, as messages (empty when within budget)."""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} queries (budget {budget})")
+        for sql, n in self.repeated(threshold):
+            problems.append(f"{n}x {sql[:200]}")
+        return problems
+
+
+def budgets_mode():
+    # "off", "warn" (log a warning) or "raise" (QueryBudgetExceeded, for test runs);
+    # read per request, so that override_settings (club.test_runner) applies
+    return getattr(settings, "CLUB_QUERY_BUDGETS", "off")
+
+
+def query_budget(route, method):
+    """Declared budget of an endpoint (club.api.budgets), or None."""
+    from club.api.budgets import QUERY_BUDGETS
+    return QUERY_BUDGETS.get(route, {}).get(method)
+
+
+class QueryBudgetMiddleware:
+    """
+    Measures the SQL of every request and compares it with the budget
+    declared for its route and method in club.api.budgets.QUERY_BUDGETS.
+    Adds X-Query-Count and X-Query-Time (ms) headers; on an overrun or a
+    repeated statement, logs a warning or raises QueryBudgetExceeded
+    depending on CLUB_QUERY_BUDGETS. Streamed bodies are checked once
+    fully sent (their queries are not in the headers).
+    """
+
+    def __init__(self, get_response):
+        if budgets_mode() not in ("warn", "raise"):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryRecorder()
+        with queries:
+            response = self.get_response(request)
+        response["X-Query-Count"] = str(queries.count)
+        response["X-Query-Time"] = f"{queries.duration * 1000:.1f}"
+        if response.streaming:
+            response.streaming_content = self._stream(request, response.streaming_content, queries)
+        else:
+            self._check(request, queries)
+        return response
+
+    def _stream(self, request, chunks, queries):
+        iterator = iter(chunks)
+        while True:
+            with queries:
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+            yield chunk
+        self._check(request, queries)
+
+    def _check(self, request, queries):
+        match = request.resolver_match
+        if match is None:
+            return
+        problems = queries.problems(query_budget(match.route, request.method))
+        if not problems:
+            return
+        message = f"{request.method} /{match.route}: " + "; ".join(problems)
+        mode = budgets_mode()
+        if mode == "raise":
+            raise QueryBudgetExceeded(message)
+        if mode == "warn":
+            logger.warning("Query budget exceeded: %s", message)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_nb_inscriptions(apps, schema_editor):
+    Activity = apps.get_model('club', 'Activity')
+    Enrollment = apps.get_model('club', 'Enrollment')
+    counts = (
+        Enrollment.objects.filter(activite=OuterRef('pk'))
+        .values('activite')
+        .annotate(c=Count('id'))
+        .values('c')
+    )
+    Activity.objects.update(nb_inscriptions=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0005_member_age_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='nb_inscriptions',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_nb_inscriptions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def _updated_at(model_name):
+    return migrations.AddField(
+        model_name=model_name,
+        name='updated_at',
+        field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+        preserve_default=False,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0006_activity_nb_inscriptions'),
+    ]
+
+    operations = [
+        _updated_at('member'),
+        _updated_at('activity'),
+        _updated_at('enrollment'),
+        _updated_at('subscription'),
+        _updated_at('classsession'),
+    ]
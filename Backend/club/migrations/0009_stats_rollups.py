@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_rollups(apps, schema_editor):
+    Member = apps.get_model('club', 'Member')
+    Enrollment = apps.get_model('club', 'Enrollment')
+    Subscription = apps.get_model('club', 'Subscription')
+    DailyStats = apps.get_model('club', 'DailyStats')
+    SubscriptionTypeStats = apps.get_model('club', 'SubscriptionTypeStats')
+
+    days = {}
+    for row in Member.objects.order_by().values('date_inscription').annotate(n=Count('id')):
+        days.setdefault(row['date_inscription'], DailyStats(date=row['date_inscription'])).new_members = row['n']
+    for row in Enrollment.objects.order_by().values('date_inscription').annotate(n=Count('id')):
+        days.setdefault(row['date_inscription'], DailyStats(date=row['date_inscription'])).new_enrollments = row['n']
+    DailyStats.objects.bulk_create(days.values())
+
+    SubscriptionTypeStats.objects.bulk_create(
+        SubscriptionTypeStats(type_abonnement=row['type_abonnement'], active_count=row['n'])
+        for row in Subscription.objects.filter(actif=True).order_by().values('type_abonnement').annotate(n=Count('id'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0008_activity_photo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(null=True, unique=True)),
+                ('new_members', models.IntegerField(default=0)),
+                ('new_enrollments', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SubscriptionTypeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_abonnement', models.CharField(choices=[('MONTHLY', 'Mensuel'), ('3_MONTHS', '3 Mois'), ('6_MONTHS', '6 Mois'), ('ANNUAL', 'Annuel')], max_length=20, unique=True)),
+                ('active_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0009_stats_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BillingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('status', models.CharField(choices=[('RUNNING', 'En cours'), ('DONE', 'Terminée'), ('FAILED', 'Échec')], default='RUNNING', max_length=10)),
+                ('last_member_id', models.IntegerField(default=0)),
+                ('invoices', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Invoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('type_abonnement', models.CharField(choices=[('MONTHLY', 'Mensuel'), ('3_MONTHS', '3 Mois'), ('6_MONTHS', '6 Mois'), ('ANNUAL', 'Annuel')], max_length=20)),
+                ('amount', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('membre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invoices', to='club.member')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InvoiceLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('libelle', models.CharField(max_length=100)),
+                ('amount', models.FloatField()),
+                ('activite', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='club.activity')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='club.invoice')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['month', 'id'], name='invoice_month_id_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='invoice',
+            unique_together={('membre', 'month')},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0011_subscription_actif_date_fin_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['date_fin', 'id'], name='subscription_fin_id_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0012_subscription_date_fin_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jours', models.JSONField()),
+                ('intervalle', models.PositiveSmallIntegerField(default=1)),
+                ('heure_debut', models.TimeField()),
+                ('heure_fin', models.TimeField()),
+                ('date_debut', models.DateField()),
+                ('date_fin', models.DateField(blank=True, null=True)),
+                ('exceptions', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('activite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedules', to='club.activity')),
+            ],
+            options={
+                'ordering': ['activite', 'heure_debut'],
+            },
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='schedule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessions', to='club.classschedule'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0014_classsession_date_heure_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classsession',
+            name='nb_presents',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_in_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('membre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='club.member')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='club.classsession')),
+            ],
+            options={
+                'unique_together': {('session', 'membre')},
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0015_attendance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='waitlist_seq',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='activity',
+            name='waitlist_served',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('activite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='club.activity')),
+                ('membre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='club.member')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['activite', 'sequence'], name='waitlist_activite_seq_idx')],
+                'unique_together': {('membre', 'activite')},
+            },
+        ),
+    ]
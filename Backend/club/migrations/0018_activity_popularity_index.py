@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0017_deletion_stamp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['nb_inscriptions'], name='activity_nb_inscriptions_idx'),
+        ),
+    ]
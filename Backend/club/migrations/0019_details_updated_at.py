@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_updated_at(apps, schema_editor):
+    for name in ('Activity', 'ClassSession'):
+        model = apps.get_model('club', name)
+        model.objects.update(details_updated_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0018_activity_popularity_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='details_updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='classsession',
+            name='details_updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:40
+
+from django.db import migrations
+
+
+def renumber_waitlists(apps, schema_editor):
+    # les départs en cours de file laissaient des trous : rang = sequence - waitlist_served
+    Activity = apps.get_model('club', 'Activity')
+    WaitlistEntry = apps.get_model('club', 'WaitlistEntry')
+    for activity in Activity.objects.filter(waitlist__isnull=False).distinct():
+        entries = list(WaitlistEntry.objects.filter(activite=activity).order_by('sequence', 'id'))
+        for rank, entry in enumerate(entries, start=1):
+            entry.sequence = activity.waitlist_served + rank
+        WaitlistEntry.objects.bulk_update(entries, ['sequence'])
+        Activity.objects.filter(pk=activity.pk).update(waitlist_seq=activity.waitlist_served + len(entries))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('club', '0019_details_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_waitlists, migrations.RunPython.noop),
+    ]
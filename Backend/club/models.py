@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from datetime import timedelta
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 
 
@@ -24,6 +25,13 @@ class Member(models.Model):
     email = models.EmailField(unique=True, null=True, blank=True)
     actif = models.BooleanField(default=True)
     date_inscription = models.DateField(auto_now_add=True, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # keyset pagination on ?sort=age / -age
+            models.Index(fields=['age', 'id'], name='member_age_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.prenom} {self.nom}"
@@ -35,6 +43,38 @@ class Activity(models.Model):
     tarif_mensuel = models.FloatField()
     capacite = models.IntegerField()
     photo = models.ImageField(upload_to='activities/', null=True, blank=True)
+    # compteur dénormalisé des inscriptions, maintenu par club.signals
+    # (voir aussi la commande reconcile_enrollment_counts)
+    nb_inscriptions = models.IntegerField(default=0, editable=False)
+    # miniatures WebP/JPEG générées en tâche de fond (club.services.photos)
+    # {"source": <nom de la photo>, "sizes": {"thumb": {"webp": ..., "jpeg": ...}, ...}}
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # liste d'attente (club.services.waitlist) : dernier numéro attribué et
+    # dernier numéro promu en inscription
+    waitlist_seq = models.BigIntegerField(default=0, editable=False)
+    waitlist_served = models.BigIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # comme updated_at, mais que les UPDATE des MANAGED_FIELDS ne touchent pas :
+    # validateurs des vues qui n'affichent pas les compteurs (flux .ics, séances)
+    details_updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # activités la plus et la moins suivies (vue d'ensemble des statistiques)
+            models.Index(fields=['nb_inscriptions'], name='activity_nb_inscriptions_idx'),
+        ]
+
+    # Champs maintenus uniquement par des UPDATE ciblés (F-expressions, workers) :
+    # une sauvegarde complète ne doit pas réécrire une valeur périmée.
+    MANAGED_FIELDS = ('nb_inscriptions', 'photo_variants', 'waitlist_seq', 'waitlist_served')
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.MANAGED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.nom_act
@@ -44,11 +84,49 @@ class Enrollment(models.Model):
     membre = models.ForeignKey(Member, on_delete=models.CASCADE)
     activite = models.ForeignKey(Activity, on_delete=models.CASCADE)
     date_inscription = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('membre', 'activite')
 
 
+# File d'attente FIFO d'une activité complète : `sequence` est le numéro de
+# ticket, attribué depuis Activity.waitlist_seq (club.services.waitlist) ; les
+# tickets en attente se suivent sans trou, un départ fait avancer les suivants
+class WaitlistEntry(models.Model):
+    activite = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='waitlist')
+    membre = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='waitlist_entries')
+    sequence = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('membre', 'activite')
+        indexes = [
+            # tête de file et rang : plage (activite, sequence)
+            models.Index(fields=['activite', 'sequence'], name='waitlist_activite_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.membre} - {self.activite} (#{self.sequence})"
+
+
+# Durée de chaque type d'abonnement (clés = Subscription.TYPE_CHOICES), partagée
+# par save() et les traitements en masse (club.services.subscriptions)
+SUBSCRIPTION_DURATIONS = {
+    'MONTHLY': relativedelta(months=1),
+    '3_MONTHS': relativedelta(months=3),
+    '6_MONTHS': relativedelta(months=6),
+    'ANNUAL': relativedelta(years=1),
+}
+
+
+@lru_cache(maxsize=4096)
+def subscription_end(date_debut, type_abonnement):
+    # date_fin d'un abonnement ; mis en cache : un lot n'a que quelques couples distincts
+    return date_debut + SUBSCRIPTION_DURATIONS[type_abonnement]
+
+
 class Subscription(models.Model):
     TYPE_CHOICES = [
         ('MONTHLY', 'Mensuel'),
@@ -62,33 +140,183 @@ class Subscription(models.Model):
     date_debut = models.DateField()
     date_fin = models.DateField()
     actif = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # balayage des abonnements expirés (club.services.subscriptions)
+            models.Index(fields=['actif', 'date_fin'], name='subscription_actif_fin_idx'),
+            # /subscriptions/expiring/ : plage de date_fin, déjà triée pour la pagination (date_fin, id)
+            models.Index(fields=['date_fin', 'id'], name='subscription_fin_id_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         # Auto-calculate date_fin based on type_abonnement
-        if self.date_debut:
-            if self.type_abonnement == 'MONTHLY':
-                self.date_fin = self.date_debut + relativedelta(months=1)
-            elif self.type_abonnement == '3_MONTHS':
-                self.date_fin = self.date_debut + relativedelta(months=3)
-            elif self.type_abonnement == '6_MONTHS':
-                self.date_fin = self.date_debut + relativedelta(months=6)
-            elif self.type_abonnement == 'ANNUAL':
-                self.date_fin = self.date_debut + relativedelta(years=1)
+        if self.date_debut and self.type_abonnement in SUBSCRIPTION_DURATIONS:
+            self.date_fin = subscription_end(self.date_debut, self.type_abonnement)
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.membre} - {self.get_type_abonnement_display()}"
 
 
+# Planning récurrent d'une activité (règle hebdomadaire façon RRULE :
+# FREQ=WEEKLY;INTERVAL=intervalle;BYDAY=jours;UNTIL=date_fin, avec EXDATE = exceptions).
+# Les occurrences sont calculées à la demande pour une fenêtre
+# (club.services.schedules) ; seules celles de l'horizon glissant, ou auxquelles
+# quelque chose se rattache, deviennent des ClassSession.
+class ClassSchedule(models.Model):
+    activite = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='schedules')
+    jours = models.JSONField()  # jours de la semaine, 0 = lundi ... 6 = dimanche
+    intervalle = models.PositiveSmallIntegerField(default=1)  # toutes les N semaines
+    heure_debut = models.TimeField()
+    heure_fin = models.TimeField()
+    date_debut = models.DateField()
+    date_fin = models.DateField(null=True, blank=True)  # sans fin si vide
+    exceptions = models.JSONField(default=list, blank=True)  # dates annulées (YYYY-MM-DD)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        ordering = ['activite', 'heure_debut']
+
+    def __str__(self):
+        return f"{self.activite.nom_act} - {self.jours} {self.heure_debut}-{self.heure_fin}"
+
+
 class ClassSession(models.Model):
     activite = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name='sessions')
+    # planning d'origine d'une occurrence matérialisée (vide pour une séance ponctuelle)
+    schedule = models.ForeignKey(ClassSchedule, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions')
     date = models.DateField()
     heure_debut = models.TimeField()
     heure_fin = models.TimeField()
+    # compteur dénormalisé des présences, recalculé à chaque lot de pointages
+    # (club.services.attendance)
+    nb_presents = models.IntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # même principe que Activity.details_updated_at (pointages exclus)
+    details_updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # même principe que Activity.MANAGED_FIELDS
+    MANAGED_FIELDS = ('nb_presents',)
 
     class Meta:
         ordering = ['date', 'heure_debut']
+        # sert aussi les fenêtres de dates d'une activité (préfixe activite, date)
         unique_together = ('activite', 'date', 'heure_debut')
+        indexes = [
+            # calendrier : fenêtre date_from/date_to déjà triée (date, heure_debut, id)
+            models.Index(fields=['date', 'heure_debut'], name='classsession_date_heure_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.MANAGED_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.activite.nom_act} - {self.date} {self.heure_debut}-{self.heure_fin}"
+
+
+# Pointage d'un membre à l'entrée d'une séance, écrit par lots
+# (club.services.attendance)
+class Attendance(models.Model):
+    session = models.ForeignKey(ClassSession, on_delete=models.CASCADE, related_name='attendances')
+    membre = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='attendances')
+    checked_in_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('session', 'membre')
+
+    def __str__(self):
+        return f"{self.membre} - {self.session}"
+
+
+# Tables d'agrégats (rollups) maintenues de façon incrémentale par club.signals,
+# recalculables avec `manage.py rebuild_stats`. Le nombre d'inscriptions par
+# activité est déjà tenu dans Activity.nb_inscriptions.
+class DailyStats(models.Model):
+    # date NULL : membres sans date d'inscription (créés avant la migration 0002)
+    date = models.DateField(unique=True, null=True)
+    new_members = models.IntegerField(default=0)
+    new_enrollments = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.date}: +{self.new_members} membres, +{self.new_enrollments} inscriptions"
+
+
+class SubscriptionTypeStats(models.Model):
+    type_abonnement = models.CharField(max_length=20, choices=Subscription.TYPE_CHOICES, unique=True)
+    active_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.type_abonnement}: {self.active_count}"
+
+
+# Facturation mensuelle (club.services.billing, `manage.py run_billing`)
+class BillingRun(models.Model):
+    STATUS_CHOICES = [
+        ('RUNNING', 'En cours'),
+        ('DONE', 'Terminée'),
+        ('FAILED', 'Échec'),
+    ]
+
+    month = models.DateField(unique=True)  # premier jour du mois facturé
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='RUNNING')
+    # point de reprise : tous les membres d'id <= last_member_id sont facturés
+    last_member_id = models.IntegerField(default=0)
+    invoices = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} ({self.get_status_display()})"
+
+
+class Invoice(models.Model):
+    membre = models.ForeignKey(Member, on_delete=models.CASCADE, related_name='invoices')
+    month = models.DateField()
+    type_abonnement = models.CharField(max_length=20, choices=Subscription.TYPE_CHOICES)
+    amount = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('membre', 'month')
+        indexes = [
+            # listing d'un mois, paginé par id
+            models.Index(fields=['month', 'id'], name='invoice_month_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.membre} - {self.month:%Y-%m} : {self.amount}"
+
+
+class InvoiceLine(models.Model):
+    invoice = models.ForeignKey(Invoice, on_delete=models.CASCADE, related_name='lines')
+    # l'activité peut disparaître : son nom est conservé dans libelle
+    activite = models.ForeignKey(Activity, on_delete=models.SET_NULL, null=True, blank=True)
+    libelle = models.CharField(max_length=100)
+    amount = models.FloatField()
+
+    def __str__(self):
+        return f"{self.libelle} : {self.amount}"
+
+
+# Date de la dernière suppression par table, écrite dans la transaction qui
+# supprime (club.signals) : partagée par tous les processus et conservée au
+# redémarrage, elle complète max(updated_at) dans les Last-Modified
+class DeletionStamp(models.Model):
+    model = models.CharField(max_length=100, unique=True)  # app_label.model
+    deleted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.model} : {self.deleted_at}"
@@ -0,0 +1,246 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from club.models import Attendance, ClassSession, Member
+
+
+logger = logging.getLogger(__name__)
+
+# Le lot part dès CHECKIN_FLUSH_SIZE pointages, ou CHECKIN_FLUSH_INTERVAL
+# secondes après le premier pointage en attente
+CHECKIN_FLUSH_INTERVAL = getattr(settings, "CLUB_CHECKIN_FLUSH_INTERVAL", 0.005)
+CHECKIN_FLUSH_SIZE = getattr(settings, "CLUB_CHECKIN_FLUSH_SIZE", 500)
+# Délai maximal d'attente de l'écriture par la requête de pointage
+CHECKIN_TIMEOUT = 10
+# Nouvelles tentatives quand SQLite reste verrouillé malgré son `timeout`
+FLUSH_RETRIES = 3
+
+CHECKIN_CREATED = "checked_in"
+CHECKIN_DUPLICATE = "already_checked_in"
+CHECKIN_MEMBER_NOT_FOUND = "member_not_found"
+CHECKIN_SESSION_NOT_FOUND = "session_not_found"
+
+
+class CheckInError(ValueError):
+    """Pointage refusé ; `status` est le code HTTP à renvoyer."""
+    status = 400
+
+
+class CheckInSessionNotFound(CheckInError):
+    status = 404
+
+
+class CheckInClosed(CheckInError):
+    # la séance n'a pas lieu aujourd'hui
+    status = 409
+
+
+def attendance_count_subquery():
+    # COUNT(*) des présences de la séance courante (pour les UPDATE / annotate)
+    counts = (
+        Attendance.objects.filter(session_id=OuterRef("pk"))
+        .order_by().values("session_id").annotate(n=Count("id")).values("n")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_attendance_counts():
+    """
+    Recalcule le compteur ClassSession.nb_presents à partir de la table Attendance.
+    Retourne la liste des (séance, activité, ancienne valeur, vraie valeur) corrigées.
+    """
+    drifted = list(
+        ClassSession.objects
+        .annotate(real_count=attendance_count_subquery())
+        .exclude(nb_presents=F("real_count"))
+        .values_list("id", "activite__nom_act", "nb_presents", "real_count")
+    )
+    if drifted:
+        (
+            ClassSession.objects
+            .filter(id__in=[row[0] for row in drifted])
+            .update(nb_presents=attendance_count_subquery(), updated_at=timezone.now())
+        )
+    return drifted
+
+
+class CheckInWriter:
+    """
+    Écrivain par lots des pointages (un par processus).
+
+    Les requêtes déposent leurs pointages dans un tampon et attendent leur
+    Future ; un thread unique les regroupe et les écrit en une transaction
+    (bulk_create puis recalcul des compteurs des séances touchées). Un seul
+    écrivain et des transactions courtes : pas de file d'attente de verrous
+    SQLite pendant les rafales.
+
+    Les doublons sont écartés avant le tampon grâce à un ensemble de membres
+    par séance ouverte, chargé depuis la base au premier pointage de la séance
+    (la contrainte d'unicité reste le filet de sécurité entre processus).
+    """
+
+    def __init__(self, flush_interval=CHECKIN_FLUSH_INTERVAL, flush_size=CHECKIN_FLUSH_SIZE):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = []
+        self._seen = {}  # séance ouverte -> (date, membres déjà pointés)
+        self._thread = None
+
+    # --- côté requêtes -------------------------------------------------------
+
+    def _open_session(self, session_id, today):
+        # sous self._lock ; une requête par séance et par processus
+        entry = self._seen.get(session_id)
+        if entry is not None and entry[0] == today:
+            return entry[1]
+        session = ClassSession.objects.filter(pk=session_id).values_list("date", flat=True).first()
+        if session is None:
+            raise CheckInSessionNotFound("Class session not found")
+        if session != today:
+            raise CheckInClosed("Check-in is only open on the day of the session")
+        # les séances des jours précédents sont closes
+        for closed in [pk for pk, (day, _) in self._seen.items() if day != today]:
+            del self._seen[closed]
+        members = set(Attendance.objects.filter(session_id=session_id).values_list("membre_id", flat=True))
+        self._seen[session_id] = (today, members)
+        return members
+
+    def submit(self, session_id, member_id):
+        """
+        Dépose un pointage ; retourne une Future qui donne son statut
+        (CHECKIN_CREATED, CHECKIN_DUPLICATE, ...) une fois le lot écrit.
+        """
+        future = Future()
+        today = timezone.localdate()
+        with self._lock:
+            members = self._open_session(session_id, today)
+            if member_id in members:
+                future.set_result(CHECKIN_DUPLICATE)
+                return future
+            members.add(member_id)
+            self._pending.append((session_id, member_id, timezone.now(), future))
+            self._ensure_thread()
+            if len(self._pending) >= self.flush_size or len(self._pending) == 1:
+                self._wakeup.notify()
+        return future
+
+    def check_in(self, session_id, member_id, timeout=CHECKIN_TIMEOUT):
+        return self.submit(session_id, member_id).result(timeout)
+
+    def forget(self, session_id, member_id):
+        # présence supprimée : le membre peut pointer de nouveau (club.signals)
+        with self._lock:
+            entry = self._seen.get(session_id)
+            if entry is not None:
+                entry[1].discard(member_id)
+
+    # --- thread d'écriture ---------------------------------------------------
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="club-checkin-writer", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                while not self._pending:
+                    self._wakeup.wait()
+                # laisse le lot se remplir, sauf s'il est déjà plein
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.flush_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                batch, self._pending = self._pending[:self.flush_size], self._pending[self.flush_size:]
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            for attempt in range(FLUSH_RETRIES + 1):
+                try:
+                    results = self._write(batch)
+                    break
+                except OperationalError as e:
+                    if "locked" not in str(e) or attempt == FLUSH_RETRIES:
+                        raise
+                    time.sleep(0.05 * (attempt + 1))
+        except Exception as e:
+            logger.exception("Check-in batch of %d failed", len(batch))
+            with self._lock:
+                for session_id, member_id, _, _ in batch:
+                    entry = self._seen.get(session_id)
+                    if entry is not None:
+                        entry[1].discard(member_id)
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            # ce thread a sa propre connexion à la base
+            close_old_connections()
+
+        rejected = []
+        for (session_id, member_id, _, future), status in zip(batch, results):
+            # un doublon reste connu : le membre est bien pointé
+            if status not in (CHECKIN_CREATED, CHECKIN_DUPLICATE):
+                rejected.append((session_id, member_id))
+            future.set_result(status)
+        if rejected:
+            with self._lock:
+                for session_id, member_id in rejected:
+                    entry = self._seen.get(session_id)
+                    if entry is not None:
+                        entry[1].discard(member_id)
+
+    def _write(self, batch):
+        """
+        Une transaction par lot : vérifie membres et séances en deux requêtes,
+        insère les présences, relit les couples (séance, membre) du lot pour
+        connaître le vrai résultat, puis recalcule en un UPDATE le compteur des
+        séances touchées (COUNT servi par l'index unique session/membre).
+        Retourne le statut de chaque pointage du lot.
+        """
+        member_ids = {member_id for _, member_id, _, _ in batch}
+        session_ids = {session_id for session_id, _, _, _ in batch}
+        with transaction.atomic():
+            members = set(Member.objects.filter(id__in=member_ids).values_list("id", flat=True))
+            sessions = set(ClassSession.objects.filter(id__in=session_ids).values_list("id", flat=True))
+            rows = [
+                Attendance(session_id=session_id, membre_id=member_id, checked_in_at=checked_in_at)
+                for session_id, member_id, checked_in_at, _ in batch
+                if session_id in sessions and member_id in members
+            ]
+            Attendance.objects.bulk_create(rows, ignore_conflicts=True)
+            # une ligne déjà là (autre processus) a gardé son propre checked_in_at :
+            # seul notre horodatage prouve que l'insertion est la nôtre
+            stored = {
+                (session_id, member_id): checked_in_at
+                for session_id, member_id, checked_in_at in Attendance.objects
+                .filter(session_id__in=sessions, membre_id__in=member_ids)
+                .values_list("session_id", "membre_id", "checked_in_at")
+            }
+            results = []
+            for session_id, member_id, checked_in_at, _ in batch:
+                if session_id not in sessions:
+                    results.append(CHECKIN_SESSION_NOT_FOUND)
+                elif member_id not in members:
+                    results.append(CHECKIN_MEMBER_NOT_FOUND)
+                elif stored.get((session_id, member_id)) == checked_in_at:
+                    results.append(CHECKIN_CREATED)
+                else:
+                    results.append(CHECKIN_DUPLICATE)
+            ClassSession.objects.filter(id__in=sessions).update(
+                nb_presents=attendance_count_subquery(), updated_at=timezone.now()
+            )
+        return results
+
+checkin_writer = CheckInWriter()
@@ -0,0 +1,184 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from club.models import BillingRun, Enrollment, Invoice, InvoiceLine, Member
+
+
+logger = logging.getLogger(__name__)
+
+BILLING_CHUNK_SIZE = 5000
+# Une exécution "RUNNING" sans progression depuis ce délai est considérée
+# comme interrompue et peut être reprise
+STALE_RUN_AFTER = timedelta(minutes=5)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="billing")
+
+
+class BillingError(ValueError):
+    """Erreur de facturation ; `status` est le code HTTP à renvoyer."""
+    status = 400
+
+
+class BillingConflict(BillingError):
+    # mois déjà facturé ou facturation en cours
+    status = 409
+
+
+def parse_month(value):
+    # "YYYY-MM" -> premier jour du mois
+    try:
+        return datetime.strptime(value or "", "%Y-%m").date()
+    except ValueError:
+        raise BillingError("Invalid month format. Use YYYY-MM")
+
+
+def _claim_run(month, restart=False):
+    """
+    Crée ou reprend l'exécution du mois. Une seule exécution à la fois :
+    la ligne BillingRun est verrouillée pendant la décision.
+    """
+    with transaction.atomic():
+        run, created = BillingRun.objects.select_for_update().get_or_create(month=month)
+        if not created:
+            if run.status == "DONE" and not restart:
+                raise BillingConflict(f"{month:%Y-%m} is already billed (use restart to bill it again)")
+            if run.status == "RUNNING" and run.updated_at > timezone.now() - STALE_RUN_AFTER:
+                raise BillingConflict(f"Billing of {month:%Y-%m} is already in progress")
+        if restart:
+            Invoice.objects.filter(month=month).delete()
+            run.last_member_id = 0
+            run.invoices = 0
+            run.total = 0
+        run.status = "RUNNING"
+        run.finished_at = None
+        run.save()
+    return run
+
+
+def _bill_chunk(run, month, month_end, chunk_size):
+    """
+    Facture le prochain paquet de membres (par id croissant) ayant un
+    abonnement couvrant le mois. Deux lectures, deux bulk_create et la mise
+    à jour du point de reprise, dans une même transaction.
+    Retourne False quand il n'y a plus personne à facturer.
+    """
+    billable = list(
+        Member.objects
+        .filter(
+            id__gt=run.last_member_id,
+            # période de l'abonnement, pas son état actuel : un abonnement
+            # expiré depuis (balayage) reste facturable pour ce mois
+            subscription__date_debut__lte=month_end,
+            subscription__date_fin__gte=month,
+        )
+        .order_by("id")
+        .values_list("id", "subscription__type_abonnement")[:chunk_size]
+    )
+    if not billable:
+        return False
+    types = dict(billable)
+    upper = billable[-1][0]
+
+    # inscriptions existantes à la fin du mois, pour les membres du paquet
+    charges = {}
+    rows = (
+        Enrollment.objects
+        .filter(membre_id__gt=run.last_member_id, membre_id__lte=upper, date_inscription__lte=month_end)
+        .order_by()
+        .values_list("membre_id", "activite_id", "activite__nom_act", "activite__tarif_mensuel")
+    )
+    for membre_id, activite_id, nom_act, tarif in rows:
+        if membre_id in types:
+            charges.setdefault(membre_id, []).append((activite_id, nom_act, tarif))
+
+    invoices = [
+        Invoice(
+            membre_id=membre_id,
+            month=month,
+            type_abonnement=types[membre_id],
+            amount=round(sum(tarif for _, _, tarif in lines), 2),
+        )
+        for membre_id, lines in sorted(charges.items())
+    ]
+    with transaction.atomic():
+        Invoice.objects.bulk_create(invoices)
+        InvoiceLine.objects.bulk_create(
+            InvoiceLine(invoice_id=invoice.pk, activite_id=activite_id, libelle=nom_act, amount=tarif)
+            for invoice in invoices
+            for activite_id, nom_act, tarif in charges[invoice.membre_id]
+        )
+        BillingRun.objects.filter(pk=run.pk).update(
+            last_member_id=upper,
+            invoices=F("invoices") + len(invoices),
+            total=F("total") + sum(invoice.amount for invoice in invoices),
+            updated_at=timezone.now(),
+        )
+    run.last_member_id = upper
+    return True
+
+
+def run_billing(month, chunk_size=BILLING_CHUNK_SIZE, restart=False, progress=None, run=None):
+    """
+    Facture le mois `month` : une facture par membre ayant un abonnement couvrant
+    le mois et au moins une inscription, égale à la somme des tarifs
+    mensuels de ses activités (une ligne par activité).
+
+    Reprise : chaque paquet est validé avec son point de reprise, une
+    exécution interrompue repart du dernier paquet validé.
+    `run` : exécution déjà réservée par schedule_billing.
+    """
+    if run is None:
+        run = _claim_run(month, restart)
+    month_end = month + relativedelta(months=1) - timedelta(days=1)
+    try:
+        while _bill_chunk(run, month, month_end, chunk_size):
+            if progress:
+                progress(run.last_member_id)
+    except Exception:
+        BillingRun.objects.filter(pk=run.pk).update(status="FAILED", updated_at=timezone.now())
+        raise
+    BillingRun.objects.filter(pk=run.pk).update(
+        status="DONE", finished_at=timezone.now(), updated_at=timezone.now()
+    )
+    run.refresh_from_db()
+    return run
+
+
+def _run_in_worker(run):
+    try:
+        run_billing(run.month, run=run)
+    except Exception:
+        logger.exception("Billing of %s failed", run.month)
+    finally:
+        close_old_connections()
+
+
+def schedule_billing(month, restart=False):
+    """
+    Lance la facturation en arrière-plan (API). L'exécution est réservée tout
+    de suite, pour signaler un conflit à l'appelant, puis confiée au worker.
+    """
+    run = _claim_run(month, restart)
+    transaction.on_commit(lambda: _executor.submit(_run_in_worker, run))
+    return run
+
+
+def mrr_per_activity(month):
+    """
+    Revenu mensuel facturé par activité pour `month` (lignes de factures).
+    """
+    rows = (
+        InvoiceLine.objects
+        .filter(invoice__month=month)
+        .values("activite_id", "libelle")
+        .annotate(members=Count("id"), mrr=Sum("amount"))
+        .order_by("-mrr", "libelle")
+    )
+    return [
+        {"activity_id": row["activite_id"], "nom_act": row["libelle"], "members": row["members"], "mrr": round(row["mrr"], 2)}
+        for row in rows
+    ]
@@ -0,0 +1,194 @@
+import hashlib
+from itertools import islice
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+from club.api.conditional import deletion_stamps
+from club.models import Activity, ClassSchedule, ClassSession
+from club.services.schedules import occurrence_dates
+
+
+# Fenêtre des flux .ics : les ICS_FEED_PAST_DAYS derniers jours et les
+# ICS_FEED_DAYS prochains (occurrences des plannings comprises)
+ICS_FEED_PAST_DAYS = getattr(settings, "CLUB_ICS_FEED_PAST_DAYS", 30)
+ICS_FEED_DAYS = getattr(settings, "CLUB_ICS_FEED_DAYS", 180)
+ICS_CACHE_TIMEOUT = getattr(settings, "CLUB_ICS_CACHE_TIMEOUT", 24 * 3600)
+ICS_UID_DOMAIN = getattr(settings, "CLUB_ICS_UID_DOMAIN", "club.local")
+ICS_CHUNK_SIZE = 2000
+
+
+def feed_window(today=None):
+    today = today or timezone.localdate()
+    return today - timedelta(days=ICS_FEED_PAST_DAYS), today + timedelta(days=ICS_FEED_DAYS)
+
+
+def _window_sessions(date_from, date_to, activity_id=None):
+    sessions = ClassSession.objects.filter(date__gte=date_from, date__lte=date_to)
+    return sessions.filter(activite_id=activity_id) if activity_id else sessions
+
+
+def _window_schedules(date_from, date_to, activity_id=None):
+    schedules = ClassSchedule.objects.filter(
+        Q(date_fin__isnull=True) | Q(date_fin__gte=date_from), date_debut__lte=date_to
+    )
+    return schedules.filter(activite_id=activity_id) if activity_id else schedules
+
+
+def feed_version(date_from, date_to, activity_id=None):
+    """
+    Empreinte du contenu d'un flux : nombre de lignes et dernière modification
+    des séances et plannings de la fenêtre (index sur la date) et des
+    activités (noms affichés), et dates des dernières suppressions. Pour les
+    séances et activités, details_updated_at : les compteurs (inscriptions,
+    liste d'attente, pointages) ne sont pas dans le flux et ne l'invalident
+    pas. Sert de clé de cache et d'ETag.
+    """
+    parts = [date_from.isoformat(), date_to.isoformat(), str(activity_id or "all")]
+    activities = Activity.objects.filter(pk=activity_id) if activity_id else Activity.objects
+    for queryset, field in (
+        (_window_sessions(date_from, date_to, activity_id), "details_updated_at"),
+        (_window_schedules(date_from, date_to, activity_id), "updated_at"),
+        (activities, "details_updated_at"),
+    ):
+        stats = queryset.order_by().aggregate(last=Max(field), n=Count("pk"))
+        parts.append(f"{stats['n']}:{stats['last'].timestamp() if stats['last'] else 0}")
+    deletions = deletion_stamps(ClassSession, ClassSchedule, Activity)
+    for model in (ClassSession, ClassSchedule, Activity):
+        parts.append(str(deletions.get(model, 0)))
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+
+def _escape(text):
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    # lignes de 75 octets au plus, suite préfixée d'un espace (RFC 5545, 3.1)
+    data = line.encode()
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start = [], 0
+    while start < len(data):
+        size = 75 if start == 0 else 74
+        end = min(start + size, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # ne pas couper un caractère UTF-8
+            end -= 1
+        parts.append(data[start:end].decode())
+        start = end
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _event(uid, stamp, day, heure_debut, heure_fin, summary):
+    # heures "flottantes" : l'heure locale du club, sans fuseau
+    return "".join(_fold(line) for line in (
+        "BEGIN:VEVENT",
+        f"UID:{uid}@{ICS_UID_DOMAIN}",
+        f"DTSTAMP:{_stamp(stamp)}",
+        f"DTSTART:{datetime.combine(day, heure_debut):%Y%m%dT%H%M%S}",
+        f"DTEND:{datetime.combine(day, heure_fin):%Y%m%dT%H%M%S}",
+        f"SUMMARY:{_escape(summary)}",
+        "END:VEVENT",
+    ))
+
+
+def _uid(schedule_id, session_id, day):
+    # une occurrence garde son UID quand elle est matérialisée
+    if schedule_id:
+        return f"schedule-{schedule_id}-{day:%Y%m%d}"
+    return f"session-{session_id}"
+
+
+def iter_ics(date_from, date_to, activity_id=None, name="Club"):
+    """
+    Flux iCalendar de la fenêtre, produit au fil de la lecture : les séances
+    sont lues par paquets (iterator), puis les occurrences des plannings qui
+    n'ont pas encore de séance (l'ordre des VEVENT est libre).
+    """
+    yield "".join(_fold(line) for line in (
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Club//Class sessions//FR",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ))
+
+    taken = set()
+    sessions = (
+        _window_sessions(date_from, date_to, activity_id)
+        .order_by("date", "heure_debut", "id")
+        .values_list("id", "schedule_id", "activite_id", "activite__nom_act", "date", "heure_debut", "heure_fin", "details_updated_at")
+    )
+    chunk = []
+    for session_id, schedule_id, activite_id, nom_act, day, heure_debut, heure_fin, updated_at in sessions.iterator(chunk_size=ICS_CHUNK_SIZE):
+        taken.add((activite_id, day, heure_debut))
+        chunk.append(_event(_uid(schedule_id, session_id, day), updated_at, day, heure_debut, heure_fin, nom_act))
+        if len(chunk) >= ICS_CHUNK_SIZE:
+            yield "".join(chunk)
+            chunk = []
+
+    for schedule in _window_schedules(date_from, date_to, activity_id).select_related("activite"):
+        for day in occurrence_dates(schedule, date_from, date_to):
+            if (schedule.activite_id, day, schedule.heure_debut) in taken:
+                continue
+            chunk.append(_event(
+                _uid(schedule.id, None, day), schedule.updated_at, day,
+                schedule.heure_debut, schedule.heure_fin, schedule.activite.nom_act,
+            ))
+            if len(chunk) >= ICS_CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+
+    chunk.append("END:VCALENDAR\r\n")
+    yield "".join(chunk)
+
+
+def _cached_stream(key, chunks):
+    # renvoie les morceaux au client en les mettant en cache un par un
+    # (key:0, key:1...) ; leur nombre, sous `key`, n'est écrit qu'à la fin :
+    # un flux interrompu n'est jamais servi depuis le cache
+    count = 0
+    for part in chunks:
+        cache.set(f"{key}:{count}", part, ICS_CACHE_TIMEOUT)
+        count += 1
+        yield part
+    cache.set(key, count, ICS_CACHE_TIMEOUT)
+
+
+def _cache_chunks(key, count, regenerate):
+    # relit les morceaux un par un ; si l'un d'eux a été évincé entre-temps,
+    # la suite est régénérée (même version, donc mêmes morceaux)
+    for n in range(count):
+        part = cache.get(f"{key}:{n}")
+        if part is None:
+            yield from islice(regenerate(), n, None)
+            return
+        yield part
+
+
+def calendar_feed(activity=None, today=None):
+    """
+    (version, morceaux) du flux .ics du club ou d'une activité. Le flux est
+    servi depuis le cache, morceau par morceau, tant que `feed_version` ne
+    change pas ; sinon il est régénéré en streaming et remis en cache.
+    """
+    date_from, date_to = feed_window(today)
+    activity_id = activity.pk if activity else None
+    version = feed_version(date_from, date_to, activity_id)
+    key = f"club:ics-chunks:{activity_id or 'all'}:{version}"
+    name = activity.nom_act if activity else "Club"
+
+    def regenerate():
+        return iter_ics(date_from, date_to, activity_id, name)
+
+    count = cache.get(key)
+    if count is not None:
+        return version, _cache_chunks(key, count, regenerate)
+    return version, _cached_stream(key, regenerate())
@@ -0,0 +1,40 @@
+import hashlib
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+
+
+CATALOGUE_CACHE_TIMEOUT = getattr(settings, "CLUB_CATALOGUE_CACHE_TIMEOUT", 300)
+_NAMESPACE_KEY = "club:catalogue:namespace"
+
+
+def _namespace():
+    """
+    Jeton courant du catalogue. Toutes les entrées (une par combinaison
+    search/sort) sont préfixées par ce jeton : en changer invalide tout
+    le catalogue d'un coup, sans avoir à connaître les clés existantes.
+    """
+    token = cache.get(_NAMESPACE_KEY)
+    if token is None:
+        # jeton neuf (jamais un compteur remis à 1 après éviction)
+        cache.add(_NAMESPACE_KEY, uuid.uuid4().hex, None)
+        token = cache.get(_NAMESPACE_KEY)
+    return token
+
+
+def invalidate_catalogue():
+    cache.set(_NAMESPACE_KEY, uuid.uuid4().hex, None)
+
+
+def get_catalogue(search, sort, build):
+    """
+    Catalogue public des activités, mis en cache par combinaison search/sort.
+    `build` calcule la liste sérialisée en cas d'absence dans le cache.
+    """
+    digest = hashlib.md5(f"{search or ''}|{sort or ''}".encode()).hexdigest()
+    key = f"club:catalogue:{_namespace()}:{digest}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, CATALOGUE_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,310 @@
+import threading
+import time
+from django.conf import settings
+from club.models import Member, Activity, Enrollment, Subscription
+from club.services.statistics import AGE_BAND_EDGES, AGE_BAND_LABELS, BREAKDOWNS, SUBSCRIPTION_TYPES
+
+try:
+    import numpy as np
+except ImportError:  # dépendance optionnelle : sans NumPy, le chemin ORM est utilisé
+    np = None
+
+
+CUBE_ENABLED = getattr(settings, "CLUB_ANALYTICS_CUBE", True)
+# Reconstruction en tâche de fond (ordonnanceur) toutes les N secondes : rattrape
+# les écritures des autres processus, que les signaux de celui-ci ne voient pas
+CUBE_REBUILD_INTERVAL = getattr(settings, "CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL", 300)
+
+_TYPE_CODES = {code: i for i, code in enumerate(SUBSCRIPTION_TYPES)}
+_NO_SUBSCRIPTION = -1
+
+
+class _Table:
+    """
+    Colonnes NumPy d'une table, indexées par clé primaire. Les ajouts se font
+    dans une capacité qui double au besoin ; une suppression marque seulement
+    la ligne comme morte (le prochain rechargement compacte).
+    """
+
+    def __init__(self, pks, **columns):
+        self.index = {pk: row for row, pk in enumerate(pks)}
+        self.size = len(self.index)
+        capacity = max(self.size, 64)
+        self.columns = {}
+        for name, values in columns.items():
+            column = np.empty(capacity, dtype=values.dtype)
+            column[:self.size] = values
+            self.columns[name] = column
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.alive[:self.size] = True
+
+    def col(self, name):
+        return self.columns[name][:self.size]
+
+    def live(self):
+        return self.alive[:self.size]
+
+    def upsert(self, pk, **values):
+        row = self.index.get(pk)
+        if row is None:
+            if self.size == len(self.alive):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.index[pk] = row
+            self.alive[row] = True
+        for name, value in values.items():
+            self.columns[name][row] = value
+        return row
+
+    def remove(self, pk):
+        row = self.index.pop(pk, None)
+        if row is not None:
+            self.alive[row] = False
+
+    def _grow(self):
+        capacity = len(self.alive) * 2
+        for name, column in self.columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        self.alive = alive
+
+
+class AnalyticsCube:
+    """
+    Cube d'analyse en mémoire (par processus) pour les répartitions du tableau
+    de bord : âge, actif et type d'abonnement actif des membres, tarif des
+    activités, et inscriptions sous forme de paires d'index (membre, activité).
+
+    Chargé une fois, puis tenu à jour par club.signals après chaque commit et
+    reconstruit périodiquement en tâche de fond ; les répartitions sont des bincount vectorisés au lieu de GROUP BY.
+    Rend les mêmes structures que les fonctions ORM de club.services.statistics.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        # incrémenté par invalidate() : une reconstruction commencée avant est périmée
+        self._generation = 0
+        # mises à jour reçues pendant une reconstruction, rejouées sur le nouveau cube
+        self._pending = None
+
+    @property
+    def loaded(self):
+        return self._loaded_at is not None
+
+    def _build(self):
+        members = list(Member.objects.order_by("id").values_list("id", "age", "actif"))
+        subscriptions = dict(
+            Subscription.objects.filter(actif=True).values_list("membre_id", "type_abonnement")
+        )
+        activities = list(Activity.objects.order_by("id").values_list("id", "tarif_mensuel", "nom_act"))
+        enrollments = list(Enrollment.objects.order_by("id").values_list("id", "membre_id", "activite_id"))
+
+        member_table = _Table(
+            [m[0] for m in members],
+            age=np.array([m[1] for m in members], dtype=np.int16),
+            actif=np.array([m[2] for m in members], dtype=bool),
+            sub=np.array([_TYPE_CODES.get(subscriptions.get(m[0]), _NO_SUBSCRIPTION) for m in members], dtype=np.int8),
+        )
+        activity_table = _Table(
+            [a[0] for a in activities],
+            tarif=np.array([a[1] for a in activities], dtype=np.float64),
+        )
+        # requêtes successives sans transaction (qui verrouillerait SQLite en
+        # écriture) : on ignore une inscription dont le membre vient d'apparaître
+        enrollments = [
+            e for e in enrollments
+            if e[1] in member_table.index and e[2] in activity_table.index
+        ]
+        enrollment_table = _Table(
+            [e[0] for e in enrollments],
+            member=np.array([member_table.index[e[1]] for e in enrollments], dtype=np.int32),
+            activity=np.array([activity_table.index[e[2]] for e in enrollments], dtype=np.int32),
+        )
+        return member_table, activity_table, {a[0]: a[2] for a in activities}, enrollment_table
+
+    def _swap(self, tables):
+        self.members, self.activities, self.activity_names, self.enrollments = tables
+        self._loaded_at = time.monotonic()
+
+    def load(self):
+        # sous le verrou : aucune mise à jour incrémentale ne se perd pendant le chargement
+        with self._lock:
+            self._swap(self._build())
+
+    def ensure_fresh(self):
+        # premier usage, ou après invalidate() (écritures en masse) ; sinon les
+        # signaux tiennent le cube à jour et l'ordonnanceur le reconstruit
+        with self._lock:
+            if self._loaded_at is None:
+                self.load()
+
+    def rebuild(self):
+        """
+        Reconstruction en tâche de fond (ordonnanceur) : lue hors du verrou,
+        les requêtes continuent d'utiliser l'ancien cube ; les mises à jour
+        arrivées entre-temps sont rejouées sur le nouveau avant l'échange.
+        Ne fait rien tant que le processus n'a pas servi de répartition.
+        """
+        with self._lock:
+            if self._loaded_at is None or self._pending is not None:
+                return
+            generation = self._generation
+            self._pending = []
+        try:
+            tables = self._build()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            if generation != self._generation or self._loaded_at is None:
+                return  # invalidé pendant la lecture : le prochain appel recharge
+            current = (self.members, self.activities, self.activity_names, self.enrollments)
+            self._swap(tables)
+            try:
+                for update in pending:
+                    update()
+            except KeyError:
+                self._swap(current)
+                self._loaded_at = None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+            self._generation += 1
+
+    # --- mises à jour incrémentales (appelées après commit) -----------------
+
+    def _apply(self, update):
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            if self._pending is not None:
+                self._pending.append(update)
+            try:
+                update()
+            except KeyError:
+                # ligne liée inconnue du cube (écriture hors signaux) : tout recharger
+                self.invalidate()
+
+    def member_saved(self, pk, age, actif):
+        def update():
+            row = self.members.index.get(pk)
+            if row is None:
+                self.members.upsert(pk, age=age, actif=actif, sub=_NO_SUBSCRIPTION)
+            else:
+                self.members.upsert(pk, age=age, actif=actif)
+        self._apply(update)
+
+    def member_deleted(self, pk):
+        # ses inscriptions et son abonnement ont leurs propres signaux (cascade)
+        self._apply(lambda: self.members.remove(pk))
+
+    def subscription_saved(self, member_id, type_abonnement, actif):
+        code = _TYPE_CODES[type_abonnement] if actif else _NO_SUBSCRIPTION
+        self._apply(lambda: self.members.upsert(member_id, sub=code) if member_id in self.members.index else None)
+
+    def subscription_deleted(self, member_id):
+        self.subscription_saved(member_id, None, False)
+
+    def activity_saved(self, pk, tarif, nom_act):
+        def update():
+            self.activities.upsert(pk, tarif=tarif)
+            self.activity_names[pk] = nom_act
+        self._apply(update)
+
+    def activity_deleted(self, pk):
+        def update():
+            self.activities.remove(pk)
+            self.activity_names.pop(pk, None)
+        self._apply(update)
+
+    def enrollment_saved(self, pk, member_id, activity_id):
+        self._apply(lambda: self.enrollments.upsert(
+            pk, member=self.members.index[member_id], activity=self.activities.index[activity_id]
+        ))
+
+    def enrollment_deleted(self, pk):
+        self._apply(lambda: self.enrollments.remove(pk))
+
+    # --- répartitions --------------------------------------------------------
+
+    def _enrollment_rows(self, actif=None, type_abonnement=None, activity=None):
+        """Lignes (membre, activité) des inscriptions vivantes qui passent les filtres."""
+        member_rows = self.enrollments.col("member")
+        activity_rows = self.enrollments.col("activity")
+        mask = self.enrollments.live().copy()
+        if actif is not None:
+            mask &= self.members.col("actif")[member_rows] == actif
+        if type_abonnement is not None:
+            mask &= self.members.col("sub")[member_rows] == _TYPE_CODES[type_abonnement]
+        if activity is not None:
+            row = self.activities.index.get(activity)
+            mask &= activity_rows == (row if row is not None else -1)
+        return member_rows[mask], activity_rows[mask]
+
+    def _activity_order(self, activity):
+        ids = sorted(self.activities.index)
+        if activity is not None:
+            ids = [pk for pk in ids if pk == activity]
+        return ids
+
+    def age_distribution_per_activity(self, actif=None, type_abonnement=None, activity=None):
+        with self._lock:
+            member_rows, activity_rows = self._enrollment_rows(actif, type_abonnement, activity)
+            n_bands = len(AGE_BAND_LABELS)
+            bands = np.searchsorted(AGE_BAND_EDGES, self.members.col("age")[member_rows], side="right")
+            counts = np.bincount(
+                activity_rows.astype(np.int64) * n_bands + bands,
+                minlength=self.activities.size * n_bands,
+            ).reshape(-1, n_bands)
+            return [
+                {
+                    "activity_id": pk,
+                    "nom_act": self.activity_names[pk],
+                    "bands": dict(zip(AGE_BAND_LABELS, counts[self.activities.index[pk]].tolist())),
+                }
+                for pk in self._activity_order(activity)
+            ]
+
+    def revenue_per_subscription_type(self, actif=None, type_abonnement=None, activity=None):
+        with self._lock:
+            member_rows, activity_rows = self._enrollment_rows(actif, type_abonnement, activity)
+            # case 0 = sans abonnement actif, puis un case par type
+            codes = self.members.col("sub")[member_rows].astype(np.int64) + 1
+            size = len(SUBSCRIPTION_TYPES) + 1
+            counts = np.bincount(codes, minlength=size)
+            revenue = np.bincount(codes, weights=self.activities.col("tarif")[activity_rows], minlength=size)
+            return [
+                {"type_abonnement": code, "enrollments": int(counts[i]), "revenue": round(float(revenue[i]), 2)}
+                for i, code in enumerate((None,) + SUBSCRIPTION_TYPES)
+            ]
+
+
+analytics_cube = AnalyticsCube()
+
+
+def cube_available():
+    return np is not None and CUBE_ENABLED
+
+
+def cube_rebuild_enabled():
+    # reconstruction périodique (club.services.scheduler) ; réglage lu à chaque passage
+    return cube_available() and bool(getattr(settings, "CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL", None))
+
+
+def breakdown(name, **filters):
+    """
+    Répartition `name` (voir BREAKDOWNS), servie par le cube en mémoire
+    quand NumPy est installé, sinon par le chemin ORM.
+    """
+    if cube_available():
+        analytics_cube.ensure_fresh()
+        return getattr(analytics_cube, BREAKDOWNS[name].__name__)(**filters)
+    return BREAKDOWNS[name](**filters)
@@ -0,0 +1,201 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from club.models import Activity, Enrollment, Member
+from club.services.catalogue import invalidate_catalogue
+from club.services.cube import analytics_cube
+from club.services.rollups import record_bulk_created, record_new_enrollments
+
+
+class EnrollmentError(Exception):
+    """Erreur métier d'inscription ; `status` est le code HTTP à renvoyer."""
+    status = 400
+
+
+class MemberNotFound(EnrollmentError):
+    status = 404
+
+    def __init__(self):
+        super().__init__("Member not found")
+
+
+class ActivityNotFound(EnrollmentError):
+    status = 404
+
+    def __init__(self):
+        super().__init__("Activity not found")
+
+
+class AlreadyEnrolled(EnrollmentError):
+    def __init__(self):
+        super().__init__("Member already enrolled in this activity")
+
+
+class ActivityFull(EnrollmentError):
+    def __init__(self):
+        super().__init__("Activity is full")
+
+
+def enrollment_count_subquery():
+    # COUNT(*) des inscriptions de l'activité courante (pour les UPDATE / annotate)
+    counts = (
+        Enrollment.objects
+        .filter(activite=OuterRef("pk"))
+        .values("activite")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def reconcile_enrollment_counts():
+    """
+    Recalcule le compteur Activity.nb_inscriptions à partir de la table Enrollment.
+    Retourne la liste des (activité, ancienne valeur, vraie valeur) corrigées.
+    """
+    drifted = list(
+        Activity.objects
+        .annotate(real_count=enrollment_count_subquery())
+        .exclude(nb_inscriptions=F("real_count"))
+        .values_list("id", "nom_act", "nb_inscriptions", "real_count")
+    )
+    if drifted:
+        (
+            Activity.objects
+            .filter(id__in=[row[0] for row in drifted])
+            .update(nb_inscriptions=enrollment_count_subquery(), updated_at=timezone.now())
+        )
+        invalidate_catalogue()
+    return drifted
+
+
+def _reserve_seat(activite_id):
+    """
+    Prend une place dans l'activité avec un seul UPDATE conditionnel :
+    UPDATE activity SET nb_inscriptions = nb_inscriptions + 1
+    WHERE id = ... AND nb_inscriptions < capacite
+    La base sérialise les écritures concurrentes sur la ligne, donc aucune
+    sur-réservation n'est possible, sur SQLite comme sur PostgreSQL/MySQL.
+    """
+    reserved = (
+        Activity.objects
+        .filter(pk=activite_id, nb_inscriptions__lt=F("capacite"))
+        .update(nb_inscriptions=F("nb_inscriptions") + 1, updated_at=timezone.now())
+    )
+    if not reserved:
+        if not Activity.objects.filter(pk=activite_id).exists():
+            raise ActivityNotFound()
+        raise ActivityFull()
+
+
+def enroll_member(membre_id, activite_id):
+    """
+    Inscrit un membre à une activité sans risque de dépasser la capacité.
+    La place est réservée puis l'inscription insérée dans la même
+    transaction : toute erreur (doublon, activité pleine) annule les deux.
+    """
+    # Les clés étrangères SQLite sont vérifiées au COMMIT : on valide le membre avant
+    if not Member.objects.filter(pk=membre_id).exists():
+        raise MemberNotFound()
+
+    with transaction.atomic():
+        _reserve_seat(activite_id)
+        enrollment = Enrollment(membre_id=membre_id, activite_id=activite_id)
+        # la place est déjà comptée : le signal post_save ne doit pas ré-incrémenter
+        enrollment._seat_reserved = True
+        try:
+            enrollment.save()
+        except IntegrityError:
+            raise AlreadyEnrolled()
+    return enrollment
+
+
+def update_enrollment(enrollment, membre_id=None, activite_id=None):
+    """
+    Change le membre et/ou l'activité d'une inscription existante.
+    Un changement d'activité réserve une place dans la nouvelle de façon atomique.
+    """
+    if membre_id is not None and not Member.objects.filter(pk=membre_id).exists():
+        raise MemberNotFound()
+
+    with transaction.atomic():
+        if membre_id is not None:
+            enrollment.membre_id = membre_id
+        if activite_id is not None and int(activite_id) != enrollment.activite_id:
+            _reserve_seat(activite_id)
+            enrollment.activite_id = int(activite_id)
+            enrollment._seat_reserved = True
+        try:
+            enrollment.save()
+        except IntegrityError:
+            raise AlreadyEnrolled()
+    return enrollment
+
+
+BULK_CREATED = "created"
+BULK_DUPLICATE = "duplicate"
+BULK_FULL = "full"
+BULK_NOT_FOUND = "not_found"
+
+
+def bulk_enroll(pairs, batch_size=500):
+    """
+    Inscrit en masse des couples (membre_id, activite_id).
+
+    Membres et activités sont validés par lookups ensemblistes (in_bulk), les
+    doublons par une seule requête, la capacité est vérifiée une fois par
+    activité, puis tout est inséré avec bulk_create dans une transaction.
+    Retourne un résultat par couple, dans l'ordre reçu :
+    {"membre_id", "activite_id", "status", "id"}.
+    """
+    pairs = [(int(m), int(a)) for m, a in pairs]
+    member_ids = {m for m, _ in pairs}
+    activity_ids = {a for _, a in pairs}
+    results = [{"membre_id": m, "activite_id": a, "status": None, "id": None} for m, a in pairs]
+
+    with transaction.atomic():
+        members = Member.objects.only("id").in_bulk(member_ids)
+        # verrouille les activités concernées pendant le calcul des places
+        activities = Activity.objects.select_for_update().in_bulk(activity_ids)
+        existing = set(
+            Enrollment.objects
+            .filter(membre_id__in=member_ids, activite_id__in=activity_ids)
+            .values_list("membre_id", "activite_id")
+        )
+        free_seats = {a.id: a.capacite - a.nb_inscriptions for a in activities.values()}
+
+        to_create = []
+        for result, pair in zip(results, pairs):
+            membre_id, activite_id = pair
+            if membre_id not in members or activite_id not in activities:
+                result["status"] = BULK_NOT_FOUND
+            elif pair in existing:
+                result["status"] = BULK_DUPLICATE
+            elif free_seats[activite_id] <= 0:
+                result["status"] = BULK_FULL
+            else:
+                result["status"] = BULK_CREATED
+                existing.add(pair)
+                free_seats[activite_id] -= 1
+                to_create.append((result, Enrollment(membre_id=membre_id, activite_id=activite_id)))
+
+        created = Enrollment.objects.bulk_create([e for _, e in to_create], batch_size=batch_size)
+        for (result, _), enrollment in zip(to_create, created):
+            result["id"] = enrollment.pk
+        record_bulk_created(created, "date_inscription", record_new_enrollments)
+
+        # bulk_create n'envoie pas de signaux : un UPDATE du compteur par activité
+        per_activity = {}
+        for _, enrollment in to_create:
+            per_activity[enrollment.activite_id] = per_activity.get(enrollment.activite_id, 0) + 1
+        for activite_id, n in per_activity.items():
+            Activity.objects.filter(pk=activite_id).update(
+                nb_inscriptions=F("nb_inscriptions") + n, updated_at=timezone.now()
+            )
+        if per_activity:
+            transaction.on_commit(invalidate_catalogue)
+            # bulk_create n'envoie pas de signaux : le cube est rechargé à la prochaine lecture
+            transaction.on_commit(analytics_cube.invalidate)
+
+    return results
@@ -0,0 +1,164 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from club.models import Member, Enrollment, Subscription
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ("csv", "ndjson")
+
+
+class ExportError(ValueError):
+    """Paramètre de filtre invalide pour un export."""
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise ExportError(f"Invalid {name} format. Use YYYY-MM-DD")
+
+
+def _parse_bool(value):
+    # "true" / "false" seulement : toute autre valeur est une erreur, pas un filtre sur False
+    value = value.lower()
+    if value not in ("true", "false"):
+        raise ValueError(value)
+    return value == "true"
+
+
+# Pour chaque jeu de données : colonnes (en-tête, champ ORM), champ date des
+# filtres date_from / date_to, et filtres simples (paramètre -> (champ, conversion))
+DATASETS = {
+    "members": {
+        "model": Member,
+        "columns": [
+            ("id", "id"),
+            ("nom", "nom"),
+            ("prenom", "prenom"),
+            ("age", "age"),
+            ("telephone", "telephone"),
+            ("email", "email"),
+            ("actif", "actif"),
+            ("date_inscription", "date_inscription"),
+        ],
+        "date_field": "date_inscription",
+        "filters": {
+            "actif": ("actif", _parse_bool),
+        },
+    },
+    "enrollments": {
+        "model": Enrollment,
+        "columns": [
+            ("id", "id"),
+            ("membre_id", "membre_id"),
+            ("membre_nom", "membre__nom"),
+            ("membre_prenom", "membre__prenom"),
+            ("activite_id", "activite_id"),
+            ("activite_code", "activite__code_act"),
+            ("activite_nom", "activite__nom_act"),
+            ("date_inscription", "date_inscription"),
+        ],
+        "date_field": "date_inscription",
+        "filters": {
+            "member_id": ("membre_id", int),
+            "activite_id": ("activite_id", int),
+        },
+    },
+    "subscriptions": {
+        "model": Subscription,
+        "columns": [
+            ("id", "id"),
+            ("membre_id", "membre_id"),
+            ("membre_nom", "membre__nom"),
+            ("membre_prenom", "membre__prenom"),
+            ("type_abonnement", "type_abonnement"),
+            ("date_debut", "date_debut"),
+            ("date_fin", "date_fin"),
+            ("actif", "actif"),
+        ],
+        "date_field": "date_debut",
+        "filters": {
+            "member_id": ("membre_id", int),
+            "actif": ("actif", _parse_bool),
+        },
+    },
+}
+
+
+def export_rows(dataset, params):
+    """
+    Retourne (en-tête, itérateur de tuples) pour un jeu de données filtré.
+    Les lignes sont lues avec values_list(...).iterator() : mémoire constante.
+    `params` est un dict-like (request.GET ou options de la commande).
+    """
+    spec = DATASETS[dataset]
+    queryset = spec["model"].objects.all()
+
+    for param, (field, convert) in spec["filters"].items():
+        value = params.get(param)
+        if value not in (None, ""):
+            try:
+                queryset = queryset.filter(**{field: convert(value)})
+            except ValueError:
+                raise ExportError(f"Invalid {param}")
+
+    date_from = params.get("date_from")
+    if date_from:
+        queryset = queryset.filter(**{f"{spec['date_field']}__gte": _parse_date(date_from, "date_from")})
+    date_to = params.get("date_to")
+    if date_to:
+        queryset = queryset.filter(**{f"{spec['date_field']}__lte": _parse_date(date_to, "date_to")})
+
+    header = [name for name, _ in spec["columns"]]
+    rows = (
+        queryset
+        .order_by("id")
+        .values_list(*[field for _, field in spec["columns"]])
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    return header, rows
+
+
+def iter_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(header, rows):
+    encoder = DjangoJSONEncoder()
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(dict(zip(header, row))))
+        if len(batch) >= EXPORT_CHUNK_SIZE:
+            yield "\n".join(batch) + "\n"
+            batch = []
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+
+def iter_export(dataset, params, fmt):
+    header, rows = export_rows(dataset, params)
+    if fmt == "ndjson":
+        return iter_ndjson(header, rows)
+    return iter_csv(header, rows)
+
+
+def gzip_chunks(chunks):
+    # Compression gzip à la volée, morceau par morceau
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,204 @@
+import csv
+import json
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from club.models import Member
+from club.services.cube import analytics_cube
+from club.services.rollups import record_bulk_created, record_new_members
+
+
+IMPORT_BATCH_SIZE = 1000
+# Au-delà, on compte les erreurs sans les détailler dans le rapport
+MAX_REPORTED_ERRORS = 1000
+IMPORT_FORMATS = ("csv", "ndjson")
+
+TRUE_VALUES = {"1", "true", "yes", "oui", "vrai"}
+FALSE_VALUES = {"0", "false", "no", "non", "faux"}
+
+
+def detect_format(filename, default="csv"):
+    # Le format se déduit de l'extension du fichier : .csv, .ndjson / .jsonl
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def _decode_lines(binary_stream, bad_lines):
+    """
+    Décode le fichier ligne par ligne : une ligne qui n'est pas de l'UTF-8
+    est remplacée (caractères U+FFFD) et son numéro noté dans `bad_lines`,
+    au lieu d'interrompre la lecture du reste du fichier.
+    """
+    for line_no, raw in enumerate(binary_stream, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError:
+            bad_lines.add(line_no)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def iter_rows(binary_stream, fmt):
+    """
+    Lit le fichier ligne par ligne (sans le charger en mémoire) et produit
+    des couples (numéro de ligne, dict | erreur de parsing).
+    """
+    bad_lines = set()
+    text = _decode_lines(binary_stream, bad_lines)
+    encoding_error = ValueError("invalid UTF-8")
+    if fmt == "ndjson":
+        for line_no, line in enumerate(text, start=1):
+            if line_no in bad_lines:
+                yield line_no, encoding_error
+                continue
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_no, ValueError("invalid JSON")
+                continue
+            yield line_no, row if isinstance(row, dict) else ValueError("expected a JSON object")
+    else:
+        reader = csv.DictReader(text)
+        # ligne 1 = en-tête ; une ligne CSV peut couvrir plusieurs lignes du fichier
+        last_line = 1
+        for line_no, row in enumerate(reader, start=2):
+            lines = range(last_line + 1, reader.line_num + 1)
+            last_line = reader.line_num
+            if 1 in bad_lines or any(n in bad_lines for n in lines):
+                yield line_no, encoding_error
+            else:
+                yield line_no, row
+
+
+def _parse_bool(value, default=True):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    value = str(value).strip().lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError
+
+
+class MemberRowValidator:
+    """
+    Valide les lignes d'import et construit les instances Member.
+    L'unicité des emails est vérifiée contre un ensemble chargé une seule
+    fois depuis la base, complété au fil de l'import.
+    """
+
+    def __init__(self):
+        self.telephone_validators = Member._meta.get_field("telephone").validators
+        self.known_emails = set(
+            Member.objects.exclude(email__isnull=True).values_list("email", flat=True).iterator()
+        )
+
+    def validate(self, row):
+        errors = {}
+        values = {}
+
+        for field in ("nom", "prenom"):
+            value = str(row.get(field) or "").strip()
+            if not value:
+                errors[field] = "required"
+            elif len(value) > 100:
+                errors[field] = "max 100 characters"
+            values[field] = value
+
+        try:
+            values["age"] = int(row.get("age"))
+            if values["age"] < 0:
+                errors["age"] = "must be positive"
+        except (TypeError, ValueError):
+            errors["age"] = "must be an integer"
+
+        telephone = str(row.get("telephone") or "").strip()
+        try:
+            for validator in self.telephone_validators:
+                validator(telephone)
+        except ValidationError as e:
+            errors["telephone"] = e.messages[0]
+        values["telephone"] = telephone
+
+        email = str(row.get("email") or "").strip() or None
+        if email is not None:
+            try:
+                validate_email(email)
+                if email in self.known_emails:
+                    errors["email"] = "already used"
+            except ValidationError:
+                errors["email"] = "invalid email"
+        values["email"] = email
+
+        try:
+            values["actif"] = _parse_bool(row.get("actif"))
+        except ValueError:
+            errors["actif"] = "must be a boolean"
+
+        if errors:
+            return None, errors
+        if email is not None:
+            self.known_emails.add(email)
+        return Member(**values), None
+
+
+def import_members(rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Importe des membres depuis un itérable de (numéro de ligne, ligne).
+    Les lignes valides sont insérées par paquets avec bulk_create, les lignes
+    invalides sont signalées sans interrompre l'import.
+    """
+    validator = MemberRowValidator()
+    report = {"rows": 0, "created": 0, "error_count": 0, "errors": []}
+    batch = []
+
+    def reject(line_no, errors):
+        report["error_count"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_no, "errors": errors})
+
+    def insert(members):
+        with transaction.atomic():
+            Member.objects.bulk_create(members)
+            record_bulk_created(members, "date_inscription", record_new_members)
+            transaction.on_commit(analytics_cube.invalidate)
+        report["created"] += len(members)
+
+    def flush():
+        try:
+            insert([member for _, member in batch])
+        except IntegrityError:
+            # un email inséré entre-temps par une autre requête : ligne par ligne,
+            # pour ne rejeter que les lignes en conflit
+            for line_no, member in batch:
+                member.pk = None
+                try:
+                    insert([member])
+                except IntegrityError:
+                    reject(line_no, {"email": "already used"})
+        batch.clear()
+
+    for line_no, row in rows:
+        report["rows"] += 1
+        if isinstance(row, Exception):
+            member, errors = None, {"line": str(row)}
+        else:
+            member, errors = validator.validate(row)
+        if errors:
+            reject(line_no, errors)
+            continue
+        batch.append((line_no, member))
+        if len(batch) >= batch_size:
+            flush()
+
+    if batch:
+        flush()
+    return report
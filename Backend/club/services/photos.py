@@ -0,0 +1,119 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+from club.models import Activity
+from club.services.catalogue import invalidate_catalogue
+
+
+logger = logging.getLogger(__name__)
+
+# Plus grand côté, en pixels (jamais d'agrandissement)
+PHOTO_SIZES = getattr(settings, "CLUB_PHOTO_SIZES", {"thumb": 160, "medium": 640, "full": 1600})
+PHOTO_FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}), "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+PHOTO_WORKERS = getattr(settings, "CLUB_PHOTO_WORKERS", 2)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=PHOTO_WORKERS, thread_name_prefix="photo")
+    return _executor
+
+
+def variant_name(source_name, size, fmt):
+    # activities/yoga.png -> activities/yoga_thumb.webp (à côté de l'original)
+    stem, _ = os.path.splitext(source_name)
+    return f"{stem}_{size}.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def generate_variants(source_name):
+    """
+    Génère toutes les tailles, en WebP et JPEG, pour une photo stockée.
+    Retourne {"thumb": {"webp": name, "jpeg": name}, ...}.
+    """
+    with default_storage.open(source_name, "rb") as f:
+        image = Image.open(f)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "L"):
+        # JPEG n'a pas de transparence : fond blanc
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+
+    sizes = {}
+    for size, max_side in PHOTO_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        sizes[size] = {}
+        for fmt, (pil_format, options) in PHOTO_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            name = variant_name(source_name, size, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            sizes[size][fmt] = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return sizes
+
+
+def process_activity_photo(activity_id):
+    """
+    Génère les miniatures d'une activité et les enregistre, seulement si la
+    photo n'a pas changé entre-temps (UPDATE conditionnel sur son nom).
+    """
+    source_name = Activity.objects.filter(pk=activity_id).values_list("photo", flat=True).first()
+    if not source_name:
+        return False
+    sizes = generate_variants(source_name)
+    updated = (
+        Activity.objects
+        .filter(pk=activity_id, photo=source_name)
+        .update(photo_variants={"source": source_name, "sizes": sizes}, updated_at=timezone.now())
+    )
+    if updated:
+        invalidate_catalogue()
+    return bool(updated)
+
+
+def _run_in_worker(activity_id):
+    try:
+        process_activity_photo(activity_id)
+    except Exception:
+        logger.exception("Photo variants failed for activity %s", activity_id)
+    finally:
+        # le thread du pool a sa propre connexion à la base
+        close_old_connections()
+
+
+def schedule_photo_variants(activity):
+    """
+    Planifie la génération des miniatures hors du cycle de la requête,
+    une fois la transaction validée.
+    """
+    if activity.photo:
+        activity_id = activity.pk
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, activity_id))
+
+
+def photo_urls(activity):
+    """
+    Carte {"thumb": {"webp": url, "jpeg": url}, "medium": ..., "full": ...}
+    ou None tant que les miniatures de la photo actuelle ne sont pas prêtes.
+    """
+    variants = activity.photo_variants or {}
+    if not activity.photo or variants.get("source") != activity.photo.name:
+        return None
+    return {
+        size: {fmt: default_storage.url(name) for fmt, name in formats.items()}
+        for size, formats in variants["sizes"].items()
+    }
@@ -0,0 +1,81 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from club.models import Member, Enrollment, Subscription, DailyStats, SubscriptionTypeStats
+
+
+def _increment(model, lookup, **deltas):
+    """
+    Ajoute `deltas` à la ligne d'agrégat identifiée par `lookup`, en la créant
+    au besoin. L'incrément est un UPDATE avec F-expressions (pas de lecture).
+    """
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # créée entre-temps par une écriture concurrente
+        model.objects.filter(**lookup).update(**updates)
+
+
+def record_new_members(day, count=1):
+    _increment(DailyStats, {"date": day}, new_members=count)
+
+
+def record_new_enrollments(day, count=1):
+    _increment(DailyStats, {"date": day}, new_enrollments=count)
+
+
+def record_removed_enrollments(per_day):
+    """
+    Retire en bloc {jour: nombre} des inscriptions du jour (suppressions en
+    cascade d'un membre) : les lignes existent, créées par l'inscription ;
+    un UPDATE par nombre distinct, pas par jour.
+    """
+    by_count = {}
+    for day, count in per_day.items():
+        by_count.setdefault(count, []).append(day)
+    for count, days in by_count.items():
+        DailyStats.objects.filter(date__in=days).update(new_enrollments=F("new_enrollments") - count)
+
+
+def record_active_subscriptions(type_abonnement, count=1):
+    _increment(SubscriptionTypeStats, {"type_abonnement": type_abonnement}, active_count=count)
+
+
+def record_bulk_created(objects, date_field, recorder):
+    # bulk_create n'envoie pas de signaux : un incrément par jour concerné
+    per_day = {}
+    for obj in objects:
+        day = getattr(obj, date_field)
+        per_day[day] = per_day.get(day, 0) + 1
+    for day, count in per_day.items():
+        recorder(day, count)
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """
+    Recalcule entièrement les tables d'agrégats à partir des tables sources.
+    Retourne le nombre de lignes (jours, types) écrites.
+    """
+    days = {}
+    for row in Member.objects.order_by().values("date_inscription").annotate(n=Count("id")):
+        days.setdefault(row["date_inscription"], DailyStats(date=row["date_inscription"])).new_members = row["n"]
+    for row in Enrollment.objects.order_by().values("date_inscription").annotate(n=Count("id")):
+        days.setdefault(row["date_inscription"], DailyStats(date=row["date_inscription"])).new_enrollments = row["n"]
+
+    types = [
+        SubscriptionTypeStats(type_abonnement=row["type_abonnement"], active_count=row["n"])
+        for row in (
+            Subscription.objects.filter(actif=True).order_by()
+            .values("type_abonnement").annotate(n=Count("id"))
+        )
+    ]
+
+    DailyStats.objects.all().delete()
+    SubscriptionTypeStats.objects.all().delete()
+    DailyStats.objects.bulk_create(days.values())
+    SubscriptionTypeStats.objects.bulk_create(types)
+    return len(days), len(types)
@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def club_jobs_enabled():
+    # tâches communes (balayage des abonnements, matérialisation) : un seul processus
+    return getattr(settings, "CLUB_SCHEDULER_ENABLED", False)
+
+
+class PeriodicScheduler:
+    """
+    Ordonnanceur minimal dans le processus : un thread démon qui lance chaque
+    tâche enregistrée toutes les `interval` secondes, tant que son `enabled()`
+    est vrai (lu à chaque passage, donc modifiable par override_settings).
+    Les tâches communes au club (CLUB_SCHEDULER_ENABLED) ne tournent que dans
+    le processus qui les active ; les tâches propres au processus (état en
+    mémoire) tournent dans chacun.
+    """
+
+    def __init__(self, tick=1.0):
+        self.tick = tick
+        self._tasks = []
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def add(self, name, interval, func, enabled=None, first_delay=10):
+        self._tasks.append({
+            "name": name, "interval": interval, "func": func, "enabled": enabled or club_jobs_enabled,
+            "next": time.monotonic() + first_delay,
+        })
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._start_lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="club-scheduler", daemon=True)
+            self._thread.start()
+
+    def start_on_request(self, **kwargs):
+        # receiver de request_started : démarre au premier appel utile, ensuite ne coûte qu'un test
+        if not self.running and any(task["enabled"]() for task in self._tasks):
+            self.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.tick):
+            now = time.monotonic()
+            for task in self._tasks:
+                if now >= task["next"]:
+                    task["next"] = now + task["interval"]
+                    if task["enabled"]():
+                        self._run(task)
+
+    def _run(self, task):
+        try:
+            task["func"]()
+        except Exception:
+            logger.exception("Scheduled task %s failed", task["name"])
+        finally:
+            # ce thread a sa propre connexion à la base
+            close_old_connections()
+
+
+scheduler = PeriodicScheduler()
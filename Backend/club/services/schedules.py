@@ -0,0 +1,247 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from club.models import Activity, ClassSchedule, ClassSession
+
+
+# Horizon glissant matérialisé en ClassSession (à partir d'aujourd'hui)
+SCHEDULE_HORIZON_DAYS = getattr(settings, "CLUB_SCHEDULE_HORIZON_DAYS", 28)
+# Fenêtre par défaut et maximale de /schedules/occurrences/
+OCCURRENCES_DEFAULT_DAYS = 7
+OCCURRENCES_MAX_DAYS = 366
+MATERIALIZE_BATCH_SIZE = 1000
+
+
+class ScheduleError(ValueError):
+    """Règle ou fenêtre invalide ; `status` est le code HTTP à renvoyer."""
+    status = 400
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value or "", "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ScheduleError(f"Invalid {name} format. Use YYYY-MM-DD")
+
+
+def _parse_time(value, name):
+    try:
+        return datetime.strptime(value or "", "%H:%M").time()
+    except (TypeError, ValueError):
+        raise ScheduleError(f"Invalid {name} format. Use HH:MM")
+
+
+def parse_activity_id(value):
+    """Identifiant d'activité (JSON ou paramètre d'URL) : entier positif, sinon ScheduleError."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)) or not (
+        str(value).isascii() and str(value).isdigit()
+    ):
+        raise ScheduleError("activite_id must be an integer")
+    return int(value)
+
+
+def apply_rule(schedule, data):
+    """
+    Recopie dans `schedule` les champs de règle présents dans `data` (JSON de
+    l'API), après validation. Lève ScheduleError si la règle est invalide.
+    """
+    if "activite_id" in data:
+        activite_id = parse_activity_id(data["activite_id"])
+        try:
+            schedule.activite = Activity.objects.get(id=activite_id)
+        except Activity.DoesNotExist:
+            raise ScheduleError("Activity not found")
+    if "jours" in data:
+        jours = data["jours"]
+        if not isinstance(jours, list) or not jours or any(
+            not isinstance(j, int) or isinstance(j, bool) or not 0 <= j <= 6 for j in jours
+        ):
+            raise ScheduleError("jours must be a non-empty list of weekdays (0 = Monday ... 6 = Sunday)")
+        schedule.jours = sorted(set(jours))
+    if "intervalle" in data:
+        intervalle = data["intervalle"]
+        if not isinstance(intervalle, int) or isinstance(intervalle, bool) or not 1 <= intervalle <= 52:
+            raise ScheduleError("intervalle must be a number of weeks between 1 and 52")
+        schedule.intervalle = intervalle
+    for name in ("heure_debut", "heure_fin"):
+        if name in data:
+            setattr(schedule, name, _parse_time(data[name], name))
+    if "date_debut" in data:
+        schedule.date_debut = _parse_date(data["date_debut"], "date_debut")
+    if "date_fin" in data:
+        schedule.date_fin = _parse_date(data["date_fin"], "date_fin") if data["date_fin"] else None
+    if "exceptions" in data:
+        if not isinstance(data["exceptions"], list):
+            raise ScheduleError("exceptions must be a list of dates (YYYY-MM-DD)")
+        schedule.exceptions = sorted({_parse_date(d, "exceptions").isoformat() for d in data["exceptions"]})
+
+    if schedule.heure_fin <= schedule.heure_debut:
+        raise ScheduleError("heure_fin must be after heure_debut")
+    if schedule.date_fin and schedule.date_fin < schedule.date_debut:
+        raise ScheduleError("date_fin must be after date_debut")
+    return schedule
+
+
+def parse_window(params, default_days=OCCURRENCES_DEFAULT_DAYS):
+    """date_from / date_to (inclusifs) ; par défaut les `default_days` prochains jours."""
+    date_from = _parse_date(params["date_from"], "date_from") if params.get("date_from") else timezone.localdate()
+    date_to = (
+        _parse_date(params["date_to"], "date_to") if params.get("date_to")
+        else date_from + timedelta(days=default_days - 1)
+    )
+    if date_from > date_to:
+        raise ScheduleError("date_from must be before date_to")
+    if (date_to - date_from).days >= OCCURRENCES_MAX_DAYS:
+        raise ScheduleError(f"Window too large (max {OCCURRENCES_MAX_DAYS} days)")
+    return date_from, date_to
+
+
+def occurrence_dates(schedule, date_from, date_to):
+    """
+    Dates des occurrences de `schedule` entre date_from et date_to (inclusifs),
+    générées à la demande. On saute directement à la première semaine active
+    de la fenêtre : le coût dépend de la fenêtre, pas de l'ancienneté du planning.
+    """
+    first = max(date_from, schedule.date_debut)
+    last = min(date_to, schedule.date_fin) if schedule.date_fin else date_to
+    if first > last:
+        return
+    # semaines comptées à partir du lundi de la semaine de date_debut
+    anchor = schedule.date_debut - timedelta(days=schedule.date_debut.weekday())
+    week = (first - anchor).days // 7
+    week += -week % schedule.intervalle
+    excluded = set(schedule.exceptions)
+    while True:
+        monday = anchor + timedelta(weeks=week)
+        if monday > last:
+            return
+        for jour in schedule.jours:
+            day = monday + timedelta(days=jour)
+            if first <= day <= last and day.isoformat() not in excluded:
+                yield day
+        week += schedule.intervalle
+
+
+def is_occurrence(schedule, day):
+    return any(True for _ in occurrence_dates(schedule, day, day))
+
+
+def _for_activities(queryset, activity_id=None, activity_ids=None):
+    if activity_id:
+        queryset = queryset.filter(activite_id=activity_id)
+    if activity_ids is not None:
+        queryset = queryset.filter(activite_id__in=activity_ids)
+    return queryset
+
+
+def _schedules_in_window(date_from, date_to, activity_id=None, activity_ids=None):
+    schedules = ClassSchedule.objects.filter(
+        Q(date_fin__isnull=True) | Q(date_fin__gte=date_from), date_debut__lte=date_to
+    )
+    return _for_activities(schedules, activity_id, activity_ids)
+
+
+def occurrences(date_from, date_to, activity_id=None, activity_ids=None):
+    """
+    Séances de la fenêtre, triées par (date, heure_debut) : les ClassSession
+    existantes, complétées par les occurrences des plannings qui ne sont pas
+    (encore) matérialisées. Deux requêtes bornées à la fenêtre, et aux
+    activités `activity_id` / `activity_ids` si elles sont données.
+
+    Chaque élément : {"id": id de ClassSession ou None, "schedule_id",
+    "activite": Activity, "date", "heure_debut", "heure_fin"}.
+    """
+    sessions = _for_activities(
+        ClassSession.objects.select_related("activite").filter(date__gte=date_from, date__lte=date_to),
+        activity_id, activity_ids,
+    )
+    items = [
+        {
+            "id": s.id, "schedule_id": s.schedule_id, "activite": s.activite,
+            "date": s.date, "heure_debut": s.heure_debut, "heure_fin": s.heure_fin,
+        }
+        for s in sessions
+    ]
+    taken = {(item["activite"].id, item["date"], item["heure_debut"]) for item in items}
+
+    for schedule in _schedules_in_window(date_from, date_to, activity_id, activity_ids).select_related("activite"):
+        for day in occurrence_dates(schedule, date_from, date_to):
+            if (schedule.activite_id, day, schedule.heure_debut) in taken:
+                continue
+            items.append({
+                "id": None, "schedule_id": schedule.id, "activite": schedule.activite,
+                "date": day, "heure_debut": schedule.heure_debut, "heure_fin": schedule.heure_fin,
+            })
+    items.sort(key=lambda item: (item["date"], item["heure_debut"], item["activite"].id))
+    return items
+
+
+def _session(schedule, day):
+    return ClassSession(
+        activite_id=schedule.activite_id, schedule=schedule, date=day,
+        heure_debut=schedule.heure_debut, heure_fin=schedule.heure_fin,
+    )
+
+
+def materialize(date_from, date_to, schedules=None):
+    """
+    Crée les ClassSession des occurrences de la fenêtre (bulk_create ; une
+    séance déjà présente au même créneau est conservée grâce à la contrainte
+    d'unicité activite/date/heure_debut). Idempotent.
+    Retourne le nombre de séances créées.
+    """
+    if schedules is None:
+        schedules = _schedules_in_window(date_from, date_to)
+    window = ClassSession.objects.filter(date__gte=date_from, date__lte=date_to)
+    with transaction.atomic():
+        before = window.count()
+        ClassSession.objects.bulk_create(
+            (_session(schedule, day) for schedule in schedules for day in occurrence_dates(schedule, date_from, date_to)),
+            batch_size=MATERIALIZE_BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        return window.count() - before
+
+
+def materialize_horizon(today=None, days=SCHEDULE_HORIZON_DAYS):
+    """Matérialise l'horizon glissant [aujourd'hui, aujourd'hui + days[ (tâche planifiée)."""
+    today = today or timezone.localdate()
+    return materialize(today, today + timedelta(days=days - 1))
+
+
+def materialize_occurrence(schedule, day):
+    """
+    Séance d'une occurrence, créée si besoin : à appeler avant d'y rattacher
+    quelque chose. Retourne (session, created) ; ScheduleError si `day` n'est
+    pas une occurrence du planning.
+    """
+    if not is_occurrence(schedule, day):
+        raise ScheduleError(f"{day.isoformat()} is not an occurrence of this schedule")
+    return ClassSession.objects.get_or_create(
+        activite_id=schedule.activite_id, date=day, heure_debut=schedule.heure_debut,
+        defaults={"schedule": schedule, "heure_fin": schedule.heure_fin},
+    )
+
+
+def release_future_sessions(schedule, today=None):
+    """
+    Supprime les séances futures matérialisées depuis `schedule`, avant de
+    modifier ou supprimer la règle ; les séances passées restent, ainsi que
+    celles qui ont déjà des présences.
+    """
+    today = today or timezone.localdate()
+    return (
+        ClassSession.objects
+        .filter(schedule=schedule, date__gte=today, attendances__isnull=True)
+        .delete()[0]
+    )
+
+
+def resync_schedule(schedule, today=None, days=SCHEDULE_HORIZON_DAYS):
+    """Après création ou modification d'une règle : reconstruit son horizon."""
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        release_future_sessions(schedule, today)
+        return materialize(today, today + timedelta(days=days - 1), [schedule])
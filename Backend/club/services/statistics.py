@@ -1,32 +1,35 @@
-from django.db.models import Count
-from club.models import Member, Activity, Enrollment
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Case, Count, F, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+from club.models import Activity, Enrollment, Subscription, DailyStats
 
 
-def total_members():
-    # Retourne simplement le nombre total de membres inscrits dans le club
-    return Member.objects.count()
+logger = logging.getLogger(__name__)
+
+# Durée pendant laquelle un instantané est servi tel quel, puis durée pendant
+# laquelle il est encore servi (périmé) pendant qu'on le recalcule en arrière-plan
+STATS_CACHE_TTL = getattr(settings, "CLUB_STATS_CACHE_TTL", 30)
+STATS_STALE_TTL = getattr(settings, "CLUB_STATS_STALE_TTL", 300)
+_LOCK_TIMEOUT = 60
+
+# Tranches d'âge des répartitions : bornes inférieures (hors première tranche)
+AGE_BAND_EDGES = (18, 26, 36, 51, 65)
+AGE_BAND_LABELS = ("<18", "18-25", "26-35", "36-50", "51-64", "65+")
+SUBSCRIPTION_TYPES = tuple(code for code, _ in Subscription.TYPE_CHOICES)
+_refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stats")
 
 
 def activities_with_counts():
     """
-    Pour chaque activité, on calcule le nombre d'inscriptions.
-    Django fait automatiquement les jointures SQL.
+    Pour chaque activité, le nombre d'inscriptions.
+    On lit le compteur dénormalisé Activity.nb_inscriptions : pas de GROUP BY.
     """
-    return (
-        Activity.objects
-        .annotate(nb_inscriptions=Count("enrollment"))
-        .order_by("-nb_inscriptions")
-    )
-
-
-def most_popular_activity():
-    # L'activité la plus populaire est celle avec le plus d'inscriptions
-    return activities_with_counts().first()
-
-
-def least_popular_activity():
-    # L'activité la moins populaire est celle avec le moins d'inscriptions
-    return activities_with_counts().last()
+    return Activity.objects.order_by("-nb_inscriptions")
 
 
 def members_per_activity():
@@ -62,3 +65,205 @@ def members_per_activity():
         })
 
     return result
+
+
+def activity_members(activity_id):
+    """
+    Membres inscrits à une activité, une ligne par inscription (clé "id"
+    de l'inscription, pour la pagination par curseur).
+    """
+    return (
+        Enrollment.objects
+        .filter(activite_id=activity_id)
+        .values("id", "membre_id", "membre__nom", "membre__prenom")
+    )
+
+
+def members_per_activity_summary(first=5):
+    """
+    Résumé par activité : nombre d'inscrits (compteur dénormalisé) et les
+    `first` premiers membres inscrits, classés en base avec ROW_NUMBER()
+    partitionné par activité. Deux requêtes quel que soit le volume.
+    """
+    ranked = (
+        Enrollment.objects
+        .annotate(rang=Window(RowNumber(), partition_by=[F("activite_id")], order_by=F("id").asc()))
+        .filter(rang__lte=first)
+        .order_by("activite_id", "rang")
+        .values("activite_id", "membre_id", "membre__nom", "membre__prenom")
+    )
+    firsts = {}
+    for row in ranked:
+        firsts.setdefault(row["activite_id"], []).append({
+            "id": row["membre_id"],
+            "nom": row["membre__nom"],
+            "prenom": row["membre__prenom"],
+        })
+
+    return [
+        {
+            "activity_id": act["id"],
+            "nom_act": act["nom_act"],
+            "count": act["nb_inscriptions"],
+            "members": firsts.get(act["id"], []),
+        }
+        for act in Activity.objects.order_by("nom_act", "id").values("id", "nom_act", "nb_inscriptions")
+    ]
+
+
+# Répartitions du tableau de bord (chemin ORM ; club.services.cube sert les
+# mêmes résultats depuis la mémoire). Filtres communs : actif (membre),
+# type_abonnement (abonnement actif du membre), activity (id d'activité).
+def _filtered_enrollments(actif=None, type_abonnement=None, activity=None):
+    enrollments = Enrollment.objects.order_by()
+    if actif is not None:
+        enrollments = enrollments.filter(membre__actif=actif)
+    if type_abonnement is not None:
+        enrollments = enrollments.filter(
+            membre__subscription__type_abonnement=type_abonnement, membre__subscription__actif=True
+        )
+    if activity is not None:
+        enrollments = enrollments.filter(activite_id=activity)
+    return enrollments
+
+
+def age_distribution_per_activity(actif=None, type_abonnement=None, activity=None):
+    """
+    Nombre d'inscrits par tranche d'âge, pour chaque activité (ordre des id).
+    """
+    band = Case(
+        *[When(membre__age__lt=edge, then=Value(i)) for i, edge in enumerate(AGE_BAND_EDGES)],
+        default=Value(len(AGE_BAND_EDGES)),
+    )
+    counts = {}
+    rows = (
+        _filtered_enrollments(actif, type_abonnement, activity)
+        .annotate(band=band)
+        .values("activite_id", "band")
+        .annotate(n=Count("id"))
+    )
+    for row in rows:
+        counts[(row["activite_id"], row["band"])] = row["n"]
+
+    activities = Activity.objects.order_by("id")
+    if activity is not None:
+        activities = activities.filter(id=activity)
+    return [
+        {
+            "activity_id": act_id,
+            "nom_act": nom_act,
+            "bands": {label: counts.get((act_id, i), 0) for i, label in enumerate(AGE_BAND_LABELS)},
+        }
+        for act_id, nom_act in activities.values_list("id", "nom_act")
+    ]
+
+
+def revenue_per_subscription_type(actif=None, type_abonnement=None, activity=None):
+    """
+    Inscriptions et revenu mensuel (somme des tarifs des activités suivies)
+    par type d'abonnement actif du membre ; None = sans abonnement actif.
+    """
+    sub_type = Case(
+        When(membre__subscription__actif=True, then=F("membre__subscription__type_abonnement")),
+        default=Value(None),
+    )
+    rows = (
+        _filtered_enrollments(actif, type_abonnement, activity)
+        .annotate(sub_type=sub_type)
+        .values("sub_type")
+        .annotate(n=Count("id"), revenue=Sum("activite__tarif_mensuel"))
+    )
+    totals = {row["sub_type"]: (row["n"], row["revenue"] or 0.0) for row in rows}
+    return [
+        {
+            "type_abonnement": code,
+            "enrollments": totals.get(code, (0, 0.0))[0],
+            "revenue": round(totals.get(code, (0, 0.0))[1], 2),
+        }
+        for code in (None,) + SUBSCRIPTION_TYPES
+    ]
+
+
+BREAKDOWNS = {
+    "age_per_activity": age_distribution_per_activity,
+    "revenue_per_subscription_type": revenue_per_subscription_type,
+}
+
+
+def compute_overview():
+    """
+    Calcule les chiffres de la vue d'ensemble : le nombre total de membres lu
+    dans les agrégats journaliers (DailyStats), puis l'activité la plus et la
+    moins suivie par deux requêtes LIMIT 1 sur l'index de nb_inscriptions
+    (coût indépendant du nombre d'activités).
+    """
+    total = DailyStats.objects.aggregate(n=Sum("new_members"))["n"]
+    fields = ("nom_act", "nb_inscriptions")
+    most = Activity.objects.order_by("-nb_inscriptions", "id").values_list(*fields).first()
+    least = Activity.objects.order_by("nb_inscriptions", "-id").values_list(*fields).first() if most else None
+
+    return {
+        "total_members": total or 0,
+        "most_popular_activity": {"nom": most[0], "inscriptions": most[1]} if most else None,
+        "least_popular_activity": {"nom": least[0], "inscriptions": least[1]} if least else None,
+    }
+
+
+class SnapshotCache:
+    """
+    Instantané mis en cache avec TTL et "stale-while-revalidate".
+
+    - frais (âge < ttl) : servi directement ;
+    - périmé (âge < ttl + stale_ttl) : servi directement, et un seul
+      recalcul est lancé en arrière-plan (verrou via cache.add) ;
+    - absent : un seul appelant recalcule, les autres attendent son résultat.
+    """
+
+    def __init__(self, key, compute, ttl=STATS_CACHE_TTL, stale_ttl=STATS_STALE_TTL):
+        self.key = key
+        self.lock_key = f"{key}:lock"
+        self.compute = compute
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def _refresh(self):
+        try:
+            snapshot = {"data": self.compute(), "computed_at": time.time()}
+            cache.set(self.key, snapshot, self.ttl + self.stale_ttl)
+            return snapshot
+        finally:
+            cache.delete(self.lock_key)
+
+    def _refresh_in_background(self):
+        try:
+            self._refresh()
+        except Exception:
+            logger.exception("Statistics refresh failed for %s", self.key)
+        finally:
+            close_old_connections()
+
+    def get(self, wait=5.0):
+        """Retourne {"data": ..., "computed_at": timestamp}."""
+        snapshot = cache.get(self.key)
+        if snapshot is not None:
+            if time.time() - snapshot["computed_at"] >= self.ttl and cache.add(self.lock_key, 1, _LOCK_TIMEOUT):
+                _refresh_pool.submit(self._refresh_in_background)
+            return snapshot
+
+        if cache.add(self.lock_key, 1, _LOCK_TIMEOUT):
+            return self._refresh()
+
+        # Un autre worker calcule déjà : on attend son résultat
+        deadline = time.time() + wait
+        while time.time() < deadline:
+            time.sleep(0.05)
+            snapshot = cache.get(self.key)
+            if snapshot is not None:
+                return snapshot
+        return {"data": self.compute(), "computed_at": time.time()}
+
+    def invalidate(self):
+        cache.delete(self.key)
+
+
+overview_snapshot = SnapshotCache("club:stats:overview", compute_overview)
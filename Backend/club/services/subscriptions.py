@@ -0,0 +1,271 @@
+import logging
+from datetime import date, datetime, timedelta
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from club.models import Member, Subscription, SUBSCRIPTION_DURATIONS, subscription_end
+from club.services.cube import analytics_cube
+from club.services.rollups import record_active_subscriptions
+from club.services.timeseries import invalidate_timeseries
+
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_BATCH_SIZE = 1000
+
+BULK_CREATED = "created"
+BULK_RENEWED = "renewed"
+BULK_ALREADY_SUBSCRIBED = "already_subscribed"
+BULK_NO_SUBSCRIPTION = "no_subscription"
+BULK_DUPLICATE = "duplicate"
+BULK_NOT_FOUND = "not_found"
+BULK_INVALID = "invalid"
+
+EXPIRING_DEFAULT_DAYS = 30
+EXPIRING_MAX_DAYS = 366
+# Colonnes de l'export CSV (publipostage) : (en-tête, champ ORM)
+EXPIRING_COLUMNS = [
+    ("id", "id"),
+    ("membre_id", "membre_id"),
+    ("nom", "membre__nom"),
+    ("prenom", "membre__prenom"),
+    ("email", "membre__email"),
+    ("telephone", "membre__telephone"),
+    ("type_abonnement", "type_abonnement"),
+    ("date_debut", "date_debut"),
+    ("date_fin", "date_fin"),
+]
+
+
+def expire_subscriptions(today=None):
+    """
+    Désactive les abonnements dont la date de fin est passée : un seul UPDATE
+    (date_fin < aujourd'hui AND actif), servi par l'index (actif, date_fin).
+
+    L'UPDATE ne passe pas par les signaux : les agrégats par type
+    (SubscriptionTypeStats) sont corrigés d'après un décompte fait dans la
+    même transaction, et le cube d'analyse est rechargé.
+    Retourne le nombre d'abonnements désactivés.
+    """
+    today = today or timezone.localdate()
+    expired = Subscription.objects.filter(actif=True, date_fin__lt=today)
+    with transaction.atomic():
+        per_type = dict(
+            expired.order_by().values_list("type_abonnement").annotate(n=Count("id"))
+        )
+        count = expired.update(actif=False, updated_at=timezone.now())
+        for type_abonnement, n in per_type.items():
+            record_active_subscriptions(type_abonnement, -n)
+        if count:
+            transaction.on_commit(analytics_cube.invalidate)
+
+    logger.info(
+        "Expired %d subscription(s) ending before %s", count, today,
+        extra={"expired_subscriptions": count, "per_type": per_type},
+    )
+    return count
+
+
+def expiring_subscriptions(within_days, today=None):
+    """
+    Abonnements actifs qui se terminent dans les `within_days` prochains jours
+    (aujourd'hui inclus), avec leur membre (une seule jointure).
+    Servi par l'index (date_fin, id), déjà trié : trier par ("date_fin", "id").
+    """
+    today = today or timezone.localdate()
+    return (
+        Subscription.objects
+        .select_related("membre")
+        .filter(actif=True, date_fin__gte=today, date_fin__lte=today + timedelta(days=within_days))
+    )
+
+
+def _parse_date(value):
+    if value is None or value == "" or isinstance(value, date):
+        return value or None
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def _end_dates(keys):
+    """
+    date_fin de tout un lot : une seule évaluation par couple distinct
+    (date_debut, type_abonnement), via la table de durées partagée.
+    """
+    return {key: subscription_end(*key) for key in set(keys)}
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _after_bulk_write(per_type):
+    # bulk_create / bulk_update n'envoient pas de signaux
+    for type_abonnement, n in per_type.items():
+        if n:
+            record_active_subscriptions(type_abonnement, n)
+    transaction.on_commit(invalidate_timeseries)
+    transaction.on_commit(analytics_cube.invalidate)
+
+
+def bulk_create_subscriptions(items, batch_size=SUBSCRIPTION_BATCH_SIZE):
+    """
+    Crée en masse des abonnements {"membre_id", "type_abonnement", "date_debut"}.
+
+    Les membres inconnus et ceux qui ont déjà un abonnement (OneToOne) sont
+    écartés par deux lookups ensemblistes, date_fin est calculée pour tout le
+    lot, puis l'insertion se fait par paquets avec bulk_create.
+    Retourne un résultat par élément, dans l'ordre reçu :
+    {"membre_id", "status", "id", "date_fin"}.
+    """
+    results = []
+    valid = []
+    for item in items:
+        result = {"membre_id": item.get("membre_id"), "status": None, "id": None, "date_fin": None}
+        results.append(result)
+        try:
+            membre_id = int(item["membre_id"])
+            date_debut = _parse_date(item["date_debut"])
+            type_abonnement = item["type_abonnement"]
+            if date_debut is None or type_abonnement not in SUBSCRIPTION_DURATIONS:
+                raise ValueError
+        except (KeyError, TypeError, ValueError):
+            result["status"] = BULK_INVALID
+            continue
+        result["membre_id"] = membre_id
+        valid.append((result, membre_id, type_abonnement, date_debut))
+
+    member_ids = {membre_id for _, membre_id, _, _ in valid}
+    ends = _end_dates((date_debut, type_abonnement) for _, _, type_abonnement, date_debut in valid)
+
+    with transaction.atomic():
+        # lookups par paquets : une rentrée de saison dépasserait la limite de variables de SQLite
+        known, subscribed = set(), set()
+        for chunk in _chunks(sorted(member_ids), batch_size):
+            known.update(Member.objects.filter(id__in=chunk).values_list("id", flat=True))
+            subscribed.update(Subscription.objects.filter(membre_id__in=chunk).values_list("membre_id", flat=True))
+
+        to_create = []
+        for result, membre_id, type_abonnement, date_debut in valid:
+            if membre_id not in known:
+                result["status"] = BULK_NOT_FOUND
+            elif membre_id in subscribed:
+                result["status"] = BULK_ALREADY_SUBSCRIBED
+            else:
+                subscribed.add(membre_id)
+                result["status"] = BULK_CREATED
+                result["date_fin"] = ends[(date_debut, type_abonnement)]
+                to_create.append((result, Subscription(
+                    membre_id=membre_id,
+                    type_abonnement=type_abonnement,
+                    date_debut=date_debut,
+                    date_fin=result["date_fin"],
+                    actif=True,
+                )))
+
+        per_type = {}
+        for chunk in _chunks(to_create, batch_size):
+            created = Subscription.objects.bulk_create([sub for _, sub in chunk])
+            for (result, _), sub in zip(chunk, created):
+                result["id"] = sub.pk
+                per_type[sub.type_abonnement] = per_type.get(sub.type_abonnement, 0) + 1
+        if to_create:
+            _after_bulk_write(per_type)
+
+    return results
+
+
+def bulk_renew_subscriptions(items, batch_size=SUBSCRIPTION_BATCH_SIZE, today=None):
+    """
+    Renouvelle en masse des abonnements existants, identifiés par membre :
+    {"membre_id", "type_abonnement" (optionnel, sinon inchangé),
+    "date_debut" (optionnel, sinon la fin de l'abonnement actuel, ou
+    aujourd'hui s'il est déjà terminé)}. Les abonnements renouvelés
+    redeviennent actifs. Résultats : {"membre_id", "status", "id", "date_fin"}.
+
+    Les lignes qui reçoivent les mêmes valeurs (même type, mêmes dates) sont
+    mises à jour ensemble : un UPDATE ... WHERE id IN (...) par paquet.
+    """
+    today = today or timezone.localdate()
+    results = []
+    valid = []
+    for item in items:
+        result = {"membre_id": item.get("membre_id"), "status": None, "id": None, "date_fin": None}
+        results.append(result)
+        try:
+            membre_id = int(item["membre_id"])
+            date_debut = _parse_date(item.get("date_debut"))
+            type_abonnement = item.get("type_abonnement")
+            if type_abonnement is not None and type_abonnement not in SUBSCRIPTION_DURATIONS:
+                raise ValueError
+        except (KeyError, TypeError, ValueError):
+            result["status"] = BULK_INVALID
+            continue
+        result["membre_id"] = membre_id
+        valid.append((result, membre_id, type_abonnement, date_debut))
+
+    with transaction.atomic():
+        current = {}
+        for chunk in _chunks(sorted({membre_id for _, membre_id, _, _ in valid}), batch_size):
+            current.update(
+                (membre_id, (pk, type_abonnement, date_fin, actif))
+                for pk, membre_id, type_abonnement, date_fin, actif in (
+                    Subscription.objects.select_for_update()
+                    .filter(membre_id__in=chunk)
+                    .values_list("id", "membre_id", "type_abonnement", "date_fin", "actif")
+                )
+            )
+
+        per_type = {}
+        groups = {}
+        renewed = set()
+        for result, membre_id, type_abonnement, date_debut in valid:
+            if membre_id not in current:
+                result["status"] = BULK_NO_SUBSCRIPTION
+                continue
+            pk, old_type, old_fin, actif = current[membre_id]
+            if pk in renewed:
+                # même membre plusieurs fois dans le lot : seul le premier compte
+                result["status"] = BULK_DUPLICATE
+                continue
+            renewed.add(pk)
+            if actif:
+                per_type[old_type] = per_type.get(old_type, 0) - 1
+            key = (date_debut or max(old_fin, today), type_abonnement or old_type)
+            per_type[key[1]] = per_type.get(key[1], 0) + 1
+            groups.setdefault(key, []).append(pk)
+            result.update(status=BULK_RENEWED, id=pk)
+
+        ends = _end_dates(groups)
+        now = timezone.now()
+        for (date_debut, type_abonnement), pks in groups.items():
+            for chunk in _chunks(pks, batch_size):
+                Subscription.objects.filter(pk__in=chunk).update(
+                    type_abonnement=type_abonnement,
+                    date_debut=date_debut,
+                    date_fin=ends[(date_debut, type_abonnement)],
+                    actif=True,
+                    updated_at=now,
+                )
+        renewed_ends = {pk: ends[key] for key, pks in groups.items() for pk in pks}
+        for result in results:
+            if result["status"] == BULK_RENEWED:
+                result["date_fin"] = renewed_ends[result["id"]]
+        if groups:
+            _after_bulk_write(per_type)
+
+    return results
+
+
+def renewal_items(ending_before):
+    """
+    Éléments de renouvellement (type inchangé, nouveau départ à l'ancienne fin)
+    pour tous les abonnements se terminant avant `ending_before` : rentrée de saison.
+    """
+    memberships = (
+        Subscription.objects.filter(date_fin__lt=ending_before)
+        .order_by("membre_id").values_list("membre_id", flat=True)
+        .iterator(chunk_size=SUBSCRIPTION_BATCH_SIZE)
+    )
+    # bulk_renew_subscriptions les relit par paquets de SUBSCRIPTION_BATCH_SIZE
+    return [{"membre_id": membre_id} for membre_id in memberships]
@@ -0,0 +1,182 @@
+import uuid
+from datetime import datetime, timedelta
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import Trunc
+from django.utils import timezone
+from club.models import Member, Enrollment, Subscription
+
+
+GRANULARITIES = {
+    "day": relativedelta(days=1),
+    "week": relativedelta(weeks=1),
+    "month": relativedelta(months=1),
+}
+# Plage par défaut quand date_from n'est pas fournie (en nombre de périodes)
+DEFAULT_PERIODS = {"day": 30, "week": 12, "month": 12}
+MAX_PERIODS = 1000
+# Une période close ne change plus, sauf suppression ou modification de dates
+# passées : dans ce cas invalidate_timeseries() (club.signals) vide tout.
+TIMESERIES_CACHE_TIMEOUT = getattr(settings, "CLUB_TIMESERIES_CACHE_TIMEOUT", 24 * 3600)
+_NAMESPACE_KEY = "club:timeseries:namespace"
+
+
+class TimeseriesError(ValueError):
+    pass
+
+
+def _namespace():
+    # même principe que le catalogue (club.services.catalogue)
+    token = cache.get(_NAMESPACE_KEY)
+    if token is None:
+        cache.add(_NAMESPACE_KEY, uuid.uuid4().hex, None)
+        token = cache.get(_NAMESPACE_KEY)
+    return token
+
+
+def invalidate_timeseries():
+    cache.set(_NAMESPACE_KEY, uuid.uuid4().hex, None)
+
+
+def period_start(day, granularity):
+    # semaines ISO : elles commencent le lundi, comme Trunc("week")
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def period_end(start, granularity):
+    return start + GRANULARITIES[granularity] - timedelta(days=1)
+
+
+def iter_periods(date_from, date_to, granularity):
+    start = period_start(date_from, granularity)
+    while start <= date_to:
+        yield start
+        start += GRANULARITIES[granularity]
+
+
+def _grouped(queryset, field, granularity, start, end, *extra):
+    # GROUP BY date tronquée, calculé par la base
+    return (
+        queryset
+        .filter(**{f"{field}__gte": start, f"{field}__lte": end})
+        .order_by()
+        .annotate(period=Trunc(field, granularity, output_field=DateField()))
+        .values("period", *extra)
+        .annotate(n=Count("id"))
+    )
+
+
+def _new_members(periods, granularity):
+    rows = _grouped(Member.objects, "date_inscription", granularity, periods[0], period_end(periods[-1], granularity))
+    counts = {row["period"]: row["n"] for row in rows}
+    return {p: {"value": counts.get(p, 0)} for p in periods}
+
+
+def _enrollments(periods, granularity):
+    buckets = {p: {"value": 0, "by_activity": {}} for p in periods}
+    rows = _grouped(
+        Enrollment.objects, "date_inscription", granularity,
+        periods[0], period_end(periods[-1], granularity), "activite__code_act",
+    )
+    for row in rows:
+        bucket = buckets[row["period"]]
+        bucket["value"] += row["n"]
+        bucket["by_activity"][row["activite__code_act"]] = row["n"]
+    return buckets
+
+
+def _active_subscriptions(periods, granularity):
+    """
+    Abonnements actifs pendant chaque période (date_debut <= fin de période
+    et date_fin >= début de période), d'après les dates seulement.
+    Actifs(P) = débutés jusqu'à la fin de P - terminés avant le début de P :
+    deux GROUP BY (débuts, fins) et un cumul, au lieu d'une requête par période.
+    """
+    start, end = periods[0], period_end(periods[-1], granularity)
+    before = Subscription.objects.aggregate(
+        started=Count("id", filter=Q(date_debut__lt=start)),
+        ended=Count("id", filter=Q(date_fin__lt=start)),
+    )
+    starts = {r["period"]: r["n"] for r in _grouped(Subscription.objects, "date_debut", granularity, start, end)}
+    ends = {r["period"]: r["n"] for r in _grouped(Subscription.objects, "date_fin", granularity, start, end)}
+
+    started, ended = before["started"], before["ended"]
+    buckets = {}
+    for p in periods:
+        started += starts.get(p, 0)
+        buckets[p] = {"value": started - ended}
+        ended += ends.get(p, 0)
+    return buckets
+
+
+METRICS = {
+    "new_members": _new_members,
+    "enrollments": _enrollments,
+    "active_subscriptions": _active_subscriptions,
+}
+
+
+def parse_range(params, granularity):
+    """
+    date_from / date_to (YYYY-MM-DD, inclusifs) ; par défaut les
+    DEFAULT_PERIODS dernières périodes jusqu'à aujourd'hui.
+    """
+    dates = {}
+    for name in ("date_from", "date_to"):
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = datetime.strptime(value, "%Y-%m-%d").date()
+            except ValueError:
+                raise TimeseriesError(f"Invalid {name} format. Use YYYY-MM-DD")
+    date_to = dates.get("date_to") or timezone.localdate()
+    date_from = dates.get("date_from") or (
+        period_start(date_to, granularity) - GRANULARITIES[granularity] * (DEFAULT_PERIODS[granularity] - 1)
+    )
+    if date_from > date_to:
+        raise TimeseriesError("date_from must be before date_to")
+    return date_from, date_to
+
+
+def timeseries(metric, granularity, date_from, date_to):
+    """
+    Série temporelle [{"period": début de période, "value": n, ...}, ...].
+
+    Les périodes closes (terminées avant la période courante) sont lues dans
+    le cache, une entrée par période ; seules les périodes manquantes et la
+    période courante (ou futures) sont recalculées, en une passe sur leur plage.
+    """
+    if metric not in METRICS:
+        raise TimeseriesError(f"Unknown metric. Use one of: {', '.join(METRICS)}")
+    if granularity not in GRANULARITIES:
+        raise TimeseriesError(f"Unknown granularity. Use one of: {', '.join(GRANULARITIES)}")
+
+    periods = []
+    for p in iter_periods(date_from, date_to, granularity):
+        periods.append(p)
+        if len(periods) > MAX_PERIODS:
+            raise TimeseriesError(f"Too many periods (max {MAX_PERIODS}), use a coarser granularity")
+
+    current = period_start(timezone.localdate(), granularity)
+    prefix = f"club:timeseries:{_namespace()}:{metric}:{granularity}:"
+    cached = cache.get_many([prefix + p.isoformat() for p in periods if p < current])
+    buckets = {p: cached[prefix + p.isoformat()] for p in periods if prefix + p.isoformat() in cached}
+
+    missing = [p for p in periods if p not in buckets]
+    if missing:
+        # plage contiguë des périodes manquantes (le calcul cumulatif en a besoin)
+        span = periods[periods.index(missing[0]):periods.index(missing[-1]) + 1]
+        computed = METRICS[metric](span, granularity)
+        cache.set_many(
+            {prefix + p.isoformat(): computed[p] for p in span if p < current},
+            TIMESERIES_CACHE_TIMEOUT,
+        )
+        buckets.update(computed)
+
+    return [{"period": p, **buckets[p]} for p in periods]
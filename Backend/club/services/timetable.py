@@ -0,0 +1,249 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.utils import timezone
+from club.services.schedules import SCHEDULE_HORIZON_DAYS, occurrence_dates, occurrences, resync_schedule
+
+
+class TimetableError(ValueError):
+    """Créneau invalide ; `status` est le code HTTP à renvoyer."""
+    status = 400
+
+
+class TimetableConflict(TimetableError):
+    # chevauchement avec d'autres séances de la même activité
+    status = 409
+
+    def __init__(self, message, conflicts):
+        super().__init__(message)
+        self.conflicts = conflicts
+
+
+# Taille maximale d'un planning soumis à /class-sessions/validate/
+TIMETABLE_MAX_SLOTS = 50000
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _parse_time(value):
+    # "HH:MM", ou "HH:MM:SS" comme l'acceptait déjà l'API
+    for fmt in ("%H:%M", "%H:%M:%S"):
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(value)
+
+
+def parse_slot(data):
+    """
+    (activite_id, date, début, fin) d'un créneau JSON, heures en minutes.
+    Lève TimetableError si un champ manque ou si la fin n'est pas après le début.
+    """
+    try:
+        activite_id = int(data["activite_id"])
+        day = datetime.strptime(data["date"], "%Y-%m-%d").date()
+        start = _minutes(_parse_time(data["heure_debut"]))
+        end = _minutes(_parse_time(data["heure_fin"]))
+    except KeyError as e:
+        raise TimetableError(f"Missing required field: {e.args[0]}")
+    except (TypeError, ValueError):
+        raise TimetableError("Invalid slot. Use activite_id, date (YYYY-MM-DD), heure_debut and heure_fin (HH:MM)")
+    if end <= start:
+        raise TimetableError("heure_fin must be after heure_debut")
+    return activite_id, day, start, end
+
+
+class IntervalIndex:
+    """
+    Index d'intervalles [début, fin[ par clé (activité, date) : débuts triés et
+    arbre de segments du maximum des fins. Une recherche garde par dichotomie
+    les intervalles qui commencent avant la fin cherchée, puis descend l'arbre
+    en n'ouvrant que les nœuds dont le maximum des fins dépasse le début
+    cherché : O((k + 1) log n) pour k chevauchements, même si un long
+    intervalle commence très tôt.
+    """
+
+    def __init__(self, intervals):
+        # intervals : itérable de (clé, début, fin, étiquette)
+        groups = {}
+        for key, start, end, label in intervals:
+            groups.setdefault(key, []).append((start, end, label))
+        self._groups = {}
+        for key, rows in groups.items():
+            rows.sort(key=lambda row: (row[0], row[1]))
+            size = 1 << (len(rows) - 1).bit_length()
+            # feuilles : les fins (-1 pour les places vides) ; nœud i : max de 2i et 2i + 1
+            tree = [-1] * (2 * size)
+            for i, (_, end, _) in enumerate(rows):
+                tree[size + i] = end
+            for i in range(size - 1, 0, -1):
+                tree[i] = max(tree[2 * i], tree[2 * i + 1])
+            self._groups[key] = ([r[0] for r in rows], [r[2] for r in rows], tree, size)
+
+    def overlapping(self, key, start, end, exclude=None):
+        """Étiquettes des intervalles de `key` qui chevauchent [start, end[, par début croissant."""
+        group = self._groups.get(key)
+        if group is None:
+            return []
+        starts, labels, tree, size = group
+        limit = bisect_left(starts, end)  # seuls les intervalles [0, limit[ commencent avant `end`
+        found = []
+        stack = [(1, 0, size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or tree[node] <= start:
+                continue
+            if node >= size:
+                if labels[node - size] != exclude:
+                    found.append(labels[node - size])
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+        return found
+
+
+def _existing(date_from, date_to, activity_id=None, ignore_ids=(), ignore_schedule=None, activity_ids=None):
+    """
+    Séances existantes et occurrences des plannings sur la période, sous la
+    forme ((activité, date), début, fin, description). `ignore_schedule` :
+    planning en cours de modification, dont les séances vont être régénérées.
+    """
+    for item in occurrences(date_from, date_to, activity_id, activity_ids):
+        if item["id"] is not None and item["id"] in ignore_ids:
+            continue
+        if ignore_schedule is not None and item["schedule_id"] == ignore_schedule:
+            continue
+        yield (
+            (item["activite"].id, item["date"]),
+            _minutes(item["heure_debut"]),
+            _minutes(item["heure_fin"]),
+            {
+                "id": item["id"],
+                "schedule_id": item["schedule_id"],
+                "date": item["date"].isoformat(),
+                "heure_debut": item["heure_debut"].strftime("%H:%M"),
+                "heure_fin": item["heure_fin"].strftime("%H:%M"),
+            },
+        )
+
+
+def check_slot(data, session_id=None):
+    """
+    Vérifie qu'un créneau (création, ou modification de la séance
+    `session_id`) ne chevauche aucune séance de la même activité le même jour,
+    occurrences des plannings comprises. Retourne (activite_id, date, début, fin) ;
+    lève TimetableError ou TimetableConflict.
+    """
+    activite_id, day, start, end = parse_slot(data)
+    ignore = {session_id} if session_id else set()
+    # une seule recherche : les séances de l'activité ce jour-là (une requête
+    # bornée) sont parcourues directement, un index ne servirait qu'une fois
+    conflicts = [
+        label for _, other_start, other_end, label in _existing(day, day, activite_id, ignore)
+        if other_start < end and other_end > start
+    ]
+    if conflicts:
+        raise TimetableConflict("The session overlaps another session of this activity", conflicts)
+    return activite_id, day, start, end
+
+
+def save_checked(session, data):
+    """
+    Contrôle puis enregistre `session` (nouvelle ou existante) avec le créneau
+    `data` complet. Dans une transaction : avec SQLite (mode IMMEDIATE) deux
+    écritures concurrentes ne peuvent pas passer le contrôle en même temps.
+    """
+    with transaction.atomic():
+        check_slot(data, session.pk)
+        session.activite_id = int(data["activite_id"])
+        session.date = data["date"]
+        session.heure_debut = data["heure_debut"]
+        session.heure_fin = data["heure_fin"]
+        session.save()
+    return session
+
+
+def validate_timetable(slots, ignore_schedule=None):
+    """
+    Valide un planning complet (liste de créneaux JSON, avec `id` pour une
+    séance existante déplacée) : chaque créneau est comparé aux autres
+    créneaux du planning et aux séances existantes de la période.
+    Un seul index construit pour tout le planning, puis une recherche par
+    créneau ; seules les activités du planning sont lues et développées.
+
+    Retourne {"valid", "checked", "errors": [{index, error}],
+    "conflicts": [{index, with: [...]}]} ; dans `with`, un créneau du planning
+    est désigné par {"index": i}. Les séances du planning `ignore_schedule`
+    sont ignorées (save_schedule_checked).
+    """
+    errors, parsed = [], []
+    for i, slot in enumerate(slots):
+        try:
+            if not isinstance(slot, dict):
+                raise TimetableError("Each slot must be an object")
+            parsed.append((i, slot.get("id")) + parse_slot(slot))
+        except TimetableError as e:
+            errors.append({"index": i, "error": str(e)})
+
+    conflicts = []
+    if parsed:
+        moved = {session_id for _, session_id, *_ in parsed if session_id}
+        date_from = min(row[3] for row in parsed)
+        date_to = max(row[3] for row in parsed)
+        keys = {(activite_id, day) for _, _, activite_id, day, _, _ in parsed}
+        existing = (
+            row for row in _existing(
+                date_from, date_to, ignore_ids=moved, ignore_schedule=ignore_schedule,
+                activity_ids={activite_id for activite_id, _ in keys},
+            )
+            if row[0] in keys
+        )
+        proposed = (((activite_id, day), start, end, {"index": i}) for i, _, activite_id, day, start, end in parsed)
+        index = IntervalIndex(list(existing) + list(proposed))
+        for i, _, activite_id, day, start, end in parsed:
+            found = index.overlapping((activite_id, day), start, end, exclude={"index": i})
+            if found:
+                conflicts.append({"index": i, "with": found})
+
+    return {
+        "valid": not errors and not conflicts,
+        "checked": len(slots),
+        "errors": errors,
+        "conflicts": conflicts,
+    }
+
+
+def save_schedule_checked(schedule, today=None, days=SCHEDULE_HORIZON_DAYS):
+    """
+    Enregistre la règle `schedule` (nouvelle ou modifiée) et reconstruit son
+    horizon, après avoir passé les séances à générer par validate_timetable :
+    materialize() les crée par bulk_create, sans le contrôle de save_checked.
+    Le tout dans une transaction : une règle n'est jamais enregistrée sans ses
+    séances. Retourne le nombre de séances créées ; lève TimetableConflict.
+    """
+    today = today or timezone.localdate()
+    slots = [
+        {
+            "activite_id": schedule.activite_id,
+            "date": day.isoformat(),
+            "heure_debut": schedule.heure_debut.strftime("%H:%M"),
+            "heure_fin": schedule.heure_fin.strftime("%H:%M"),
+        }
+        for day in occurrence_dates(schedule, today, today + timedelta(days=days - 1))
+    ]
+    with transaction.atomic():
+        result = validate_timetable(slots, ignore_schedule=schedule.pk)
+        if result["conflicts"]:
+            raise TimetableConflict(
+                "The schedule overlaps other sessions of this activity",
+                [
+                    {"date": slots[conflict["index"]]["date"], "with": conflict["with"]}
+                    for conflict in result["conflicts"]
+                ],
+            )
+        schedule.save()
+        return resync_schedule(schedule, today, days)
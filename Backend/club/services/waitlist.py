@@ -0,0 +1,149 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from club.models import Activity, Enrollment, Member, WaitlistEntry
+from club.services.catalogue import invalidate_catalogue
+from club.services.cube import analytics_cube
+from club.services.enrollments import (
+    ActivityNotFound, AlreadyEnrolled, EnrollmentError, MemberNotFound
+)
+from club.services.rollups import record_bulk_created, record_new_enrollments
+
+
+class ActivityNotFull(EnrollmentError):
+    status = 409
+
+    def __init__(self):
+        super().__init__("Activity is not full: enroll the member directly")
+
+
+class NotWaiting(EnrollmentError):
+    status = 404
+
+    def __init__(self):
+        super().__init__("Member is not on the waitlist of this activity")
+
+
+def join_waitlist(membre_id, activite_id):
+    """
+    Met un membre en file d'attente d'une activité complète. Le numéro de
+    ticket vient d'un UPDATE ... SET waitlist_seq = waitlist_seq + 1 sur la
+    ligne de l'activité, dans la même transaction que l'insertion.
+    Idempotent : retourne (entrée, créée).
+    """
+    if not Member.objects.filter(pk=membre_id).exists():
+        raise MemberNotFound()
+
+    with transaction.atomic():
+        activity = (
+            Activity.objects.select_for_update()
+            .filter(pk=activite_id).values("capacite", "nb_inscriptions").first()
+        )
+        if activity is None:
+            raise ActivityNotFound()
+        if Enrollment.objects.filter(membre_id=membre_id, activite_id=activite_id).exists():
+            raise AlreadyEnrolled()
+        entry = WaitlistEntry.objects.filter(membre_id=membre_id, activite_id=activite_id).first()
+        if entry is not None:
+            return entry, False
+        # des places libres et une file vide : pas de raison d'attendre
+        if activity["nb_inscriptions"] < activity["capacite"]:
+            raise ActivityNotFull()
+
+        Activity.objects.filter(pk=activite_id).update(waitlist_seq=F("waitlist_seq") + 1)
+        sequence = Activity.objects.filter(pk=activite_id).values_list("waitlist_seq", flat=True).get()
+        entry = WaitlistEntry.objects.create(membre_id=membre_id, activite_id=activite_id, sequence=sequence)
+    return entry, True
+
+
+def waitlist_status(entry):
+    """
+    Rang d'une entrée en O(1) : les tickets en attente sont toujours
+    waitlist_served + 1 ... waitlist_seq, sans trou (un départ en cours de
+    file fait avancer les suivants, voir close_waitlist_gap), donc
+    rang = sequence - waitlist_served.
+    """
+    served = Activity.objects.filter(pk=entry.activite_id).values_list("waitlist_served", flat=True).get()
+    return {
+        "activite_id": entry.activite_id,
+        "membre_id": entry.membre_id,
+        "sequence": entry.sequence,
+        "now_serving": served,
+        "position": entry.sequence - served,
+    }
+
+
+def close_waitlist_gap(activite_id, sequence):
+    """
+    Départ du ticket `sequence` en cours de file (l'entrée est supprimée par
+    l'appelant, dans la même transaction) : les tickets suivants avancent
+    d'un rang, le prochain ticket attribué aussi. Deux UPDATE.
+    """
+    WaitlistEntry.objects.filter(activite_id=activite_id, sequence__gt=sequence).update(sequence=F("sequence") - 1)
+    Activity.objects.filter(pk=activite_id).update(waitlist_seq=F("waitlist_seq") - 1)
+
+
+def leave_waitlist(membre_id, activite_id):
+    with transaction.atomic():
+        entry = (
+            WaitlistEntry.objects.filter(membre_id=membre_id, activite_id=activite_id)
+            .values_list("pk", "sequence").first()
+        )
+        if entry is None:
+            raise NotWaiting()
+        WaitlistEntry.objects.filter(pk=entry[0]).delete()
+        close_waitlist_gap(activite_id, entry[1])
+
+
+def promote_waitlist(activite_id):
+    """
+    Inscrit la tête de file tant qu'il reste des places (libération d'une
+    place ou hausse de capacité) : les N premiers tickets en une requête,
+    un bulk_create, un UPDATE du compteur. S'exécute dans la transaction de
+    l'appelant (signal de suppression d'une inscription, sauvegarde de
+    l'activité). Retourne les inscriptions créées.
+    """
+    created = []
+    with transaction.atomic():
+        activity = (
+            Activity.objects.select_for_update()
+            .filter(pk=activite_id).values("capacite", "nb_inscriptions").first()
+        )
+        if activity is None:
+            return created
+        free = activity["capacite"] - activity["nb_inscriptions"]
+        served = None
+        while free > 0:
+            heads = list(
+                WaitlistEntry.objects.filter(activite_id=activite_id)
+                .order_by("sequence").values_list("id", "membre_id", "sequence")[:free]
+            )
+            if not heads:
+                break
+            # un membre inscrit entre-temps par un autre chemin quitte simplement la file
+            enrolled = set(
+                Enrollment.objects.filter(activite_id=activite_id, membre_id__in=[h[1] for h in heads])
+                .values_list("membre_id", flat=True)
+            )
+            promoted = Enrollment.objects.bulk_create(
+                Enrollment(membre_id=membre_id, activite_id=activite_id)
+                for _, membre_id, _ in heads if membre_id not in enrolled
+            )
+            # des têtes de file : pas de trou à refermer (close_waitlist_gap)
+            WaitlistEntry.objects.filter(id__in=[h[0] for h in heads]).delete()
+            created.extend(promoted)
+            free -= len(promoted)
+            served = heads[-1][2]
+
+        if served is not None:
+            # bulk_create n'envoie pas de signaux : compteur, agrégats et caches à la main
+            Activity.objects.filter(pk=activite_id).update(
+                nb_inscriptions=F("nb_inscriptions") + len(created),
+                waitlist_served=served,
+                updated_at=timezone.now(),
+            )
+            record_bulk_created(created, "date_inscription", record_new_enrollments)
+            if created:
+                transaction.on_commit(invalidate_catalogue)
+                transaction.on_commit(analytics_cube.invalidate)
+    return created
@@ -0,0 +1,350 @@
+import threading
+from collections import Counter
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from club.models import Activity, Attendance, Enrollment, Member, Subscription, ClassSession, ClassSchedule, WaitlistEntry
+from club.api.conditional import begin_deletion, record_deletion
+from club.services import rollups
+from club.services.attendance import checkin_writer
+from club.services.catalogue import invalidate_catalogue
+from club.services.cube import analytics_cube
+from club.services.timeseries import invalidate_timeseries
+from club.services.waitlist import close_waitlist_gap, promote_waitlist
+
+
+def _shift_enrollment_count(activity_id, delta):
+    # Single UPDATE ... SET nb_inscriptions = nb_inscriptions + delta, no read
+    Activity.objects.filter(pk=activity_id).update(
+        nb_inscriptions=F("nb_inscriptions") + delta, updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_previous_activity(sender, instance, raw=False, **kwargs):
+    # On update, remember the stored activity so that a move can be accounted for
+    instance._previous_activite_id = None
+    if not raw and not instance._state.adding:
+        instance._previous_activite_id = (
+            Enrollment.objects.filter(pk=instance.pk).values_list("activite_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Seats taken through club.services.enrollments are already counted
+    reserved = getattr(instance, "_seat_reserved", False)
+    instance._seat_reserved = False
+    if created:
+        if not reserved:
+            _shift_enrollment_count(instance.activite_id, 1)
+        return
+    previous = getattr(instance, "_previous_activite_id", None)
+    if previous is not None and previous != instance.activite_id:
+        _shift_enrollment_count(previous, -1)
+        if not reserved:
+            _shift_enrollment_count(instance.activite_id, 1)
+
+
+def _deleting_members(origin):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is Member
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_enrollment_deleted(sender, instance, origin=None, **kwargs):
+    # Nothing to maintain when the activity itself is being deleted (cascade);
+    # a member's enrollments are counted out together (apply_member_cascade)
+    if isinstance(origin, Activity) and origin.pk == instance.activite_id:
+        return
+    if _deleting_members(origin):
+        return
+    _shift_enrollment_count(instance.activite_id, -1)
+
+
+@receiver(post_delete, sender=Attendance)
+def count_attendance_deleted(sender, instance, origin=None, **kwargs):
+    # Nothing to maintain when the session goes too (deleted itself or with its activity)
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model in (ClassSession, Activity, Member):  # Member: apply_member_cascade
+        return
+    ClassSession.objects.filter(pk=instance.session_id).update(
+        nb_presents=F("nb_presents") - 1, updated_at=timezone.now()
+    )
+    # the member may check in again
+    transaction.on_commit(lambda: checkin_writer.forget(instance.session_id, instance.membre_id))
+
+
+# The public catalogue shows availability, so enrollment changes invalidate it too.
+# Invalidate after commit so a concurrent request cannot re-cache pre-commit data.
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_activity_catalogue(sender, **kwargs):
+    transaction.on_commit(invalidate_catalogue)
+
+
+# Deletes lower the row count but not max(updated_at): remember when they happened
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Activity)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=Subscription)
+@receiver(post_delete, sender=ClassSession)
+@receiver(post_delete, sender=ClassSchedule)
+@receiver(post_delete, sender=Attendance)
+def remember_deletion(sender, origin=None, **kwargs):
+    record_deletion(sender, origin)
+
+
+@receiver(pre_delete, sender=Member)
+@receiver(pre_delete, sender=Activity)
+@receiver(pre_delete, sender=Enrollment)
+@receiver(pre_delete, sender=Subscription)
+@receiver(pre_delete, sender=ClassSession)
+@receiver(pre_delete, sender=ClassSchedule)
+@receiver(pre_delete, sender=Attendance)
+def start_deletion(sender, origin=None, **kwargs):
+    # one stamp upsert per delete call (club.api.conditional.record_deletion)
+    begin_deletion(origin)
+
+
+# Cached time-series buckets of closed periods only change when past rows go away,
+# move to another activity, or get new dates (subscriptions)
+@receiver(post_delete, sender=Member)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def invalidate_closed_timeseries(sender, **kwargs):
+    transaction.on_commit(invalidate_timeseries)
+
+
+@receiver(post_save, sender=Enrollment)
+def invalidate_moved_enrollment_timeseries(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(invalidate_timeseries)
+
+
+# Statistics rollups (club.services.rollups)
+@receiver(post_save, sender=Member)
+def rollup_member_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.record_new_members(instance.date_inscription)
+
+
+@receiver(post_delete, sender=Member)
+def rollup_member_deleted(sender, instance, **kwargs):
+    rollups.record_new_members(instance.date_inscription, -1)
+
+
+@receiver(post_save, sender=Enrollment)
+def rollup_enrollment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.record_new_enrollments(instance.date_inscription)
+
+
+@receiver(post_delete, sender=Enrollment)
+def rollup_enrollment_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleting_members(origin):  # apply_member_cascade
+        rollups.record_new_enrollments(instance.date_inscription, -1)
+
+
+@receiver(pre_save, sender=Subscription)
+def remember_previous_subscription_state(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if not raw and not instance._state.adding:
+        instance._previous_state = (
+            Subscription.objects.filter(pk=instance.pk).values_list("type_abonnement", "actif").first()
+        )
+
+
+@receiver(post_save, sender=Subscription)
+def rollup_subscription_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, "_previous_state", None)
+    current = (instance.type_abonnement, bool(instance.actif))
+    if previous is not None and tuple(previous) == current:
+        return
+    if previous is not None and previous[1]:
+        rollups.record_active_subscriptions(previous[0], -1)
+    if current[1]:
+        rollups.record_active_subscriptions(current[0])
+
+
+@receiver(post_delete, sender=Subscription)
+def rollup_subscription_deleted(sender, instance, **kwargs):
+    if instance.actif:
+        rollups.record_active_subscriptions(instance.type_abonnement, -1)
+
+
+# In-memory analytics cube (club.services.cube): kept in step after commit, once loaded
+def _update_cube(method, *args):
+    if analytics_cube.loaded:
+        transaction.on_commit(lambda: method(*args))
+
+
+@receiver(post_save, sender=Member)
+def cube_member_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_cube(analytics_cube.member_saved, instance.pk, instance.age, instance.actif)
+
+
+@receiver(post_delete, sender=Member)
+def cube_member_deleted(sender, instance, **kwargs):
+    _update_cube(analytics_cube.member_deleted, instance.pk)
+
+
+@receiver(post_save, sender=Activity)
+def cube_activity_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_cube(analytics_cube.activity_saved, instance.pk, instance.tarif_mensuel, instance.nom_act)
+
+
+@receiver(post_delete, sender=Activity)
+def cube_activity_deleted(sender, instance, **kwargs):
+    _update_cube(analytics_cube.activity_deleted, instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+def cube_enrollment_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_cube(analytics_cube.enrollment_saved, instance.pk, instance.membre_id, instance.activite_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def cube_enrollment_deleted(sender, instance, **kwargs):
+    _update_cube(analytics_cube.enrollment_deleted, instance.pk)
+
+
+@receiver(post_save, sender=Subscription)
+def cube_subscription_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _update_cube(analytics_cube.subscription_saved, instance.membre_id, instance.type_abonnement, instance.actif)
+
+
+@receiver(post_delete, sender=Subscription)
+def cube_subscription_deleted(sender, instance, **kwargs):
+    _update_cube(analytics_cube.subscription_deleted, instance.membre_id)
+
+
+# Waitlist (club.services.waitlist): a freed seat goes to the head of the queue in the
+# transaction that freed it. Registered after the seat counter receivers above.
+@receiver(post_delete, sender=Enrollment)
+def promote_after_enrollment_deleted(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Activity) and origin.pk == instance.activite_id:
+        return
+    if not _deleting_members(origin):  # apply_member_cascade
+        promote_waitlist(instance.activite_id)
+
+
+@receiver(post_save, sender=Enrollment)
+def promote_after_enrollment_moved(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_activite_id", None)
+    if not created and not raw and previous is not None and previous != instance.activite_id:
+        promote_waitlist(previous)
+
+
+@receiver(pre_save, sender=Activity)
+def remember_previous_capacity(sender, instance, raw=False, **kwargs):
+    instance._previous_capacite = None
+    if not raw and not instance._state.adding:
+        instance._previous_capacite = (
+            Activity.objects.filter(pk=instance.pk).values_list("capacite", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Activity)
+def promote_after_capacity_increase(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_capacite", None)
+    if not created and not raw and previous is not None and int(instance.capacite) > previous:
+        promote_waitlist(instance.pk)
+
+
+
+@receiver(pre_delete, sender=Member)
+def leave_waitlists_of_deleted_member(sender, instance, **kwargs):
+    # A member deleted while waiting leaves the queues: the tickets behind move up
+    # (the entries themselves go with the cascade). Read in the receiver: an earlier
+    # member of the same delete call may have moved them.
+    for activite_id, sequence in WaitlistEntry.objects.filter(membre_id=instance.pk).values_list("activite_id", "sequence"):
+        close_waitlist_gap(activite_id, sequence)
+
+
+# Deleting members cascades to their enrollments and attendances, whose receivers
+# above would each run their own UPDATEs, plus a waitlist promotion per enrollment:
+# the cost of DELETE /members/{id}/ would grow with the member's history. For a
+# member delete they are collected here and applied once, grouped, from the
+# members' own post_delete: the collector deletes (and signals) the cascaded
+# tables before the members they depend on.
+_member_cascade = threading.local()
+
+
+class _MemberCascade:
+    def __init__(self, origin):
+        self.origin = origin
+        self.seats = Counter()  # activity -> enrollments deleted
+        self.days = Counter()  # date_inscription -> enrollments deleted
+        self.presences = Counter()  # session -> attendances deleted
+        self.checkins = []
+
+
+def _by_count(counter):
+    # {n: [keys]}: one UPDATE per distinct delta instead of one per key
+    groups = {}
+    for key, n in counter.items():
+        groups.setdefault(n, []).append(key)
+    return groups.items()
+
+
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_delete, sender=Attendance)
+def collect_member_cascade(sender, instance, origin=None, **kwargs):
+    if not _deleting_members(origin):
+        return
+    pending = getattr(_member_cascade, "pending", None)
+    if pending is None or pending.origin is not origin:
+        # first row of this delete call (a failed earlier one is dropped)
+        pending = _member_cascade.pending = _MemberCascade(origin)
+    if sender is Enrollment:
+        pending.seats[instance.activite_id] += 1
+        pending.days[instance.date_inscription] += 1
+    else:
+        pending.presences[instance.session_id] += 1
+        pending.checkins.append((instance.session_id, instance.membre_id))
+
+
+@receiver(post_delete, sender=Member)
+def apply_member_cascade(sender, origin=None, **kwargs):
+    pending = getattr(_member_cascade, "pending", None)
+    if pending is None or pending.origin is not origin:
+        return
+    _member_cascade.pending = None
+    now = timezone.now()
+    for n, activity_ids in _by_count(pending.seats):
+        Activity.objects.filter(pk__in=activity_ids).update(
+            nb_inscriptions=F("nb_inscriptions") - n, updated_at=now
+        )
+    rollups.record_removed_enrollments(pending.days)
+    for n, session_ids in _by_count(pending.presences):
+        ClassSession.objects.filter(pk__in=session_ids).update(nb_presents=F("nb_presents") - n, updated_at=now)
+    if pending.checkins:
+        # the members' check-ins are gone for good, but keep the writer's memory small
+        transaction.on_commit(lambda: _forget_checkins(pending.checkins))
+    if pending.seats:
+        # freed seats go to the waitlists, where there is one
+        waiting = set(
+            WaitlistEntry.objects.filter(activite_id__in=list(pending.seats))
+            .order_by().values_list("activite_id", flat=True).distinct()
+        )
+        for activite_id in sorted(waiting):
+            promote_waitlist(activite_id)
+
+
+def _forget_checkins(checkins):
+    for session_id, membre_id in checkins:
+        checkin_writer.forget(session_id, membre_id)
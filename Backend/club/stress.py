@@ -0,0 +1,56 @@
+"""
+Threaded load shared by the stress commands (stress_enrollments,
+stress_checkins) and the concurrency tests: the same calls from N threads,
+each with its own database connection.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+from django.db import connections
+
+
+def run_concurrently(items, attempt, threads):
+    """
+    Calls `attempt(item)` for every item, from `threads` threads pulling from
+    one queue. `attempt` returns an outcome key; an exception is counted as
+    "errors" and its repr kept.
+
+    Returns (outcomes Counter, error reprs, elapsed seconds, sorted latencies).
+    """
+    todo = queue.SimpleQueue()
+    for item in items:
+        todo.put(item)
+    outcomes = Counter()
+    errors, latencies = [], []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                try:
+                    item = todo.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.perf_counter()
+                try:
+                    key = attempt(item)
+                except Exception as e:
+                    key = "errors"
+                    errors.append(repr(e))
+                elapsed = time.perf_counter() - started
+                with lock:
+                    outcomes[key] += 1
+                    latencies.append(elapsed)
+        finally:
+            # each thread has its own DB connection
+            connections.close_all()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    latencies.sort()
+    return outcomes, errors, time.perf_counter() - started, latencies
@@ -0,0 +1,23 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class ClubTestRunner(DiscoverRunner):
+    """
+    Test runner of the project: the test Client sends request_started, which
+    would otherwise start the in-process scheduler's threads against the test
+    database; and every request of the tests must stay within its query budget
+    (club/api/budgets.py), so QueryBudgetMiddleware raises instead of logging.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_settings = override_settings(
+            CLUB_SCHEDULER_ENABLED=False, CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL=None,
+            CLUB_QUERY_BUDGETS="raise",
+        )
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
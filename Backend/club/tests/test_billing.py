@@ -0,0 +1,21 @@
+from datetime import date
+from django.test import TestCase
+from club.models import Activity, Enrollment, Invoice, Member, Subscription
+from club.services.billing import run_billing
+from club.services.subscriptions import expire_subscriptions
+
+
+class BillingTests(TestCase):
+    def test_past_month_still_bills_subscriptions_expired_since(self):
+        activity = Activity.objects.create(code_act="YOGA", nom_act="Yoga", tarif_mensuel=30, capacite=10)
+        member = Member.objects.create(nom="Nom", prenom="P", age=30, telephone="22123456")
+        Enrollment.objects.create(membre=member, activite=activity)
+        Enrollment.objects.filter(membre=member).update(date_inscription=date(2025, 12, 20))
+        Subscription.objects.create(membre=member, type_abonnement="MONTHLY", date_debut=date(2026, 1, 1))
+        expire_subscriptions(today=date(2026, 3, 1))
+        self.assertFalse(Subscription.objects.get(membre=member).actif)
+
+        run = run_billing(date(2026, 1, 1))
+        self.assertEqual(run.invoices, 1)
+        self.assertEqual(Invoice.objects.get(membre=member).amount, 30)
+        self.assertEqual(run_billing(date(2026, 3, 1)).invoices, 0)
@@ -0,0 +1,57 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from club.models import Activity, Attendance, ClassSession, Enrollment, Member
+from club.services import calendar
+from club.services.calendar import calendar_feed, feed_window, feed_version
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.activity = Activity.objects.create(code_act="YOGA", nom_act="Yoga", tarif_mensuel=30, capacite=10)
+        self.session = ClassSession.objects.create(
+            activite=self.activity, date=timezone.localdate(), heure_debut="18:00", heure_fin="19:00"
+        )
+        self.member = Member.objects.create(nom="Nom", prenom="P", age=20, telephone="22123456")
+        # rows last changed an hour ago, so that a change now is a later timestamp
+        past = timezone.now() - timedelta(hours=1)
+        Activity.objects.update(updated_at=past, details_updated_at=past)
+        ClassSession.objects.update(updated_at=past, details_updated_at=past)
+
+    def _versions(self):
+        return feed_version(*feed_window()), self.client.get("/class-sessions/")["ETag"]
+
+    def test_counters_do_not_invalidate_the_feed(self):
+        before = self._versions()
+        Enrollment.objects.create(membre=self.member, activite=self.activity)
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.nb_inscriptions, 1)
+        self.assertEqual(self._versions(), before)
+        # a check-in shows in the session list (nb_presents), not in the feed
+        Attendance.objects.create(session=self.session, membre=self.member, checked_in_at=timezone.now())
+        Attendance.objects.all().delete()
+        self.assertEqual(self._versions()[0], before[0])
+
+    def test_renaming_the_activity_invalidates_the_feed(self):
+        before = self._versions()
+        self.activity.nom_act = "Hatha yoga"
+        self.activity.save()
+        after = self._versions()
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_cached_feed_is_served_chunk_by_chunk(self):
+        with mock.patch.object(calendar, "ICS_CHUNK_SIZE", 1):
+            _, chunks = calendar_feed()
+            body = "".join(chunks)
+            version, cached = calendar_feed()
+            key = f"club:ics-chunks:all:{version}"
+            self.assertEqual(cache.get(key), 3)  # header, the session, footer
+            self.assertEqual("".join(cached), body)
+            # a chunk evicted in between: the rest is generated again
+            cache.delete(f"{key}:1")
+            _, cached = calendar_feed()
+            self.assertEqual("".join(cached), body)
@@ -0,0 +1,95 @@
+import io
+import random
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from club.models import Activity, Attendance, ClassSession, Member
+from club.services.attendance import (
+    CHECKIN_CREATED, CHECKIN_DUPLICATE, CheckInWriter, reconcile_attendance_counts,
+)
+from club.stress import run_concurrently
+from club.tests.utils import FileDatabaseTestCase
+
+
+def _session_of_today(code):
+    activity = Activity.objects.create(code_act=code, nom_act=code.title(), tarif_mensuel=0, capacite=500)
+    return ClassSession.objects.create(
+        activite=activity, date=timezone.localdate(), heure_debut="06:00", heure_fin="07:00"
+    )
+
+
+class CheckInBurstTests(FileDatabaseTestCase):
+    """Threads (one SQLite connection each) check members in through one writer, each member twice."""
+
+    THREADS = 16
+    MEMBERS = 300
+
+    def test_burst_stores_every_member_once(self):
+        session = _session_of_today("BURST")
+        members = Member.objects.bulk_create(
+            Member(nom="Burst", prenom=str(i), age=30, telephone="00000000") for i in range(self.MEMBERS)
+        )
+        attempts = [member.id for member in members] * 2
+        random.Random(0).shuffle(attempts)
+        writer = CheckInWriter()
+
+        outcomes, errors, _, _ = run_concurrently(
+            attempts, lambda member_id: writer.check_in(session.id, member_id), self.THREADS
+        )
+
+        session.refresh_from_db()
+        self.assertEqual(errors, [])
+        self.assertEqual(Attendance.objects.filter(session=session).count(), self.MEMBERS)
+        self.assertEqual(session.nb_presents, self.MEMBERS)
+        self.assertEqual(outcomes, {CHECKIN_CREATED: self.MEMBERS, CHECKIN_DUPLICATE: self.MEMBERS})
+
+    def test_stress_command_passes(self):
+        out = io.StringIO()
+        call_command("stress_checkins", threads=8, members=100, stdout=out)
+        self.assertIn("Every member checked in exactly once", out.getvalue())
+        self.assertFalse(Activity.objects.exists())
+
+
+class CheckInTests(FileDatabaseTestCase):
+    def setUp(self):
+        self.session = _session_of_today("DOOR")
+        self.member = Member.objects.create(nom="Door", prenom="A", age=30, telephone="22123456")
+
+    def test_row_inserted_by_another_process_is_a_duplicate(self):
+        writer = CheckInWriter()
+        other = Member.objects.create(nom="Door", prenom="B", age=30, telephone="22123457")
+        self.assertEqual(writer.check_in(self.session.id, other.id), CHECKIN_CREATED)
+        # the writer knows the session's members; another process inserts this one
+        Attendance.objects.create(session=self.session, membre=self.member, checked_in_at=timezone.now())
+        self.assertEqual(writer.check_in(self.session.id, self.member.id), CHECKIN_DUPLICATE)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.nb_presents, 2)
+
+
+class AttendanceCounterTests(TestCase):
+    def setUp(self):
+        self.session = _session_of_today("COUNT")
+        members = Member.objects.bulk_create(
+            Member(nom="Count", prenom=str(i), age=30, telephone="00000000") for i in range(3)
+        )
+        Attendance.objects.bulk_create(
+            Attendance(session=self.session, membre=member, checked_in_at=timezone.now()) for member in members
+        )
+        ClassSession.objects.filter(pk=self.session.pk).update(nb_presents=3)
+
+    def test_deleting_an_attendance_decrements_the_counter(self):
+        Attendance.objects.filter(session=self.session).first().delete()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.nb_presents, 2)
+
+    def test_deleting_a_member_decrements_the_counter(self):
+        Member.objects.filter(prenom="0").delete()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.nb_presents, 2)
+
+    def test_reconcile_fixes_drift(self):
+        ClassSession.objects.filter(pk=self.session.pk).update(nb_presents=7)
+        self.assertEqual(reconcile_attendance_counts(), [(self.session.id, "Count", 7, 3)])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.nb_presents, 3)
+        self.assertEqual(reconcile_attendance_counts(), [])
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from club.models import Activity, DeletionStamp, Enrollment, Member, Subscription
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        activity = Activity.objects.create(code_act="YOGA", nom_act="Yoga", tarif_mensuel=30, capacite=10)
+        for i in range(2):
+            member = Member.objects.create(nom="Nom", prenom=str(i), age=20, telephone="22123456")
+            Enrollment.objects.create(membre=member, activite=activity)
+        # rows last changed an hour ago, so a delete now is a later second
+        past = timezone.now() - timedelta(hours=1)
+        Member.objects.update(updated_at=past)
+        Enrollment.objects.update(updated_at=past)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_delete_stamps_the_cascade_once(self):
+        Member.objects.first().delete()
+        self.assertEqual(
+            set(DeletionStamp.objects.values_list("model", flat=True)),
+            {"club.member", "club.enrollment", "club.subscription", "club.attendance",
+             "club.waitlistentry", "club.invoice", "club.invoiceline"},
+        )
+
+    def test_one_stamp_upsert_per_delete_call(self):
+        members = Member.objects.all()
+        for member in members:
+            with CaptureQueriesContext(connection) as queries:
+                member.delete()
+            stamps = [q for q in queries.captured_queries if "club_deletionstamp" in q["sql"]]
+            self.assertEqual(len(stamps), 1)
+
+    def test_validators_survive_a_cache_reset(self):
+        Member.objects.first().delete()
+        first = self.client.get("/members/")
+        cache.clear()  # another worker, or a restart
+        second = self.client.get("/members/")
+        self.assertEqual(first["ETag"], second["ETag"])
+        self.assertEqual(first["Last-Modified"], second["Last-Modified"])
+
+    def test_if_modified_since_after_a_delete(self):
+        before = self.client.get("/members/")
+        Member.objects.first().delete()
+        response = self.client.get("/members/", HTTP_IF_MODIFIED_SINCE=before["Last-Modified"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+    def test_daily_validators_change_with_the_date(self):
+        Subscription.objects.create(
+            membre=Member.objects.first(), type_abonnement="MONTHLY", date_debut=timezone.localdate() - timedelta(days=20)
+        )
+        today = timezone.localdate()
+        first = self.client.get("/subscriptions/expiring/")
+        with mock.patch("django.utils.timezone.localdate", return_value=today + timedelta(days=1)):
+            response = self.client.get(
+                "/subscriptions/expiring/",
+                HTTP_IF_NONE_MATCH=first["ETag"], HTTP_IF_MODIFIED_SINCE=first["Last-Modified"],
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
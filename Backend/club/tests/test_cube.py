@@ -0,0 +1,61 @@
+from unittest import mock, skipUnless
+from django.test import TestCase
+from club.models import Activity, Enrollment, Member
+from club.services import cube
+from club.services.statistics import age_distribution_per_activity
+
+
+@skipUnless(cube.np is not None, "numpy is not installed")
+class AnalyticsCubeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.activity = Activity.objects.create(code_act="YOGA", nom_act="Yoga", tarif_mensuel=30, capacite=10)
+        for age in (15, 25, 45):
+            member = Member.objects.create(nom="Nom", prenom=str(age), age=age, telephone="22123456")
+            Enrollment.objects.create(membre=member, activite=cls.activity)
+
+    def setUp(self):
+        self.cube = cube.AnalyticsCube()
+        self.cube.load()
+
+    def test_no_reload_on_the_request_path_once_loaded(self):
+        self.cube._loaded_at -= 24 * 3600
+        with self.assertNumQueries(0):
+            self.cube.ensure_fresh()
+            self.cube.age_distribution_per_activity()
+
+    def test_rebuild_catches_writes_made_elsewhere(self):
+        # bulk_create sends no signal: as if another process had written
+        member = Member.objects.bulk_create([Member(nom="Nom", prenom="x", age=70, telephone="22123456")])[0]
+        Enrollment.objects.bulk_create([Enrollment(membre=member, activite=self.activity)])
+        self.assertNotEqual(self.cube.age_distribution_per_activity(), age_distribution_per_activity())
+        self.cube.rebuild()
+        self.assertEqual(self.cube.age_distribution_per_activity(), age_distribution_per_activity())
+
+    def test_updates_received_during_a_rebuild_are_kept(self):
+        build = self.cube._build
+
+        def build_then_write():
+            tables = build()
+            # committed by another request while the rebuild was reading
+            member = Member.objects.create(nom="Nom", prenom="late", age=70, telephone="22123456")
+            enrollment = Enrollment.objects.create(membre=member, activite=self.activity)
+            self.cube.member_saved(member.pk, member.age, member.actif)
+            self.cube.enrollment_saved(enrollment.pk, member.pk, self.activity.pk)
+            return tables
+
+        with mock.patch.object(self.cube, "_build", build_then_write):
+            self.cube.rebuild()
+        self.assertEqual(self.cube.age_distribution_per_activity(), age_distribution_per_activity())
+
+    def test_invalidate_during_a_rebuild_discards_it(self):
+        build = self.cube._build
+
+        def build_then_invalidate():
+            tables = build()
+            self.cube.invalidate()
+            return tables
+
+        with mock.patch.object(self.cube, "_build", build_then_invalidate):
+            self.cube.rebuild()
+        self.assertFalse(self.cube.loaded)
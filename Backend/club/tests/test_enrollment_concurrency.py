@@ -0,0 +1,41 @@
+import io
+from django.core.management import call_command
+from club.models import Activity, Enrollment, Member
+from club.services.enrollments import ActivityFull, enroll_member
+from club.stress import run_concurrently
+from club.tests.utils import FileDatabaseTestCase
+
+
+class EnrollmentConcurrencyTests(FileDatabaseTestCase):
+    """Threads (one SQLite connection each) compete for the seats of one activity."""
+
+    THREADS = 8
+    ATTEMPTS = 120
+    CAPACITY = 40
+
+    def test_no_overbooking_under_concurrent_enrollments(self):
+        activity = Activity.objects.create(code_act="STRESS", nom_act="Stress", tarif_mensuel=0, capacite=self.CAPACITY)
+        members = Member.objects.bulk_create(
+            Member(nom="Stress", prenom=str(i), age=30, telephone="00000000") for i in range(self.ATTEMPTS)
+        )
+
+        def attempt(member_id):
+            try:
+                enroll_member(member_id, activity.id)
+            except ActivityFull:
+                return "full"
+            return "created"
+
+        outcomes, errors, _, _ = run_concurrently([m.id for m in members], attempt, self.THREADS)
+
+        activity.refresh_from_db()
+        self.assertEqual(errors, [])
+        self.assertEqual(Enrollment.objects.filter(activite=activity).count(), self.CAPACITY)
+        self.assertEqual(activity.nb_inscriptions, self.CAPACITY)
+        self.assertEqual(outcomes, {"created": self.CAPACITY, "full": self.ATTEMPTS - self.CAPACITY})
+
+    def test_stress_command_passes(self):
+        out = io.StringIO()
+        call_command("stress_enrollments", threads=8, members=60, capacity=20, stdout=out)
+        self.assertIn("No overbooking", out.getvalue())
+        self.assertFalse(Activity.objects.exists())
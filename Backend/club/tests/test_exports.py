@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from club.models import Member
+
+
+class ExportFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        Member.objects.create(nom="Actif", prenom="A", age=20, telephone="22123456", actif=True)
+        Member.objects.create(nom="Inactif", prenom="B", age=21, telephone="22123457", actif=False)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _export(self, **params):
+        response = self.client.get("/export/members/", {"format": "ndjson", **params})
+        return response, b"".join(response.streaming_content).decode() if response.streaming else ""
+
+    def test_actif_filter(self):
+        response, body = self._export(actif="FALSE")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Inactif", body)
+        self.assertNotIn('"Actif"', body)
+
+    def test_invalid_actif_is_a_400(self):
+        response, _ = self._export(actif="maybe")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Invalid actif"})
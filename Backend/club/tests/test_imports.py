@@ -0,0 +1,46 @@
+import io
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from club.models import Member
+from club.services.imports import import_members, iter_rows
+
+
+class MemberImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+
+    def test_invalid_utf8_line_is_a_row_error(self):
+        data = (
+            b"nom,prenom,age,telephone,email\n"
+            b"Ben Ali,Sami,30,22123456,sami@example.com\n"
+            b"Tr\xe9mblay,Anne,31,22123457,anne@example.com\n"
+            b"Haddad,Lina,32,22123458,lina@example.com\n"
+        )
+        self.client.force_login(self.admin)
+        response = self.client.post("/members/import/", {"file": SimpleUploadedFile("members.csv", data)})
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report["rows"], report["created"], report["error_count"]), (3, 2, 1))
+        self.assertEqual(report["errors"][0]["line"], 3)
+        self.assertEqual(Member.objects.count(), 2)
+
+    def test_invalid_utf8_ndjson_line(self):
+        data = b'{"nom": "A", "prenom": "B", "age": 20, "telephone": "22123456"}\n{"nom": "\xff"}\n'
+        report = import_members(iter_rows(io.BytesIO(data), "ndjson"))
+        self.assertEqual((report["created"], report["error_count"]), (1, 1))
+        self.assertEqual(report["errors"][0]["line"], 2)
+
+    def test_concurrent_duplicate_email_only_rejects_that_row(self):
+        def rows():
+            # another request inserts the email after the validator loaded the known emails
+            Member.objects.create(nom="X", prenom="Y", age=40, telephone="22000000", email="taken@example.com")
+            yield 2, {"nom": "A", "prenom": "A", "age": 20, "telephone": "22123456", "email": "free@example.com"}
+            yield 3, {"nom": "B", "prenom": "B", "age": 21, "telephone": "22123457", "email": "taken@example.com"}
+            yield 4, {"nom": "C", "prenom": "C", "age": 22, "telephone": "22123458"}
+
+        report = import_members(rows())
+        self.assertEqual((report["created"], report["error_count"]), (2, 1))
+        self.assertEqual(report["errors"], [{"line": 3, "errors": {"email": "already used"}}])
+        self.assertEqual(Member.objects.count(), 3)
@@ -0,0 +1,50 @@
+from django.test import TestCase
+from django.utils import timezone
+from club.middleware import QueryRecorder
+from club.models import Activity, Attendance, ClassSession, DailyStats, Enrollment, Member, WaitlistEntry
+from club.services.waitlist import join_waitlist
+
+
+class MemberDeleteTests(TestCase):
+    def setUp(self):
+        self.activities = [
+            Activity.objects.create(code_act=f"A{i}", nom_act=f"A{i}", tarif_mensuel=10, capacite=10) for i in range(5)
+        ]
+        self.sessions = [
+            ClassSession.objects.create(activite=a, date=timezone.localdate(), heure_debut="10:00", heure_fin="11:00")
+            for a in self.activities
+        ]
+
+    def _member(self, activities):
+        member = Member.objects.create(nom="Nom", prenom="P", age=20, telephone="22123456")
+        for activity, session in zip(self.activities[:activities], self.sessions):
+            Enrollment.objects.create(membre=member, activite=activity)
+            Attendance.objects.create(session=session, membre=member, checked_in_at=timezone.now())
+        for session in self.sessions:
+            ClassSession.objects.filter(pk=session.pk).update(nb_presents=session.attendances.count())
+        return member
+
+    def _delete_cost(self, member):
+        with QueryRecorder() as queries:
+            member.delete()
+        return queries.count
+
+    def test_cost_does_not_grow_with_the_member_history(self):
+        one = self._delete_cost(self._member(1))
+        five = self._delete_cost(self._member(5))
+        self.assertEqual(one, five)
+        self.assertEqual(list(Activity.objects.values_list("nb_inscriptions", flat=True).distinct()), [0])
+        self.assertEqual(list(ClassSession.objects.values_list("nb_presents", flat=True).distinct()), [0])
+        self.assertEqual(DailyStats.objects.get(date=timezone.localdate()).new_enrollments, 0)
+
+    def test_freed_seats_go_to_the_waitlist(self):
+        full = self.activities[0]
+        Activity.objects.filter(pk=full.pk).update(capacite=1)
+        member = self._member(2)
+        waiting = Member.objects.create(nom="Wait", prenom="W", age=20, telephone="22123456")
+        join_waitlist(waiting.id, full.id)
+        member.delete()
+        self.assertTrue(Enrollment.objects.filter(membre=waiting, activite=full).exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        full.refresh_from_db()
+        self.assertEqual((full.nb_inscriptions, full.waitlist_served), (1, 1))
@@ -0,0 +1,51 @@
+import base64
+import json
+from django.contrib.auth.models import User
+from django.test import TestCase
+from club.api.pagination import PaginationError, decode_cursor, encode_cursor
+from club.models import Member
+
+
+def _cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+class CursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        for i in range(3):
+            Member.objects.create(nom="Nom", prenom=str(i), age=20 + i, telephone="0600000000")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_round_trip(self):
+        cursor = encode_cursor(("age", "id"), [30, 12])
+        self.assertEqual(decode_cursor(cursor, ("age", "id"), Member), [30, 12])
+
+    def test_values_are_converted_by_the_model_field(self):
+        self.assertEqual(decode_cursor(_cursor({"o": ["id"], "v": ["7"]}), ("id",), Member), [7])
+
+    def test_malformed_cursors_are_rejected(self):
+        for payload in (
+            {"o": ["id"], "v": 5},
+            {"o": "id", "v": [5]},
+            {"o": ["id"], "v": ["abc"]},
+            {"o": ["id"], "v": [[1]]},
+        ):
+            with self.subTest(payload=payload), self.assertRaises(PaginationError):
+                decode_cursor(_cursor(payload), ("id",), Member)
+
+    def test_bad_cursor_is_a_400(self):
+        for payload in ({"o": ["id"], "v": 5}, {"o": ["id"], "v": ["abc"]}, {"o": ["id"], "v": [None]}):
+            with self.subTest(payload=payload):
+                response = self.client.get("/members/", {"cursor": _cursor(payload)})
+                self.assertEqual(response.status_code, 400)
+
+    def test_pages_follow_each_other(self):
+        first = self.client.get("/members/", {"limit": 2}).json()
+        second = self.client.get("/members/", {"limit": 2, "cursor": first["next"]}).json()
+        self.assertEqual(len(first["results"]), 2)
+        self.assertEqual(len(second["results"]), 1)
+        self.assertIsNone(second["next"])
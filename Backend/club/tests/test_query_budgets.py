@@ -0,0 +1,18 @@
+from django.test import TransactionTestCase, override_settings
+from club.budget_check import BUDGET_CACHES, check_query_budgets
+from club.models import Member
+
+
+@override_settings(CACHES=BUDGET_CACHES)
+class QueryBudgetTests(TransactionTestCase):
+    """
+    Every endpoint within its budget in club/api/budgets.py. Not a TestCase:
+    the budgets are counted in autocommit mode, as in production, where a
+    wrapping transaction would turn each BEGIN into a SAVEPOINT pair.
+    """
+
+    def test_every_endpoint_is_within_its_budget(self):
+        failures = check_query_budgets()
+        self.assertEqual(failures, [], "\n".join(failures))
+        # the import is measured on rows that are actually created
+        self.assertEqual(Member.objects.filter(email__in=["import@example.com", "import2@example.com"]).count(), 2)
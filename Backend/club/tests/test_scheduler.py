@@ -0,0 +1,31 @@
+import time
+from django.test import SimpleTestCase, override_settings
+from club.services.scheduler import PeriodicScheduler
+
+
+class SchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.scheduler = PeriodicScheduler(tick=0.01)
+        self.runs = []
+        self.scheduler.add("club_wide", 3600, lambda: self.runs.append("club_wide"), first_delay=0)
+        self.addCleanup(self.scheduler.stop)
+
+    def test_off_by_default(self):
+        self.scheduler.start_on_request()
+        self.assertFalse(self.scheduler.running)
+
+    @override_settings(CLUB_SCHEDULER_ENABLED=True)
+    def test_club_jobs_run_where_enabled(self):
+        self.scheduler.start_on_request()
+        self.assertTrue(self.scheduler.running)
+
+    def test_per_process_task_runs_without_the_club_jobs(self):
+        self.scheduler.add("local", 3600, lambda: self.runs.append("local"), enabled=lambda: True, first_delay=0)
+        self.scheduler.start_on_request()
+        self.assertTrue(self.scheduler.running)
+        deadline = time.monotonic() + 5
+        while not self.runs and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.scheduler.stop()
+        self.scheduler._thread.join()
+        self.assertEqual(self.runs, ["local"])
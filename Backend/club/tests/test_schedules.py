@@ -0,0 +1,69 @@
+import json
+from datetime import time, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from club.models import Activity, ClassSchedule, ClassSession
+
+
+class ScheduleApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+        cls.activity = Activity.objects.create(code_act="YOGA", nom_act="Yoga", tarif_mensuel=30, capacite=10)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.today = timezone.localdate()
+
+    def _rule(self, **fields):
+        return {
+            "activite_id": self.activity.id, "jours": [self.today.weekday()],
+            "heure_debut": "18:00", "heure_fin": "19:00", "date_debut": self.today.isoformat(), **fields,
+        }
+
+    def _send(self, method, path, data):
+        return self.client.generic(method, path, json.dumps(data), content_type="application/json")
+
+    def test_create_materializes_the_horizon(self):
+        response = self._send("POST", "/schedules/", self._rule())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["materialized"], 4)
+        self.assertEqual(ClassSession.objects.filter(schedule_id=response.json()["id"]).count(), 4)
+
+    def test_invalid_activite_id_is_a_400(self):
+        for value in ("abc", 1.5, True, None, [1]):
+            response = self._send("POST", "/schedules/", self._rule(activite_id=value))
+            self.assertEqual(response.status_code, 400, value)
+            self.assertEqual(response.json(), {"error": "activite_id must be an integer"})
+        for path in ("/schedules/", "/schedules/occurrences/"):
+            response = self.client.get(path, {"activite_id": "abc"})
+            self.assertEqual(response.status_code, 400, path)
+        self.assertFalse(ClassSchedule.objects.exists())
+
+    def test_overlap_with_an_existing_session_is_a_409(self):
+        session = ClassSession.objects.create(
+            activite=self.activity, date=self.today + timedelta(days=7), heure_debut="18:30", heure_fin="19:30"
+        )
+        response = self._send("POST", "/schedules/", self._rule())
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["conflicts"][0]["date"], session.date.isoformat())
+        self.assertEqual(response.json()["conflicts"][0]["with"][0]["id"], session.id)
+        self.assertFalse(ClassSchedule.objects.exists())
+        self.assertEqual(ClassSession.objects.count(), 1)
+
+    def test_update_ignores_the_sessions_of_the_rule_itself(self):
+        schedule_id = self._send("POST", "/schedules/", self._rule()).json()["id"]
+        response = self._send("PUT", f"/schedules/{schedule_id}/", {"heure_fin": "19:30"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(ClassSession.objects.filter(schedule_id=schedule_id).values_list("heure_fin", flat=True)),
+            {time(19, 30)},
+        )
+
+    def test_failed_materialization_leaves_no_rule(self):
+        with mock.patch("club.services.timetable.resync_schedule", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                self._send("POST", "/schedules/", self._rule())
+        self.assertFalse(ClassSchedule.objects.exists())
@@ -0,0 +1,36 @@
+from django.test import TestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from club.models import Activity, Enrollment, Member
+from club.services.statistics import compute_overview
+
+
+class OverviewTests(TestCase):
+    def test_most_and_least_popular(self):
+        activities = [
+            Activity.objects.create(code_act=f"A{i}", nom_act=f"Activity {i}", tarif_mensuel=10, capacite=10)
+            for i in range(3)
+        ]
+        members = [Member.objects.create(nom="Nom", prenom=str(i), age=20, telephone="22123456") for i in range(3)]
+        for member in members:
+            Enrollment.objects.create(membre=member, activite=activities[1])
+        Enrollment.objects.create(membre=members[0], activite=activities[2])
+
+        with CaptureQueriesContext(connection) as queries:
+            overview = compute_overview()
+        # SUM over DailyStats once, then one LIMIT 1 query per end
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(overview, {
+            "total_members": 3,
+            "most_popular_activity": {"nom": "Activity 1", "inscriptions": 3},
+            "least_popular_activity": {"nom": "Activity 0", "inscriptions": 0},
+        })
+
+    def test_no_activity(self):
+        Member.objects.create(nom="Nom", prenom="Seul", age=20, telephone="22123456")
+        with CaptureQueriesContext(connection) as queries:
+            overview = compute_overview()
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(overview, {
+            "total_members": 1, "most_popular_activity": None, "least_popular_activity": None,
+        })
@@ -0,0 +1,15 @@
+from django.test import TestCase
+
+
+class ErrorFormatTests(TestCase):
+    def test_csv_export_error_is_json(self):
+        response = self.client.get("/export/members/", {"format": "csv"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("detail", response.json())
+
+    def test_ics_feed_error_is_json(self):
+        response = self.client.post("/class-sessions/calendar.ics", HTTP_ACCEPT="text/calendar")
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("detail", response.json())
@@ -0,0 +1,41 @@
+from datetime import date
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from club.models import Member, Subscription
+from club.services.subscriptions import (
+    BULK_ALREADY_SUBSCRIBED, BULK_CREATED, BULK_NOT_FOUND, BULK_RENEWED,
+    bulk_create_subscriptions, bulk_renew_subscriptions, renewal_items,
+)
+
+
+class BulkSubscriptionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.members = Member.objects.bulk_create(
+            Member(nom="Nom", prenom=str(i), age=30, telephone="22123456") for i in range(5)
+        )
+        for member in cls.members[:3]:
+            Subscription.objects.create(membre=member, type_abonnement="MONTHLY", date_debut=date(2026, 1, 1))
+
+    def test_create_looks_members_up_in_batches(self):
+        items = [{"membre_id": m.id, "type_abonnement": "ANNUAL", "date_debut": "2026-09-01"} for m in self.members]
+        items.append({"membre_id": 999999, "type_abonnement": "ANNUAL", "date_debut": "2026-09-01"})
+        with CaptureQueriesContext(connection) as queries:
+            results = bulk_create_subscriptions(items, batch_size=2)
+        self.assertEqual(
+            [r["status"] for r in results],
+            [BULK_ALREADY_SUBSCRIBED] * 3 + [BULK_CREATED] * 2 + [BULK_NOT_FOUND],
+        )
+        # 6 members in chunks of 2: no IN list longer than the batch
+        member_lookups = [q["sql"] for q in queries.captured_queries if 'FROM "club_member"' in q["sql"]]
+        self.assertEqual(len(member_lookups), 3)
+
+    def test_season_rollover_renews_across_batches(self):
+        items = renewal_items(date(2026, 6, 1))
+        self.assertEqual(len(items), 3)
+        results = bulk_renew_subscriptions(items, batch_size=2, today=date(2026, 9, 1))
+        self.assertEqual([r["status"] for r in results], [BULK_RENEWED] * 3)
+        self.assertEqual(
+            set(Subscription.objects.values_list("date_debut", flat=True)), {date(2026, 9, 1)},
+        )
@@ -0,0 +1,27 @@
+import random
+from django.test import SimpleTestCase
+from club.services.timetable import IntervalIndex
+
+
+class IntervalIndexTests(SimpleTestCase):
+    def test_matches_a_linear_scan(self):
+        rng = random.Random(0)
+        rows = []
+        for label in range(500):
+            start = rng.randrange(0, 1400)
+            rows.append((rng.randrange(3), start, start + rng.randrange(1, 240), label))
+        index = IntervalIndex(rows)
+        for _ in range(300):
+            key, start = rng.randrange(4), rng.randrange(0, 1440)
+            end = start + rng.randrange(1, 120)
+            expected = [
+                label for k, s, e, label in sorted(rows, key=lambda row: (row[1], row[2]))
+                if k == key and s < end and e > start
+            ]
+            self.assertEqual(index.overlapping(key, start, end), expected)
+
+    def test_early_long_interval_does_not_hide_or_slow_down_later_ones(self):
+        index = IntervalIndex([("day", 0, 1440, "long")] + [("day", m, m + 1, m) for m in range(1, 1000)])
+        self.assertEqual(index.overlapping("day", 500, 502), ["long", 500, 501])
+        self.assertEqual(index.overlapping("day", 500, 502, exclude="long"), [500, 501])
+        self.assertEqual(index.overlapping("other", 500, 502), [])
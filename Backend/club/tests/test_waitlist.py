@@ -0,0 +1,47 @@
+from django.test import TestCase
+from club.models import Activity, Enrollment, Member, WaitlistEntry
+from club.services.waitlist import join_waitlist, leave_waitlist, waitlist_status
+
+
+class WaitlistPositionTests(TestCase):
+    def setUp(self):
+        self.activity = Activity.objects.create(code_act="YOGA", nom_act="Yoga", tarif_mensuel=30, capacite=1)
+        self.enrolled = Member.objects.create(nom="In", prenom="0", age=20, telephone="22123456")
+        Enrollment.objects.create(membre=self.enrolled, activite=self.activity)
+        self.waiting = [
+            Member.objects.create(nom="Wait", prenom=str(i), age=20, telephone="22123456") for i in range(5)
+        ]
+        for member in self.waiting:
+            join_waitlist(member.id, self.activity.id)
+
+    def _positions(self):
+        return [
+            waitlist_status(entry)["position"]
+            for entry in WaitlistEntry.objects.filter(activite=self.activity).order_by("sequence")
+        ]
+
+    def _members(self):
+        return list(
+            WaitlistEntry.objects.filter(activite=self.activity).order_by("sequence").values_list("membre__prenom", flat=True)
+        )
+
+    def test_leaving_moves_the_tickets_behind_up(self):
+        leave_waitlist(self.waiting[1].id, self.activity.id)
+        self.assertEqual(self._members(), ["0", "2", "3", "4"])
+        self.assertEqual(self._positions(), [1, 2, 3, 4])
+        late = Member.objects.create(nom="Late", prenom="5", age=20, telephone="22123456")
+        entry, _ = join_waitlist(late.id, self.activity.id)
+        self.assertEqual(waitlist_status(entry)["position"], 5)
+
+    def test_deleted_members_leave_the_queue(self):
+        Member.objects.filter(prenom__in=["1", "3"], nom="Wait").delete()
+        self.assertEqual(self._members(), ["0", "2", "4"])
+        self.assertEqual(self._positions(), [1, 2, 3])
+
+    def test_promotion_serves_the_head(self):
+        Enrollment.objects.get(membre=self.enrolled).delete()
+        self.assertTrue(Enrollment.objects.filter(membre=self.waiting[0]).exists())
+        self.assertEqual(self._members(), ["1", "2", "3", "4"])
+        self.assertEqual(self._positions(), [1, 2, 3, 4])
+        leave_waitlist(self.waiting[2].id, self.activity.id)
+        self.assertEqual(self._positions(), [1, 2, 3])
@@ -0,0 +1,39 @@
+import os
+import tempfile
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase
+
+
+class FileDatabaseTestCase(TransactionTestCase):
+    """
+    TransactionTestCase run on its own SQLite file, for tests that open one
+    connection per thread: the shared in-memory test database answers
+    "database table is locked" at once instead of waiting for the writer
+    (busy timeout), as a real file does. The rest of the suite stays in memory.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._db_dir = tempfile.TemporaryDirectory()
+        # every connection, of any thread, reads the shared settings dict; the
+        # in-memory connection of this thread gets a copy, so that it stays open
+        # (closing it would drop the test database) and is put back afterwards
+        cls._settings = connections.settings[DEFAULT_DB_ALIAS]
+        cls._memory_name = cls._settings["NAME"]
+        cls._memory_connection = connections[DEFAULT_DB_ALIAS]
+        cls._memory_connection.settings_dict = dict(cls._settings)
+        cls._settings["NAME"] = os.path.join(cls._db_dir.name, "db.sqlite3")
+        connections[DEFAULT_DB_ALIAS] = connections.create_connection(DEFAULT_DB_ALIAS)
+        call_command("migrate", verbosity=0, interactive=False)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            connections[DEFAULT_DB_ALIAS].close()
+            cls._settings["NAME"] = cls._memory_name
+            connections[DEFAULT_DB_ALIAS] = cls._memory_connection
+            cls._db_dir.cleanup()
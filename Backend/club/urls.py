@@ -1,12 +1,19 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from club.api.auth import admin_login, admin_logout, get_current_user
-from club.api.members import members, member_detail
+from club.api.members import members, members_import, member_detail
 from club.api.activities import activities, activity_detail
-from club.api.enrollments import enrollments, enrollment_detail
-from club.api.subscriptions import subscriptions, subscription_detail
-from club.api.class_sessions import class_sessions, class_session_detail
-from club.api.statistics import stats_overview, stats_activities, stats_members_per_activity
+from club.api.enrollments import enrollments, enrollments_bulk, enrollment_detail
+from club.api.subscriptions import subscriptions, subscriptions_expiring, subscriptions_bulk, subscriptions_bulk_renew, subscription_detail
+from club.api.class_sessions import (
+    class_sessions, class_sessions_validate, class_sessions_calendar, class_session_detail,
+    class_session_check_in, class_session_attendances, activity_calendar
+)
+from club.api.schedules import schedules, schedule_detail, schedule_occurrences, schedule_occurrence
+from club.api.exports import export_data
+from club.api.waitlist import activity_waitlist, activity_waitlist_member
+from club.api.billing import billing_runs, billing_run_detail, billing_mrr, invoices
+from club.api.statistics import stats_overview, stats_activities, stats_members_per_activity, stats_activity_members, stats_timeseries, stats_breakdown
 
 urlpatterns = [
     # JWT Token endpoints
@@ -19,22 +26,52 @@ urlpatterns = [
     path("auth/me/", get_current_user),
 
     path("members/", members),
+    path("members/import/", members_import),
     path("members/<int:member_id>/", member_detail),
 
     path("activities/", activities),
     path("activities/<int:activity_id>/", activity_detail),
+    path("activities/<int:activity_id>/calendar.ics", activity_calendar),
+    path("activities/<int:activity_id>/waitlist/", activity_waitlist),
+    path("activities/<int:activity_id>/waitlist/<int:member_id>/", activity_waitlist_member),
 
     path("enrollments/", enrollments),
+    path("enrollments/bulk/", enrollments_bulk),
     path("enrollments/<int:enrollment_id>/", enrollment_detail),
 
     path("subscriptions/", subscriptions),
+    path("subscriptions/expiring/", subscriptions_expiring),
+    path("subscriptions/bulk/", subscriptions_bulk),
+    path("subscriptions/bulk/renew/", subscriptions_bulk_renew),
     path("subscriptions/<int:subscription_id>/", subscription_detail),
 
     path("class-sessions/", class_sessions),
+    path("class-sessions/validate/", class_sessions_validate),
+    path("class-sessions/calendar.ics", class_sessions_calendar),
     path("class-sessions/<int:session_id>/", class_session_detail),
+    path("class-sessions/<int:session_id>/check-in/", class_session_check_in),
+    path("class-sessions/<int:session_id>/attendances/", class_session_attendances),
+
+    # Recurring class schedules
+    path("schedules/", schedules),
+    path("schedules/occurrences/", schedule_occurrences),
+    path("schedules/<int:schedule_id>/", schedule_detail),
+    path("schedules/<int:schedule_id>/occurrences/<str:date>/", schedule_occurrence),
+
+    # Streaming exports (CSV / NDJSON)
+    path("export/<str:dataset>/", export_data),
+
+    # Billing
+    path("billing/runs/", billing_runs),
+    path("billing/runs/<str:month>/", billing_run_detail),
+    path("billing/invoices/", invoices),
+    path("billing/mrr/<str:month>/", billing_mrr),
 
     # Statistics endpoints
     path("stats/", stats_overview),
     path("stats/activities/", stats_activities),
     path("stats/members-per-activity/", stats_members_per_activity),
+    path("stats/members-per-activity/<int:activity_id>/", stats_activity_members),
+    path("stats/timeseries/<str:metric>/", stats_timeseries),
+    path("stats/breakdown/<str:name>/", stats_breakdown),
 ]
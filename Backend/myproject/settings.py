@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'club.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -116,10 +118,101 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts (enrollment reservations
+            # write first), and wait for it instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
 
+# Cache
+# CLUB_CACHE_BACKEND selects the backend: "locmem" (per process, default),
+# "file" (shared by the workers of one host) or "redis" / "memcached"
+# (shared by every host, CLUB_CACHE_LOCATION gives the server address).
+
+CLUB_CACHE_BACKEND = os.environ.get('CLUB_CACHE_BACKEND', 'locmem')
+CLUB_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sport-club',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CLUB_CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('CLUB_CACHE_LOCATION', 'redis://127.0.0.1:6379'),
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ.get('CLUB_CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+}
+CACHES = {'default': CLUB_CACHE_BACKENDS[CLUB_CACHE_BACKEND]}
+
+# Public activities catalogue (GET /activities/), invalidated on every change
+CLUB_CATALOGUE_CACHE_TIMEOUT = 300
+
+# Conditional GET: browsers/proxies may reuse public responses (activities,
+# class sessions) for this many seconds before revalidating with the ETag
+CLUB_PUBLIC_MAX_AGE = 60
+
+# Statistics overview snapshot: served as-is for CLUB_STATS_CACHE_TTL seconds, then
+# served stale for up to CLUB_STATS_STALE_TTL more while one refresh runs in background
+CLUB_STATS_CACHE_TTL = 30
+CLUB_STATS_STALE_TTL = 300
+
+# Time-series buckets of closed periods (invalidated on deletes / subscription changes)
+CLUB_TIMESERIES_CACHE_TIMEOUT = 24 * 3600
+
+# In-memory analytics cube for /stats/breakdown/ (needs the optional numpy package).
+# Loaded on first use and kept current by signals; the scheduler rebuilds it in the
+# background every CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL seconds to catch writes made by
+# other processes.
+CLUB_ANALYTICS_CUBE = True
+CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL = 300
+
+# In-process scheduler (club.services.scheduler), started by the first request a process
+# serves. CLUB_SCHEDULER_ENABLED makes this process run the club-wide jobs: the expired-
+# subscription sweep every CLUB_EXPIRY_SWEEP_INTERVAL seconds and the session materialization.
+# Every worker would run them in parallel: set it on exactly one process, or leave it off and
+# run `manage.py expire_subscriptions` / `manage.py materialize_sessions` from cron.
+# The analytics cube rebuild is per process and follows CLUB_ANALYTICS_CUBE_REBUILD_INTERVAL.
+CLUB_SCHEDULER_ENABLED = os.environ.get('CLUB_SCHEDULER_ENABLED', 'false').lower() == 'true'
+# Turns the scheduler off for `manage.py test`
+TEST_RUNNER = 'club.test_runner.ClubTestRunner'
+CLUB_EXPIRY_SWEEP_INTERVAL = 3600
+
+# Recurring class schedules: occurrences are expanded on demand; the next
+# CLUB_SCHEDULE_HORIZON_DAYS days are materialized as class sessions, refreshed by the
+# scheduler every CLUB_SCHEDULE_MATERIALIZE_INTERVAL seconds (or `manage.py materialize_sessions`).
+CLUB_SCHEDULE_HORIZON_DAYS = 28
+CLUB_SCHEDULE_MATERIALIZE_INTERVAL = 6 * 3600
+
+# iCalendar feeds (/class-sessions/calendar.ics, /activities/<id>/calendar.ics): sessions from
+# CLUB_ICS_FEED_PAST_DAYS ago to CLUB_ICS_FEED_DAYS ahead. The generated feed is cached until a
+# session, schedule or activity in its window changes.
+CLUB_ICS_FEED_PAST_DAYS = 30
+CLUB_ICS_FEED_DAYS = 180
+CLUB_ICS_CACHE_TIMEOUT = 24 * 3600
+
+# Door check-ins are buffered and written in batches of up to CLUB_CHECKIN_FLUSH_SIZE rows,
+# at most CLUB_CHECKIN_FLUSH_INTERVAL seconds after the first pending one
+CLUB_CHECKIN_FLUSH_INTERVAL = 0.005
+CLUB_CHECKIN_FLUSH_SIZE = 500
+
+# SQL query budgets per endpoint (club/api/budgets.py), measured by club.middleware:
+# "warn" logs requests over budget or repeating a statement CLUB_QUERY_REPEAT_THRESHOLD
+# times (N+1), "raise" fails them (set by club.test_runner), "off" removes the middleware. Checked for every endpoint
+# by `python manage.py check_query_budgets`.
+CLUB_QUERY_BUDGETS = os.environ.get('CLUB_QUERY_BUDGETS', 'warn' if DEBUG else 'off')
+CLUB_QUERY_REPEAT_THRESHOLD = 3
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -152,6 +245,11 @@ USE_TZ = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Activity photo derivatives (club.services.photos): longest side in pixels for
+# each size, generated in WebP and JPEG by a pool of background threads
+CLUB_PHOTO_SIZES = {'thumb': 160, 'medium': 640, 'full': 1600}
+CLUB_PHOTO_WORKERS = 2
+
 
 
 # Static files (CSS, JavaScript, Images)